@@ -1,11 +1,30 @@
+import time
+
+# Start of the time-to-first-paint measurement (see App.on_first_paint)
+STARTED = time.perf_counter()
+
+import os
+import queue
+import sys
+import threading
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import messagebox
 from datetime import datetime, timedelta
-from tkcalendar import DateEntry
-import webbrowser
+# tkcalendar (see entry_dialog.py) and webbrowser are imported where first
+# used: neither is needed for the first frame
+import instrument
 from models import EntryModel
-from storage import Storage
+from storage import open_storage, WriteBehindStorage
 from scheduler import ReminderScheduler
+from entry_dialog import EntryDialog
+from details_viewer import DetailsViewer
+from entry_list import VirtualEntryList
+from reminder_digest import ReminderDigest
+from entry_index import EntryIndex, entry_in_view
+from archiver import AutoArchiver
+from loader import ProgressiveLoader
+from search_index import SearchIndex
+from recurrence import complete_occurrence, display_time, mark_fired, set_override
 
 
 class App:
@@ -41,21 +60,131 @@ class App:
         self.root.configure(bg=self.colors["bg"])
 
         # DATA
-        self.storage = Storage("entries.json")
-        self.entries = self.storage.load_entries()
-
-        # SCHEDULER
-        self.scheduler = ReminderScheduler(self)
-        self.scheduler.start()
+        # Saves are queued and written by a background worker; see on_close
+        self.storage = WriteBehindStorage(open_storage("entries.json"), latency=0.5)
+        # Entries arrive from ProgressiveLoader after the window is up.
+        # Writes wait until then: a full-file engine must never save a
+        # partial list.
+        self.storage.hold()
+        # id -> entry, in the order added; the storage gets entries.values()
+        self.entries = {}
+        self.index = EntryIndex()
+        self.loading = True
+        # Archived entries stay on disk: the archive view pages through them,
+        # search reads the ones it shows, and building its index loads them all
+        self.archive_loaded = False
+        self.archive_key = None  # where the next archive page starts; None: no more
+        # The first page is read on a thread; see request_archive_page
+        self.archive_pages = queue.Queue()
+        self.archive_request = 0  # number of the latest request
+        self.archive_pending = False
+
+        # SEARCH (loaded or built on first use; see get_search)
+        self.search = None
+        self.search_pending = set()  # ids changed before the index existed
+        self.search_path = os.path.join(self.storage.data_dir, "search_index.json")
+        # Taken before anything is written, so it matches the persisted index
+        self.search_fingerprint = self.storage.fingerprint()
+
+        # SCHEDULER (thread starts after the first paint)
+        self.scheduler = ReminderScheduler()
+
+        # AUTO ARCHIVE (timer starts after the first paint)
+        self.archiver = AutoArchiver(self)
 
         # ACTIVE VIEW
-        self.current_view = "all"  # all | next | ideas | archive
+        self.current_view = "all"  # all | next | ideas | archive | search
 
         # BUILD UI
         self.build_ui()
         
         self.bind_shortcuts()
 
+        self.loader = ProgressiveLoader(self, self.storage)
+        # New / Edit window, built after the first paint and reused
+        self.entry_dialog = EntryDialog(self)
+        # Full details of an entry, for cards that cut them short
+        self.details_viewer = DetailsViewer(self)
+        # Open window collecting a burst of reminders, if any
+        self.reminder_digest = None
+
+        # Loading, the scheduler and the timers wait for the first paint
+        self.started = False
+        self.first_paint_seconds = None
+        self.root.bind("<Expose>", self.on_expose)
+        # In case the window is never exposed (started minimized)
+        self.root.after(self.FIRST_PAINT_TIMEOUT_MS, self.on_first_paint)
+
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    # ---------------- STARTUP ----------------
+    FIRST_PAINT_TIMEOUT_MS = 2000
+
+    def on_expose(self, event):
+        # Bound on the root, so any widget's first Expose lands here. Its
+        # redraw is an idle task queued before this one.
+        self.root.unbind("<Expose>")
+        self.root.after_idle(self.on_first_paint)
+
+    def on_first_paint(self):
+        """Start the background work once the window has been drawn."""
+        if self.started:
+            return
+        self.started = True
+        self.first_paint_seconds = time.perf_counter() - STARTED
+        instrument.record("app.first_paint", STARTED)
+
+        self.loader.start()
+        self.scheduler.start()
+        self.archiver.start()
+        self.poll_reminders()
+        self.poll_changes()
+        # Ready before the first Ctrl+N, without delaying the first paint
+        self.root.after_idle(self.entry_dialog.prebuild)
+
+    def on_close(self):
+        # Anything still loading must be in memory before the final save
+        self.loader.finish()
+        self.archiver.stop()
+        self.scheduler.stop()
+        self.storage.flush()
+        # Keep the search index next to the data it was built from. One not
+        # used this session is left alone: a stale file is rebuilt on load.
+        if self.search is not None:
+            self.search.save(self.search_path, self.storage.fingerprint())
+        self.root.destroy()
+
+    # ---------------- PROGRESSIVE LOADING ----------------
+    def add_loaded_entries(self, entries):
+        for entry in entries:
+            self.entries[entry.id] = entry
+            self.index.add(entry)
+            self.archiver.track(entry)
+        self.scheduler.reschedule_many(entries)
+
+        now = datetime.now()
+        if any(entry_in_view(e, self.current_view, now) for e in entries):
+            self.refresh_current_view(keep_scroll=True)
+
+    def on_load_complete(self):
+        self.loading = False
+        self.storage.release()
+        self.update_empty_state()
+
+    def load_archive(self):
+        """Read the archived entries the first time they are needed."""
+        if self.archive_loaded:
+            return
+        if self.loading:
+            self.loader.finish()
+        self.archive_loaded = True
+
+        # Entries already in memory are newer than their archived copy
+        entries = [e for e in self.storage.load_archive() if self.index.get(e.id) is None]
+        for entry in entries:
+            self.entries[entry.id] = entry
+            self.index.add(entry)
+
     # ---------------- Small helper for hover ----------------
     def add_hover(self, widget, normal_bg, hover_bg):
         def on_enter(e):
@@ -65,52 +194,6 @@ class App:
         widget.bind("<Enter>", on_enter)
         widget.bind("<Leave>", on_leave)
 
-    # ---------------- Scrollable area helper ----------------
-    def create_scrollable_area(self, parent):
-        canvas = tk.Canvas(
-            parent,
-            bg=self.colors["main_bg"],
-            highlightthickness=0
-        )
-
-        scrollbar = ttk.Scrollbar(
-            parent,
-            orient="vertical",
-            command=canvas.yview
-        )
-
-        scrollable_frame = tk.Frame(
-            canvas,
-            bg=self.colors["main_bg"]
-        )
-
-        scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(
-                scrollregion=canvas.bbox("all")
-            )
-        )
-
-        canvas.create_window(
-            (0, 0),
-            window=scrollable_frame,
-            anchor="nw"
-        )
-
-        canvas.configure(yscrollcommand=scrollbar.set)
-
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-
-        scrollable_frame.bind_all(
-            "<MouseWheel>",
-            lambda e: canvas.yview_scroll(
-                int(-1 * (e.delta / 120)), "units"
-            )
-        )
-
-        return scrollable_frame
-
     # ---------------- UI BUILD ----------------
     def build_ui(self):
         # Sidebar
@@ -159,6 +242,7 @@ class App:
         make_btn("📌 Next", "next").pack(fill="x", pady=2)
         make_btn("💡 Ideas", "ideas").pack(fill="x", pady=2)
         make_btn("🗄 Archive", "archive").pack(fill="x", pady=2)
+        make_btn("🔎 Search", "search").pack(fill="x", pady=2)
 
         # Spacer to push feedback button to bottom
         tk.Frame(sidebar, bg=self.colors["sidebar_bg"]).pack(expand=True, fill="both")
@@ -192,6 +276,34 @@ class App:
         )
         self.main_panel.pack(side=tk.RIGHT, expand=True, fill="both")
 
+        # Search box, only packed while the search view is active
+        self.search_bar = tk.Frame(self.main_panel, bg=self.colors["main_bg"])
+        self.search_var = tk.StringVar()
+        self.search_box = tk.Entry(
+            self.search_bar,
+            textvariable=self.search_var,
+            bg=self.colors["card_bg"],
+            fg=self.colors["text_main"],
+            insertbackground=self.colors["accent"],
+            relief="flat",
+            font=("Helvetica", 13)
+        )
+        self.search_box.pack(fill="x", ipady=6)
+        self.search_var.trace_add("write", lambda *_: self.on_search_changed())
+
+        self.list_area = tk.Frame(self.main_panel, bg=self.colors["main_bg"])
+        self.list_area.pack(expand=True, fill="both")
+
+        self.empty_label = tk.Label(
+            self.list_area,
+            text="Nothing here yet.",
+            bg=self.colors["main_bg"],
+            fg=self.colors["text_muted"],
+            font=("Helvetica", 12, "italic")
+        )
+        self.entry_list = VirtualEntryList(self, self.list_area)
+        self.entry_list.on_end = self.load_more_archive
+
         self.refresh_current_view()
 
     # ---------------- Keyboard shortcuts ----------------
@@ -211,650 +323,443 @@ class App:
         self.root.bind("<Control-r>", lambda e: self.switch_view("archive"))
         self.root.bind("<Control-R>", lambda e: self.switch_view("archive"))
 
+        self.root.bind("<Control-f>", lambda e: self.switch_view("search"))
+        self.root.bind("<Control-F>", lambda e: self.switch_view("search"))
+
     def bind_escape_to_close(self, window):
         window.bind("<Escape>", lambda e: window.destroy())
 
     # ---------------- CENTRAL VIEW SWITCH ----------------
     def switch_view(self, view_name):
+        if view_name == "search":
+            self.get_search()
+            self.search_bar.pack(fill="x", pady=(0, 10), before=self.list_area)
+            self.search_box.focus_set()
+            self.search_box.select_range(0, tk.END)
+        else:
+            self.search_bar.pack_forget()
+
         self.current_view = view_name
         self.refresh_current_view()
 
-    def refresh_current_view(self):
+    @instrument.timed("app.refresh_current_view")
+    def refresh_current_view(self, keep_scroll=False):
         self.auto_archive_overdue()
 
-        # FILTER BASED ON ACTIVE VIEW
-        if self.current_view == "all":
-            entries = [e for e in self.entries if not e.archived]
-
-        elif self.current_view == "next":
-            now = datetime.now()
-            entries = [
-                e for e in self.entries if e.time and e.time >= now and not e.archived
-            ]
-            entries.sort(key=lambda e: e.time)
-
-        elif self.current_view == "ideas":
-            entries = [
-                e for e in self.entries if e.type == "idea" and not e.archived
-            ]
-
+        # VIEWS ARE MAINTAINED INCREMENTALLY BY THE INDEX
+        if self.current_view == "search":
+            entries = self.search_entries(self.search_var.get())
         elif self.current_view == "archive":
-            entries = [e for e in self.entries if e.archived]
-
+            self.request_archive_page(keep_scroll)
+            if keep_scroll:
+                return  # the cards shown stay until the new page is in
+            entries = []
         else:
-            entries = [e for e in self.entries if not e.archived]
+            entries = self.index.view(self.current_view)
 
         # RENDER
-        self.refresh_main_panel(entries)
-
-    def focus_window(self, window):
-        window.transient(self.root)
-        window.grab_set()
-        window.focus_force()
+        self.refresh_main_panel(entries, keep_scroll)
 
-    # ---------------- MAIN VIEW RENDERING ----------------
-    def refresh_main_panel(self, entries):
-        for widget in self.main_panel.winfo_children():
-            widget.destroy()
+    def refresh_entry(self, entry, deleted=False):
+        """Update only this entry's card after a single mutation."""
+        entry_list = self.entry_list
 
-        if not entries:
-            tk.Label(
-                self.main_panel,
-                text="Nothing here yet.",
-                bg=self.colors["main_bg"],
-                fg=self.colors["text_muted"],
-                font=("Helvetica", 12, "italic")
-            ).pack(anchor="center", pady=20)
+        if self.current_view == "search":
+            # Results only change with the query; keep the shown cards current
+            if deleted:
+                entry_list.remove(entry)
+            else:
+                entry_list.update(entry)
+            self.update_empty_state()
             return
 
-        # ⬇️ CREATE SCROLLABLE CONTENT AREA
-        content = self.create_scrollable_area(self.main_panel)
-
-        for entry in entries:
-            card = tk.Frame(
-                content,
-                bg=self.colors["card_bg"],
-                padx=10,
-                pady=8
-            )
-            card.pack(fill="x", pady=6)
-
-            # Header
-            header = tk.Frame(card, bg=self.colors["card_bg"])
-            header.pack(fill="x")
-
-            # Type badge
-            type_color = self.type_colors.get(entry.type, self.colors["accent"])
-            tk.Label(
-                header,
-                text=entry.type.capitalize(),
-                bg=type_color,
-                fg="#000000",
-                font=("Helvetica", 9, "bold"),
-                padx=6,
-                pady=1
-            ).pack(side="left")
-
-            # Title
-            tk.Label(
-                header,
-                text=entry.title,
-                bg=self.colors["card_bg"],
-                fg=self.colors["text_main"],
-                font=("Helvetica", 14, "bold"),
-                padx=8
-            ).pack(side="left")
-
-            # Time
-            if entry.time:
-                ts = entry.time.strftime("%Y-%m-%d %H:%M")
-                tk.Label(
-                    header,
-                    text=ts,
-                    bg=self.colors["card_bg"],
-                    fg=self.colors["text_muted"],
-                    font=("Helvetica", 10, "italic")
-                ).pack(side="right")
-
-            # Details
-            if entry.details:
-                tk.Label(
-                    card,
-                    text=entry.details,
-                    bg=self.colors["card_bg"],
-                    fg=self.colors["text_main"],
-                    wraplength=600,
-                    justify="left"
-                ).pack(anchor="w", pady=(4, 2))
-
-            # Actions
-            actions = tk.Frame(card, bg=self.colors["card_bg"])
-            actions.pack(fill="x", pady=(4, 0))
-
-            if self.current_view == "archive":
-                can_restore = True
-
-                # If it has a time AND it's more than 24h overdue → hide restore
-                if entry.time:
-                    age_seconds = (datetime.now() - entry.time).total_seconds()
-                    if age_seconds > 24 * 3600:
-                        can_restore = False
-
-                if can_restore:
-                    restore_btn = tk.Button(
-                        actions,
-                        text="Restore",
-                        command=lambda e=entry: self.unarchive_entry(e),
-                        bg="#4caf50",
-                        fg="#ffffff",
-                        bd=0,
-                        padx=6,
-                        pady=2
-                    )
-                    self.add_hover(restore_btn, "#4caf50", "#66bb6a")
-                    restore_btn.pack(side="right", padx=4)
-
-                delete_btn = tk.Button(
-                    actions,
-                    text="Delete",
-                    command=lambda e=entry: self.delete_entry(e),
-                    bg="#ff4d4d",
-                    fg="#ffffff",
-                    bd=0,
-                    padx=6,
-                    pady=2
-                )
-                self.add_hover(delete_btn, "#ff4d4d", "#ff6666")
-                delete_btn.pack(side="right", padx=4)
-
+        now = datetime.now()
+        present = entry_list.index_of(entry) is not None
+        belongs = not deleted and entry_in_view(entry, self.current_view, now)
+
+        if self.current_view == "next" and present and belongs:
+            # The time may have changed; re-insert at its sorted position
+            entry_list.remove(entry)
+            present = False
+
+        if present and not belongs:
+            entry_list.remove(entry)
+        elif present:
+            entry_list.update(entry)
+        elif belongs:
+            if entry_list.key is not None:
+                # Where a full refresh would put it
+                index = entry_list.sorted_row(entry_list.key(entry))
             else:
-                edit_btn = tk.Button(
-                    actions,
-                    text="Edit",
-                    command=lambda e=entry: self.open_edit(e),
-                    bg="#5b8def",
-                    fg="white",
-                    bd=0,
-                    padx=6,
-                    pady=2
-                )
-                self.add_hover(edit_btn, "#5b8def", "#769dff")
-                edit_btn.pack(side="right", padx=4)
-
-                archive_btn = tk.Button(
-                    actions,
-                    text="Archive",
-                    command=lambda e=entry: self.archive_entry(e),
-                    bg="#44445a",
-                    fg=self.colors["text_main"],
-                    bd=0,
-                    padx=6,
-                    pady=2
-                )
-                self.add_hover(archive_btn, "#44445a", "#55556b")
-                archive_btn.pack(side="right", padx=4)
-
-    # ---------------- ENTRY CREATION ----------------
-    def open_new(self):
-        new_window = tk.Toplevel(self.root)
-        self.focus_window(new_window)
-        self.bind_escape_to_close(new_window)
-        new_window.title("New Entry")
-        new_window.configure(bg=self.colors["main_bg"])
-        new_window.geometry("500x620")
-        
-
-        # ---------- REUSABLE STYLES ----------
-        LABEL_STYLE = {
-            "bg": self.colors["main_bg"],
-            "fg": self.colors["text_main"],
-            "font": ("Helvetica", 12, "bold"),
-            "anchor": "w",
-            "padx": 10,
-            "pady": 4
-        }
-
-        ENTRY_STYLE = {
-            "bg": self.colors["card_bg"],
-            "fg": self.colors["text_main"],
-            "insertbackground": self.colors["accent"],
-            "relief": "flat",
-        }
-
-        # Outer container
-        container = tk.Frame(new_window, bg=self.colors["main_bg"])
-        container.pack(fill="both", expand=True, padx=10, pady=10)
-
-        # TYPE SELECTOR
-        tk.Label(container, text="Select type:", **LABEL_STYLE).pack(fill="x")
-
-        selected_type = tk.StringVar(value="idea")
-        type_frame = tk.Frame(container, bg=self.colors["main_bg"])
-        type_frame.pack(fill="x", pady=(0, 10))
+                index = 0  # archive: newest first
+            entry_list.insert(index, entry)
+
+        self.update_empty_state()
+
+    # ---------------- ARCHIVE PAGES ----------------
+    ARCHIVE_PAGE_SIZE = 50
+
+    ARCHIVE_POLL_MS = 30
+
+    def request_archive_page(self, keep_scroll=False):
+        """Read the first archive page on a thread; show_archive_page() shows it.
+
+        The read first waits for queued writes, as entries just archived
+        would be missing from the page otherwise, and the UI must not
+        wait with it.
+        """
+        if self.loading:
+            self.loader.finish()
+        self.archive_request += 1
+        self.archive_pending = True
+        self.archive_key = None  # no further pages until this one is in
+        threading.Thread(
+            target=self.read_archive_page, args=(self.archive_request, keep_scroll), daemon=True
+        ).start()
+        self.root.after(self.ARCHIVE_POLL_MS, self.poll_archive_page)
+
+    def read_archive_page(self, request, keep_scroll):
+        # Worker thread: never touches Tk
+        try:
+            self.storage.flush()
+            page, key = self.storage.archive_page(None, self.ARCHIVE_PAGE_SIZE)
+        except Exception as e:
+            print("ERROR reading archive:", e)
+            page, key = [], None
+        self.archive_pages.put((request, keep_scroll, page, key))
+
+    def poll_archive_page(self):
+        try:
+            result = self.archive_pages.get_nowait()
+        except queue.Empty:
+            self.root.after(self.ARCHIVE_POLL_MS, self.poll_archive_page)
+            return
+        self.show_archive_page(*result)
 
-        def make_radio(text, value):
-            return tk.Radiobutton(
-                type_frame,
-                text=text,
-                variable=selected_type,
-                value=value,
-                bg=self.colors["main_bg"],
-                fg=self.colors["text_main"],
-                selectcolor=self.colors["sidebar_bg"],
-                activebackground=self.colors["main_bg"],
-                activeforeground=self.colors["text_main"],
-                highlightthickness=0,
-                font=("Helvetica", 11)
-            )
+    def show_archive_page(self, request, keep_scroll, page, key):
+        if request != self.archive_request:
+            return  # a newer request is on its way
+        self.archive_pending = False
+        if self.current_view != "archive":
+            return
+        self.archive_key = key
+        self.refresh_main_panel(self.live_archive_entries(page), keep_scroll)
+
+    def next_archive_page(self):
+        page, self.archive_key = self.storage.archive_page(self.archive_key, self.ARCHIVE_PAGE_SIZE)
+        return self.live_archive_entries(page)
+
+    def live_archive_entries(self, page):
+        entries = []
+        for entry in page:
+            # Use the object already in memory, if any, so that Restore and
+            # Delete act on the one App.entries and the index know about
+            live = self.index.get(entry.id)
+            if live is None:
+                live = entry
+                self.entries[entry.id] = entry
+                self.index.add(entry)
+            if live.archived:
+                entries.append(live)
+        return entries
+
+    def load_more_archive(self):
+        """Called by the list when its last row scrolls into range."""
+        if self.current_view != "archive" or self.archive_key is None:
+            return
+        self.entry_list.extend(self.next_archive_page())
 
-        make_radio("Idea", "idea").pack(side="left", padx=10)
-        make_radio("Task", "task").pack(side="left", padx=10)
-        make_radio("Appointment", "appointment").pack(side="left", padx=10)
+    # ---------------- SEARCH ----------------
+    SEARCH_LIMIT = 500
 
-        task_time_var = tk.BooleanVar(value=False)
+    def get_search(self):
+        """The search index, loaded from disk or built on first use."""
+        if self.search is not None:
+            return self.search
 
-        # Checkbox for task time
-        task_time_checkbox = tk.Checkbutton(
-            container,
-            text="Set a time",
-            variable=task_time_var,
-            bg=self.colors["main_bg"],
-            fg=self.colors["text_muted"],
-            activebackground=self.colors["main_bg"],
-            selectcolor=self.colors["sidebar_bg"],
-            font=("Helvetica", 10)
-        )
+        if self.loading:
+            self.loader.finish()
 
-        # TITLE
-        tk.Label(container, text="Title:", **LABEL_STYLE).pack(fill="x")
-        title_entry = tk.Entry(container, width=40, **ENTRY_STYLE)
-        title_entry.pack(fill="x", padx=10, pady=(0, 10))
-        title_entry.focus_set()
-
-        # DETAILS
-        tk.Label(container, text="Details:", **LABEL_STYLE).pack(fill="x")
-        content_text = tk.Text(container, height=8, wrap="word", **ENTRY_STYLE)
-        content_text.pack(fill="both", padx=10, pady=(0, 10))
-
-        # DATE/TIME CONTAINER
-        tk.Label(container, text="Date & Time:", **LABEL_STYLE).pack(fill="x")
-
-        time_card = tk.Frame(container, bg=self.colors["card_bg"])
-        time_card.pack(fill="x", padx=10, pady=5)
-
-        date_label = tk.Label(time_card, text="Date:", bg=self.colors["card_bg"], fg=self.colors["text_main"])
-        date_label.grid(row=0, column=0, sticky="w", padx=5, pady=5)
-
-        date_picker = DateEntry(
-            time_card,
-            width=12,
-            background=self.colors["accent"],
-            foreground="white",
-            borderwidth=0,
-            date_pattern="yyyy-mm-dd",
-            justify="center",
-            selectbackground=self.colors["accent"],
-            selectforeground="white",
-            normalbackground=self.colors["card_bg"],
-            normalforeground=self.colors["text_main"],
-        )
-        date_picker.grid(row=0, column=1, padx=5, pady=5)
-
-        hour_label = tk.Label(time_card, text="Hour:", bg=self.colors["card_bg"], fg=self.colors["text_main"])
-        hour_label.grid(row=1, column=0, sticky="w", padx=5, pady=5)
-
-        hour_box = ttk.Combobox(time_card, values=[f"{i:02d}" for i in range(24)], width=4, state="readonly")
-        hour_box.set("12")
-        hour_box.grid(row=1, column=1, padx=5, pady=5)
-
-        minute_label = tk.Label(time_card, text="Minute:", bg=self.colors["card_bg"], fg=self.colors["text_main"])
-        minute_label.grid(row=2, column=0, sticky="w", padx=5, pady=5)
-
-        minute_box = ttk.Combobox(time_card, values=[f"{i:02d}" for i in range(60)], width=4, state="readonly")
-        minute_box.set("00")
-        minute_box.grid(row=2, column=1, padx=5, pady=5)
-
-        # TIME UI LOGIC
-        def update_time_ui(*args):
-            def disable(dp):
-                try:
-                    dp.entry_widget.config(state="disabled")
-                except Exception:
-                    dp.configure(state="disabled")
-
-            def enable(dp):
-                try:
-                    dp.entry_widget.config(state="normal")
-                except Exception:
-                    dp.configure(state="normal")
-
-            t = selected_type.get()
-            task_time_checkbox.pack_forget()
-
-            if t == "idea":
-                disable(date_picker)
-                hour_box.config(state="disabled")
-                minute_box.config(state="disabled")
-
-            elif t == "task":
-                task_time_checkbox.pack(anchor="w", padx=10)
-                if task_time_var.get():
-                    enable(date_picker)
-                    hour_box.config(state="readonly")
-                    minute_box.config(state="readonly")
+        search = SearchIndex.load(self.search_path, self.search_fingerprint)
+        if search is None:
+            self.load_archive()
+            # Archived entries are loaded last; they are mostly the
+            # oldest, so index them first to keep recency ranking sane
+            search = SearchIndex.build(sorted(self.entries.values(), key=lambda e: not e.archived))
+        else:
+            # Catch up with changes made since startup
+            for entry_id in self.search_pending:
+                entry = self.index.get(entry_id)
+                if entry is None:
+                    search.remove(entry_id)
                 else:
-                    disable(date_picker)
-                    hour_box.config(state="disabled")
-                    minute_box.config(state="disabled")
-
-            elif t == "appointment":
-                enable(date_picker)
-                hour_box.config(state="readonly")
-                minute_box.config(state="readonly")
-
-        selected_type.trace_add("write", update_time_ui)
-        task_time_var.trace_add("write", lambda *_: update_time_ui())
-        update_time_ui()
-
-        # SAVE BUTTON
-        save_btn = tk.Button(
-            container,
-            text="Save Entry",
-            bg=self.colors["accent"],
-            fg="#ffffff",
-            bd=0,
-            relief="flat",
-            padx=10,
-            pady=8,
-            font=("Helvetica", 12, "bold")
-        )
-        self.add_hover(save_btn, self.colors["accent"], "#769dff")
-        save_btn.pack(fill="x", padx=10, pady=15)
-
-        # SAVE LOGIC
-        def save():
-            entry_type = selected_type.get()
-            title = title_entry.get().strip()
-            details = content_text.get("1.0", tk.END).strip()
-            parsed_time = None
-
-            if not title:
-                messagebox.showerror("Error", "Title cannot be empty.")
-                return
-
-            if entry_type == "task" and task_time_var.get():
-                parsed_time = datetime(
-                    date_picker.get_date().year,
-                    date_picker.get_date().month,
-                    date_picker.get_date().day,
-                    int(hour_box.get()),
-                    int(minute_box.get())
-                )
-
-            elif entry_type == "appointment":
-                parsed_time = datetime(
-                    date_picker.get_date().year,
-                    date_picker.get_date().month,
-                    date_picker.get_date().day,
-                    int(hour_box.get()),
-                    int(minute_box.get())
-                )
-
-            new_entry = EntryModel(
-                type=entry_type,
-                title=title,
-                details=details,
-                time=parsed_time,
-                done=False,
-                archived=False,
-                notified=False,
-                reminder_time=parsed_time
-            )
-
-            self.entries.append(new_entry)
-            self.storage.save_entries(self.entries)
+                    search.update(entry)
+
+        self.search_pending.clear()
+        self.search = search
+        return search
+
+    @instrument.timed("app.search_entries")
+    def search_entries(self, query):
+        ids = self.get_search().search(query, self.SEARCH_LIMIT)
+        missing = [entry_id for entry_id in ids if self.index.get(entry_id) is None]
+        if missing and not self.archive_loaded:
+            # Archived hits not read yet: fetch just those from the archive
+            self.live_archive_entries(self.storage.archived_entries(missing))
+        return [e for e in map(self.index.get, ids) if e is not None]
+
+    def on_search_changed(self):
+        if self.current_view == "search":
             self.refresh_current_view()
-            new_window.destroy()
-
-        save_btn.configure(command=save)
-
-    # ---------------- ENTRY EDITING ----------------
-    def open_edit(self, entry):
-        edit_win = tk.Toplevel(self.root)
-        self.focus_window(edit_win)
-        self.bind_escape_to_close(edit_win)
-        edit_win.title("Edit Entry")
-        edit_win.configure(bg=self.colors["main_bg"])
-        edit_win.geometry("500x620")
-
-        # ---------- STYLES ----------
-        LABEL_STYLE = {
-            "bg": self.colors["main_bg"],
-            "fg": self.colors["text_main"],
-            "font": ("Helvetica", 12, "bold"),
-            "anchor": "w",
-            "padx": 10,
-            "pady": 4
-        }
-
-        ENTRY_STYLE = {
-            "bg": self.colors["card_bg"],
-            "fg": self.colors["text_main"],
-            "insertbackground": self.colors["accent"],
-            "relief": "flat",
-        }
 
-        container = tk.Frame(edit_win, bg=self.colors["main_bg"])
-        container.pack(fill="both", expand=True, padx=10, pady=10)
-
-        # TYPE SELECT
-        tk.Label(container, text="Type:", **LABEL_STYLE).pack(fill="x")
-        selected_type = tk.StringVar(value=entry.type)
-
-        type_frame = tk.Frame(container, bg=self.colors["main_bg"])
-        type_frame.pack(fill="x", pady=(0, 10))
-
-        def make_radio(text, val):
-            return tk.Radiobutton(
-                type_frame,
-                text=text,
-                variable=selected_type,
-                value=val,
-                bg=self.colors["main_bg"],
-                fg=self.colors["text_main"],
-                selectcolor=self.colors["sidebar_bg"],
-                activebackground=self.colors["main_bg"],
-                activeforeground=self.colors["text_main"],
-                highlightthickness=0,
-                font=("Helvetica", 11)
-            )
-
-        make_radio("Idea", "idea").pack(side="left", padx=10)
-        make_radio("Task", "task").pack(side="left", padx=10)
-        make_radio("Appointment", "appointment").pack(side="left", padx=10)
-
-        # TASK time toggle
-        task_time_var = tk.BooleanVar(value=entry.type=="task" and entry.time is not None)
-
-        task_time_checkbox = tk.Checkbutton(
-            container,
-            text="Set a time",
-            variable=task_time_var,
-            bg=self.colors["main_bg"],
-            fg=self.colors["text_muted"],
-            activebackground=self.colors["main_bg"],
-            selectcolor=self.colors["sidebar_bg"],
-            font=("Helvetica", 10)
-        )
-
-        # TITLE
-        tk.Label(container, text="Title:", **LABEL_STYLE).pack(fill="x")
-        title_entry = tk.Entry(container, width=40, **ENTRY_STYLE)
-        title_entry.insert(0, entry.title)
-        title_entry.pack(fill="x", padx=10, pady=(0, 10))
-        title_entry.focus_set()
-
-        # DETAILS
-        tk.Label(container, text="Details:", **LABEL_STYLE).pack(fill="x")
-        content_text = tk.Text(container, height=8, wrap="word", **ENTRY_STYLE)
-        content_text.insert("1.0", entry.details)
-        content_text.pack(fill="both", padx=10, pady=(0, 10))
-
-        # DATE/TIME CARD
-        tk.Label(container, text="Date & Time:", **LABEL_STYLE).pack(fill="x")
-
-        time_card = tk.Frame(container, bg=self.colors["card_bg"])
-        time_card.pack(fill="x", padx=10, pady=5)
-
-        date_label = tk.Label(time_card, text="Date:", bg=self.colors["card_bg"], fg=self.colors["text_main"])
-        date_label.grid(row=0, column=0, sticky="w", padx=5, pady=5)
-
-        date_picker = DateEntry(
-            time_card,
-            width=12,
-            background=self.colors["accent"],
-            foreground="white",
-            borderwidth=0,
-            date_pattern="yyyy-mm-dd",
-            justify="center"
-        )
-        date_picker.grid(row=0, column=1, padx=5, pady=5)
-
-        hour_label = tk.Label(time_card, text="Hour:", bg=self.colors["card_bg"], fg=self.colors["text_main"])
-        hour_label.grid(row=1, column=0, sticky="w", padx=5, pady=5)
-
-        hour_box = ttk.Combobox(time_card, values=[f"{i:02d}" for i in range(24)], width=4, state="readonly")
-        hour_box.grid(row=1, column=1, padx=5, pady=5)
-
-        minute_label = tk.Label(time_card, text="Minute:", bg=self.colors["card_bg"], fg=self.colors["text_main"])
-        minute_label.grid(row=2, column=0, sticky="w", padx=5, pady=5)
-
-        minute_box = ttk.Combobox(time_card, values=[f"{i:02d}" for i in range(60)], width=4, state="readonly")
-        minute_box.grid(row=2, column=1, padx=5, pady=5)
+    def focus_window(self, window):
+        window.transient(self.root)
+        window.grab_set()
+        window.focus_force()
 
-        # PREFILL TIME IF ANY
-        if entry.time:
-            date_picker.set_date(entry.time.date())
-            hour_box.set(f"{entry.time.hour:02d}")
-            minute_box.set(f"{entry.time.minute:02d}")
+    # ---------------- MAIN VIEW RENDERING ----------------
+    @instrument.timed("app.refresh_main_panel")
+    def refresh_main_panel(self, entries, keep_scroll=False):
+        # Only the cards around the viewport are built; see VirtualEntryList
+        self.entry_list.set_entries(entries, self.current_view, keep_scroll, self.view_sort_key())
+        self.update_empty_state()
+
+        if instrument.enabled:
+            instrument.count("render.widgets", self.count_widgets(self.main_panel))
+
+    def view_sort_key(self):
+        """What the current view is sorted by, if anything stable."""
+        if self.current_view == "next":
+            now = datetime.now()
+            return lambda entry: display_time(entry, now)
+        if self.current_view in ("all", "ideas"):
+            return self.index.seq_of
+        return None  # archive pages and search results
+
+    def count_widgets(self, widget):
+        return 1 + sum(self.count_widgets(child) for child in widget.winfo_children())
+
+    def update_empty_state(self):
+        if not self.entry_list.entries:
+            if self.loading or (self.current_view == "archive" and self.archive_pending):
+                text = "Loading…"
+            elif self.current_view == "search":
+                text = "No matches." if self.search_var.get().strip() else "Type to search."
+            else:
+                text = "Nothing here yet."
+            self.empty_label.configure(text=text)
+            self.entry_list.hide()
+            self.empty_label.pack(anchor="center", pady=20)
         else:
-            hour_box.set("12")
-            minute_box.set("00")
-
-        # TIME UI LOGIC
-        def refresh_time_ui(*args):
-            t = selected_type.get()
-
-            if t == "idea":
-                date_picker.config(state="disabled")
-                hour_box.config(state="disabled")
-                minute_box.config(state="disabled")
-                task_time_checkbox.pack_forget()
-            elif t == "task":
-                task_time_checkbox.pack(anchor="w", padx=10)
-                if task_time_var.get():
-                    date_picker.config(state="normal")
-                    hour_box.config(state="readonly")
-                    minute_box.config(state="readonly")
-                else:
-                    date_picker.config(state="disabled")
-                    hour_box.config(state="disabled")
-                    minute_box.config(state="disabled")
-            else:  # appointment
-                date_picker.config(state="normal")
-                hour_box.config(state="readonly")
-                minute_box.config(state="readonly")
-                task_time_checkbox.pack_forget()
-
-        selected_type.trace_add("write", refresh_time_ui)
-        task_time_var.trace_add("write", refresh_time_ui)
-        refresh_time_ui()
-
-        # SAVE EDIT
-        save_btn = tk.Button(
-            container,
-            text="Save Changes",
-            bg=self.colors["accent"],
-            fg="white",
-            bd=0,
-            padx=10,
-            pady=8,
-            font=("Helvetica", 12, "bold")
-        )
-        self.add_hover(save_btn, self.colors["accent"], "#769dff")
-        save_btn.pack(fill="x", padx=10, pady=15)
-
-        def save_changes():
-            entry.type = selected_type.get()
-            entry.title = title_entry.get().strip()
-            entry.details = content_text.get("1.0", tk.END).strip()
-
-            if entry.type == "appointment":
-                entry.time = datetime(
-                    date_picker.get_date().year,
-                    date_picker.get_date().month,
-                    date_picker.get_date().day,
-                    int(hour_box.get()),
-                    int(minute_box.get())
-                )
-            elif entry.type == "task":
-                if task_time_var.get():
-                    entry.time = datetime(
-                        date_picker.get_date().year,
-                        date_picker.get_date().month,
-                        date_picker.get_date().day,
-                        int(hour_box.get()),
-                        int(minute_box.get())
-                    )
-                else:
-                    entry.time = None
-            else:  # idea
-                entry.time = None
+            self.empty_label.pack_forget()
+            self.entry_list.show()
 
-            # Reset reminder to point to the updated time
-            entry.notified = False
-            entry.reminder_time = entry.time
+    # ---------------- ENTRY DIALOG ----------------
+    def open_new(self):
+        self.entry_dialog.open()
 
-            self.storage.save_entries(self.entries)
-            self.refresh_current_view()
-            edit_win.destroy()
+    def open_edit(self, entry):
+        self.entry_dialog.open(entry)
 
-        save_btn.configure(command=save_changes)
+    def show_details(self, entry):
+        if entry is not None:
+            self.details_viewer.open(entry)
 
     # ---------------- ACTIONS ----------------
     def archive_entry(self, entry):
         entry.archived = True
-        self.storage.save_entries(self.entries)
-        self.refresh_current_view()
+        self.entry_changed(entry)
+        self.refresh_entry(entry)
 
     def unarchive_entry(self, entry):
         entry.archived = False
-        self.storage.save_entries(self.entries)
-        self.refresh_current_view()
+        self.entry_changed(entry)
+        self.refresh_entry(entry)
 
     def delete_entry(self, entry):
-        if entry in self.entries:
-            self.entries.remove(entry)
-            self.storage.save_entries(self.entries)
-        self.refresh_current_view()
+        if self.entries.get(entry.id) is entry:
+            self.entries.pop(entry.id, None)
+            self.entry_deleted(entry)
+        self.refresh_entry(entry, deleted=True)
+
+    # ---------------- CHANGE PROPAGATION ----------------
+    def entry_changed(self, entry):
+        """Persist a new or changed entry and update everything derived from it."""
+        self.storage.save_entry(entry, self.entries.values())
+        self.track_entry(entry)
+
+    def entries_changed(self, entries):
+        """entry_changed() for several entries, saved as one batch."""
+        self.storage.save_batch(entries, [], self.entries.values())
+        for entry in entries:
+            self.track_entry(entry)
+
+    def entry_deleted(self, entry):
+        self.storage.delete_entry(entry, self.entries.values())
+        self.untrack_entry(entry)
+
+    def track_entry(self, entry):
+        self.index.update(entry)
+        if self.search is None:
+            self.search_pending.add(entry.id)
+        else:
+            self.search.update(entry)
+        self.scheduler.reschedule(entry)
+        self.archiver.track(entry)
+
+    def untrack_entry(self, entry):
+        self.index.remove(entry)
+        if self.search is None:
+            self.search_pending.add(entry.id)
+        else:
+            self.search.remove(entry.id)
+        self.scheduler.unschedule(entry)
+        self.archiver.untrack(entry)
+
+    # ---------------- CHANGES FROM OTHER PROCESSES ----------------
+    CHANGE_POLL_MS = 1000
+    # Past this many changed entries, re-render the view instead of patching cards
+    MAX_CARD_UPDATES = 50
+
+    def poll_changes(self):
+        """Merge what another process (the CLI, a second window) wrote."""
+        if not self.loading:
+            changes = self.storage.poll_changes()
+            if changes is not None:
+                self.merge_changes(changes)
+
+        self.root.after(self.CHANGE_POLL_MS, self.poll_changes)
+
+    @instrument.timed("app.merge_changes")
+    def merge_changes(self, changes):
+        """Apply a storage ChangeSet to the live model, without saving it back."""
+        removed = set()
+        for entry_id in changes.deleted:
+            entry = self.index.get(entry_id)
+            # An entry archived elsewhere leaves the hot tier too; only
+            # its archive record says whether it still exists
+            if entry is not None and not entry.archived:
+                removed.add(entry)
+        for entry_id in changes.archive_deleted:
+            entry = self.index.get(entry_id)
+            if entry is not None and entry.archived:
+                removed.add(entry)
+        if changes.complete:
+            removed.update(
+                e for e in self.entries.values()
+                if not e.archived and e.id not in changes.put and e.id not in changes.keep
+            )
+
+        for entry in removed:
+            self.untrack_entry(entry)
+            # In place: the storage worker holds on to entries.values()
+            self.entries.pop(entry.id, None)
+
+        changed = []
+        for entry_id, new in changes.put.items():
+            entry = self.index.get(entry_id)
+            if entry is None:
+                # Archived entries are read from disk when needed
+                if new.archived and not self.archive_loaded:
+                    continue
+                self.entries[entry_id] = new
+                entry = new
+            else:
+                # Update in place; cards and queues refer to this object
+                for name in EntryModel.__slots__:
+                    setattr(entry, name, getattr(new, name))
+            self.track_entry(entry)
+            changed.append(entry)
+
+        if self.current_view == "archive" or len(removed) + len(changed) > self.MAX_CARD_UPDATES:
+            self.refresh_current_view(keep_scroll=True)
+            return
+        for entry in removed:
+            self.refresh_entry(entry, deleted=True)
+        for entry in changed:
+            self.refresh_entry(entry)
 
     # ---------------- AUTO ARCHIVE LOGIC ----------------
+    @instrument.timed("app.auto_archive_overdue")
     def auto_archive_overdue(self):
+        # Only entries whose time + 24h has passed come off the queue
+        for entry in self.archiver.pop_overdue():
+            entry.archived = True
+            self.entry_changed(entry)
+            self.refresh_entry(entry)
+
+    # ---------------- REMINDER EVENTS ----------------
+    REMINDER_POLL_MS = 250
+
+    def poll_reminders(self):
+        """Handle reminders reported by the scheduler thread (main thread only)."""
         now = datetime.now()
-        changed = False
+        fired, shown = [], []
 
-        for entry in self.entries:
-            if entry.time and not entry.archived:
-                # Archive items > 24 hours old
-                if (now - entry.time).total_seconds() > 24 * 3600:
-                    entry.archived = True
-                    changed = True
+        for entry_id, due in self.scheduler.drain_events():
+            entry = self.index.get(entry_id)
+            # Skip if the entry changed after the scheduler saw it
+            if entry is None or self.scheduler.reminder_due(entry) != due:
+                continue
 
-        if changed:
-            self.storage.save_entries(self.entries)
+            occurrence = None
+            if entry.recurrence is None:
+                entry.notified = True
+            else:
+                occurrence = mark_fired(entry, due, now - self.scheduler.catch_up_window)
+            fired.append(entry)
+
+            if now - due <= self.scheduler.catch_up_window:
+                shown.append((entry, occurrence))
+
+        if fired:
+            self.entries_changed(fired)
+        if shown:
+            self.show_reminders(shown)
+
+        self.root.after(self.REMINDER_POLL_MS, self.poll_reminders)
+
+    def show_reminders(self, items):
+        """One popup for a single reminder; a burst goes to the digest."""
+        if self.reminder_digest is None and len(items) == 1:
+            self.show_reminder_popup(*items[0])
+            return
+        if self.reminder_digest is None:
+            self.reminder_digest = ReminderDigest(self)
+        self.reminder_digest.add(items)
+
+    def snooze_reminders(self, items, minutes):
+        """Snooze (entry, occurrence) pairs, saved as one batch."""
+        reminder_time = datetime.now() + timedelta(minutes=minutes)
+        for entry, occurrence in items:
+            if occurrence is not None:
+                # Only this occurrence moves; the series keeps its times
+                set_override(entry, occurrence, {"reminder_time": reminder_time})
+            else:
+                entry.reminder_time = reminder_time
+                entry.notified = False
+        self.entries_changed([entry for entry, _ in items])
+
+    def complete_reminders(self, items):
+        """Mark (entry, occurrence) pairs done, saved as one batch."""
+        for entry, occurrence in items:
+            # A recurring entry is only done once its last occurrence is
+            if occurrence is None or complete_occurrence(entry, occurrence):
+                entry.done = True
+                entry.archived = True
+                entry.notified = True
+        entries = [entry for entry, _ in items]
+        self.entries_changed(entries)
+
+        if len(entries) > self.MAX_CARD_UPDATES:
+            self.refresh_current_view(keep_scroll=True)
+        else:
+            for entry in entries:
+                self.refresh_entry(entry)
 
     # ---------------- REMINDER POPUP ----------------
-    def show_reminder_popup(self, entry):
+    def show_reminder_popup(self, entry, occurrence=None):
+        """occurrence: start of the occurrence reminded of, for recurring entries."""
         popup = tk.Toplevel(self.root)
         popup.title("Reminder")
         popup.configure(bg=self.colors["card_bg"])
@@ -885,8 +790,9 @@ class App:
         ).pack(side="left", padx=8)
 
         # Time info
-        if entry.time:
-            ts = entry.time.strftime("%Y-%m-%d %H:%M")
+        when = occurrence or entry.time
+        if when:
+            ts = when.strftime("%Y-%m-%d %H:%M")
             tk.Label(
                 popup,
                 text=f"Scheduled for: {ts}",
@@ -920,17 +826,11 @@ class App:
         btn_row.pack(pady=15)
 
         def snooze(minutes):
-            entry.reminder_time = datetime.now() + timedelta(minutes=minutes)
-            entry.notified = False
-            self.storage.save_entries(self.entries)
+            self.snooze_reminders([(entry, occurrence)], minutes)
             popup.destroy()
 
         def mark_done():
-            entry.done = True
-            entry.archived = True
-            entry.notified = True
-            self.storage.save_entries(self.entries)
-            self.refresh_current_view()
+            self.complete_reminders([(entry, occurrence)])
             popup.destroy()
 
         snooze5 = tk.Button(
@@ -986,6 +886,8 @@ class App:
         ).pack(pady=(0, 10))
 
     def open_feedback(self):
+        import webbrowser
+
         try:
             webbrowser.open(self.feedback_url)
         except Exception:
@@ -995,8 +897,25 @@ class App:
             )
 
 if __name__ == "__main__":
+    for arg in sys.argv[1:]:
+        if arg == "--profile":
+            instrument.enable()
+        elif arg.startswith("--trace="):
+            instrument.enable(arg.split("=", 1)[1])
+
     root = tk.Tk()
     #root.geometry("650x400")
     root.minsize(650, 400)  # prevents breaking layout
-    App(root)
+    app = App(root)
+
+    if "--startup-time" in sys.argv[1:]:
+        # For benchmarks/run.py: report the first paint, then quit
+        def report_startup():
+            if app.first_paint_seconds is None:
+                root.after(10, report_startup)
+                return
+            print("first paint: %.1f ms" % (app.first_paint_seconds * 1000))
+            app.on_close()
+        root.after(10, report_startup)
+
     root.mainloop()
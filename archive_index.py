@@ -0,0 +1,397 @@
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+from array import array
+
+from models import EntryModel
+
+
+MAGIC = b"CMAX"
+VERSION = 2
+# magic, version, reserved, inode, covered bytes, slots, dead slots
+HEADER = struct.Struct("<4sHHQQQQ")
+SLOT = struct.Struct("<QQ")  # offset, id hash
+DEAD = 0  # id hash of a superseded record's slot
+
+# Lines as written by TieredStorage: {"op":"put","entry":{"id":"...",...}}
+# and {"op":"delete","id":"..."}. Anything else goes through json.loads.
+_RECORD_RE = re.compile(rb'\{"op":"(put|delete)",(?:"entry":\{)?"id":"([^"\\]*)"')
+
+_SWAP = sys.byteorder == "big"
+
+
+def id_hash(entry_id):
+    digest = hashlib.blake2b(entry_id.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1  # never DEAD
+
+
+def _parse(line):
+    """(op, entry id) of one archive record, or (None, None)."""
+    match = _RECORD_RE.match(line)
+    if match:
+        return match.group(1).decode(), match.group(2).decode("utf-8")
+    try:
+        record = json.loads(line)
+        if record["op"] == "put":
+            return "put", record["entry"]["id"]
+        return record["op"], record["id"]
+    except Exception:
+        return None, None
+
+
+class ArchiveIndex:
+    """Offsets of the live records in the archive segment, oldest first.
+
+    Kept in `<archive>.idx` next to the segment: one slot per record (its
+    offset and a hash of its entry id), plus how many bytes of the
+    segment they cover. refresh() only scans what was appended since; a
+    record superseded there (restored, deleted, archived again) has its
+    slot marked dead, found through a map from id hash to slot. The file
+    is updated in place: new slots are appended and dead ones overwritten.
+    Once half the slots are dead they are dropped and the file rewritten,
+    as is a rewritten segment (new inode) after a rescan.
+
+    Page reads map the segment and parse only the requested records;
+    pages are keyed by offset, so any page costs the same as the first.
+    Callers hold the storage's file lock.
+    """
+
+    def __init__(self, archive_path):
+        self.archive_path = archive_path
+        self.path = archive_path + ".idx"
+        self.offsets = array("Q")
+        self.hashes = array("Q")
+        self.dead = 0
+        self.inode = 0
+        self.covered = None  # None until loaded from disk
+
+        self._slots = None      # id hash -> slot of its live record, built on first use
+        self._collided = set()  # hashes with more than one live slot
+        self._written = None    # header of the .idx as last read or written
+        self._saved_slots = 0   # slots in the .idx file
+        self._killed = []       # slots marked dead since the last save
+
+    def __len__(self):
+        return len(self.offsets) - self.dead
+
+    # ------------------------------------------------------------
+    # UPDATE
+    # ------------------------------------------------------------
+    def invalidate(self):
+        """Forget everything; the segment was rewritten in place."""
+        self._reset(0)
+
+    def _reset(self, inode):
+        self.offsets, self.hashes = array("Q"), array("Q")
+        self.dead = 0
+        self.inode = inode
+        self.covered = 0
+        self._slots, self._collided = {}, set()
+        self._written = None
+        self._killed = []
+
+    def refresh(self):
+        """Catch up with the segment; returns the number of live records."""
+        if self.covered is None or self._read_header() != self._written:
+            self._load()  # first use, or another process updated the file
+
+        try:
+            st = os.stat(self.archive_path)
+        except OSError:
+            st = None
+
+        saved = self._written is not None
+        if st is None or st.st_ino != self.inode or st.st_size < self.covered \
+                or not self._spot_check():
+            self._reset(st.st_ino if st else 0)
+
+        if st is not None and self.covered < st.st_size:
+            self._scan(st.st_size)
+            if self.dead > len(self.offsets) // 2:
+                self._drop_dead()
+
+        # No .idx without a segment, unless one was there already
+        if self._header() != self._written and (st is not None or saved):
+            self._save()
+
+        return len(self)
+
+    def contains(self, entry_id):
+        """Whether the archive may hold a live record of `entry_id`."""
+        return id_hash(entry_id) in self._slot_map()
+
+    def _scan(self, end):
+        records = []  # (offset, op, entry id) appended since last time
+        with open(self.archive_path, "rb") as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = self.covered
+            while pos < end:
+                nl = mm.find(b"\n", pos, end)
+                if nl == -1:
+                    break  # torn last line; picked up once it is complete
+                op, entry_id = _parse(mm[pos:nl])
+                if op is not None:
+                    records.append((pos, op, entry_id))
+                pos = nl + 1
+
+            # Older records of every id seen here are superseded
+            for entry_id in {entry_id for _, _, entry_id in records}:
+                slot = self._find(mm, entry_id)
+                if slot is not None:
+                    self._kill(slot)
+
+        live = {}
+        for offset, op, entry_id in records:
+            live.pop(entry_id, None)
+            if op == "put":
+                live[entry_id] = offset
+        slots = self._slot_map()
+        for entry_id, offset in live.items():
+            h = id_hash(entry_id)
+            if h in slots:
+                self._collided.add(h)
+            slots[h] = len(self.offsets)
+            self.offsets.append(offset)
+            self.hashes.append(h)
+
+        self.covered = pos
+
+    def _slot_map(self):
+        if self._slots is None:
+            self._slots = {h: slot for slot, h in enumerate(self.hashes) if h != DEAD}
+            if len(self._slots) != len(self):
+                seen = set()
+                for h in self.hashes:
+                    if h != DEAD:
+                        (self._collided if h in seen else seen).add(h)
+        return self._slots
+
+    def _find(self, mm, entry_id):
+        """Slot of the live record of `entry_id`, or None."""
+        h = id_hash(entry_id)
+        slot = self._slot_map().get(h)
+        if slot is None:
+            return None
+        if h not in self._collided:
+            # The hash only narrows it down
+            return slot if self._id_at(mm, self.offsets[slot]) == entry_id else None
+        # More than one live id has this hash: compare each
+        for slot, other in enumerate(self.hashes):
+            if other == h and self._id_at(mm, self.offsets[slot]) == entry_id:
+                return slot
+        return None
+
+    def _kill(self, slot):
+        h = self.hashes[slot]
+        self.hashes[slot] = DEAD
+        self.dead += 1
+        self._killed.append(slot)
+        if h in self._collided:
+            remaining = [i for i, other in enumerate(self.hashes) if other == h]
+            self._slots[h] = remaining[-1]
+            if len(remaining) == 1:
+                self._collided.discard(h)
+        else:
+            del self._slots[h]
+
+    def _drop_dead(self):
+        live = [i for i, h in enumerate(self.hashes) if h != DEAD]
+        self.offsets = array("Q", (self.offsets[i] for i in live))
+        self.hashes = array("Q", (self.hashes[i] for i in live))
+        self.dead = 0
+        self._slots = None
+        self._written = None  # slots moved: rewrite the file
+
+    def _spot_check(self):
+        """Whether the first and last live records are where we left them.
+
+        Guards against a rewritten segment that got the old inode number.
+        """
+        live = [i for i in (self._next_live(0), self._prev_live(len(self.offsets))) if i is not None]
+        if not live:
+            return True
+        try:
+            with open(self.archive_path, "rb") as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for i in live:
+                    entry_id = self._id_at(mm, self.offsets[i])
+                    if entry_id is None or id_hash(entry_id) != self.hashes[i]:
+                        return False
+        except (OSError, ValueError):
+            return False
+        return True
+
+    def _next_live(self, slot):
+        while slot < len(self.hashes):
+            if self.hashes[slot] != DEAD:
+                return slot
+            slot += 1
+        return None
+
+    def _prev_live(self, slot):
+        """The last live slot before `slot`, or None."""
+        while slot > 0:
+            slot -= 1
+            if self.hashes[slot] != DEAD:
+                return slot
+        return None
+
+    @staticmethod
+    def _id_at(mm, offset):
+        return _parse(mm[offset:mm.find(b"\n", offset)])[1]
+
+    # ------------------------------------------------------------
+    # PAGES
+    # ------------------------------------------------------------
+    def read_page(self, before, count):
+        """Up to `count` entries newest first, from the records stored
+        before offset `before` (None: from the newest).
+
+        Returns (entries, the offset to pass for the next page, or None
+        after the oldest).
+        """
+        if self._segment_empty():
+            return [], None
+
+        slot = len(self.offsets) if before is None else bisect.bisect_left(self.offsets, before)
+        entries = []
+        with open(self.archive_path, "rb") as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            while len(entries) < count:
+                slot = self._prev_live(slot)
+                if slot is None:
+                    return entries, None
+                entry = self._entry_at(mm, self.offsets[slot])
+                if entry is not None:
+                    entries.append(entry)
+        return entries, self.offsets[slot] if self._prev_live(slot) is not None else None
+
+    def read_entries(self, entry_ids):
+        """The archived entries with these ids; ids not in the archive are skipped."""
+        if self._segment_empty():
+            return []
+
+        entries = []
+        with open(self.archive_path, "rb") as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for entry_id in entry_ids:
+                slot = self._find(mm, entry_id)
+                if slot is not None:
+                    entry = self._entry_at(mm, self.offsets[slot])
+                    if entry is not None:
+                        entries.append(entry)
+        return entries
+
+    def _segment_empty(self):
+        # mmap refuses empty files
+        try:
+            return not len(self) or os.path.getsize(self.archive_path) == 0
+        except OSError:
+            return True  # no segment yet
+
+    @staticmethod
+    def _entry_at(mm, offset):
+        try:
+            record = json.loads(mm[offset:mm.find(b"\n", offset)])
+            return EntryModel.from_dict(record["entry"])
+        except Exception as e:
+            print("Skipping invalid archive record:", e)
+            return None
+
+    # ------------------------------------------------------------
+    # PERSISTENCE
+    # ------------------------------------------------------------
+    def _header(self):
+        return (MAGIC, VERSION, 0, self.inode, self.covered, len(self.offsets), self.dead)
+
+    def _read_header(self):
+        try:
+            with open(self.path, "rb") as f:
+                return HEADER.unpack(f.read(HEADER.size))
+        except (OSError, struct.error):
+            return None
+
+    def _load(self):
+        self._reset(0)
+        try:
+            with open(self.path, "rb") as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                header = HEADER.unpack_from(mm)
+                magic, version, _, inode, covered, slots, _ = header
+                if magic != MAGIC or version != VERSION or len(mm) != HEADER.size + SLOT.size * slots:
+                    return
+                pairs = array("Q")
+                pairs.frombytes(mm[HEADER.size:])
+        except (OSError, ValueError, struct.error):
+            return  # missing or damaged: rebuilt by the next scan
+
+        if _SWAP:
+            pairs.byteswap()
+        self.offsets, self.hashes = pairs[0::2], pairs[1::2]
+        # Counted, not taken from the header: a crash during an update in
+        # place may have marked slots dead without updating it
+        self.dead = self.hashes.count(DEAD)
+        self.inode, self.covered = inode, covered
+        self._slots = None
+        self._written = header
+        self._saved_slots = slots
+
+    def _save(self):
+        try:
+            if self._written is None:
+                self._write_all()
+            else:
+                self._write_changes()
+        except Exception as e:
+            print("ERROR saving archive index:", e)
+            self._written = None
+            return
+        self._written = self._header()
+        self._saved_slots = len(self.offsets)
+        self._killed = []
+
+    def _write_changes(self):
+        """Append the new slots and mark the dead ones in place."""
+        new = array("Q")
+        for slot in range(self._saved_slots, len(self.offsets)):
+            new.append(self.offsets[slot])
+            new.append(self.hashes[slot])
+        if _SWAP:
+            new.byteswap()
+
+        with open(self.path, "r+b") as f:
+            for slot in self._killed:
+                if slot < self._saved_slots:
+                    f.seek(HEADER.size + SLOT.size * slot)
+                    f.write(SLOT.pack(self.offsets[slot], DEAD))
+            f.seek(HEADER.size + SLOT.size * self._saved_slots)
+            f.write(new.tobytes())
+            # Last: a crash before this leaves a size that does not match
+            # the header, and the file is rebuilt
+            f.seek(0)
+            f.write(HEADER.pack(*self._header()))
+
+    def _write_all(self):
+        pairs = array("Q", bytes(SLOT.size * len(self.offsets)))
+        pairs[0::2], pairs[1::2] = self.offsets, self.hashes
+        if _SWAP:
+            pairs.byteswap()
+
+        temp_fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(self.path))
+        try:
+            with os.fdopen(temp_fd, "wb") as tmp:
+                tmp.write(HEADER.pack(*self._header()))
+                tmp.write(pairs.tobytes())
+            os.replace(temp_path, self.path)
+        except Exception:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+from scheduler import DueQueue
+
+
+class AutoArchiver:
+    """Archives timed entries once they are more than a day old.
+
+    Entries sit in a DueQueue ordered by their archive deadline
+    (time + ARCHIVE_AFTER), so a check only pops the entries that crossed
+    it. Runs on the Tk main loop: after each check a timer is set for the
+    next deadline.
+    """
+
+    ARCHIVE_AFTER = timedelta(hours=24)
+    # Longest single wait, so clock changes and suspend are noticed
+    MAX_DELAY_MS = 60 * 1000
+
+    def __init__(self, app):
+        self.app = app
+        self.queue = DueQueue()
+        self._timer = None
+
+    @classmethod
+    def deadline(cls, entry):
+        """When the entry is due for archiving, or None if never."""
+        if not entry.time or entry.archived:
+            return None
+        if entry.recurrence is not None:
+            # A series is archived a day after its final occurrence
+            last = entry.recurrence.last(entry.time)
+            return last + cls.ARCHIVE_AFTER if last is not None else None
+        return entry.time + cls.ARCHIVE_AFTER
+
+    # ------------------------------------------------------------
+    # QUEUE UPDATES
+    # ------------------------------------------------------------
+    def track(self, entry):
+        """(Re)queue an entry after it was added or changed."""
+        self.queue.push_due(entry, self.deadline(entry))
+
+    def untrack(self, entry):
+        self.queue.discard(entry)
+
+    def pop_overdue(self, now=None):
+        return [entry for entry, _ in self.queue.pop_due(now or datetime.now())]
+
+    # ------------------------------------------------------------
+    # TIMER
+    # ------------------------------------------------------------
+    def start(self):
+        self._run()
+
+    def stop(self):
+        if self._timer is not None:
+            self.app.root.after_cancel(self._timer)
+            self._timer = None
+
+    def _run(self):
+        self._timer = None
+        self.app.auto_archive_overdue()
+        self.schedule_next()
+
+    def schedule_next(self):
+        self.stop()
+
+        delay = self.MAX_DELAY_MS
+        next_deadline = self.queue.peek_time()
+        if next_deadline is not None:
+            seconds = (next_deadline - datetime.now()).total_seconds()
+            delay = min(delay, max(int(seconds * 1000) + 1, 0))
+
+        self._timer = self.app.root.after(delay, self._run)
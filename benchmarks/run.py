@@ -0,0 +1,346 @@
+"""Benchmark harness for CalmMind's hot paths.
+
+    python benchmarks/run.py --sizes 1000,10000,100000 --output results.json
+    python benchmarks/run.py --output new.json --baseline results.json
+
+Times storage load/save for each engine, every view query, search
+index build/load and queries, the auto-archive pass and one scheduler pass over synthetic data sets (see
+synthetic.py). With --ui, view rendering is timed through a real App, and
+so is the time to first paint of a new app process; if no $DISPLAY is set
+and Xvfb is installed, a headless server is started.
+Results are written as JSON so runs can be compared against a baseline.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from archiver import AutoArchiver
+from entry_index import EntryIndex, VIEWS
+from scheduler import ReminderScheduler
+from search_index import SearchIndex
+from storage import STORAGE_MODES, open_storage
+from synthetic import generate_entries
+
+
+# ------------------------------------------------------------
+# TIMING
+# ------------------------------------------------------------
+def measure(fn, repeat, setup=None):
+    """Run fn `repeat` times and return the wall times in seconds.
+
+    If `setup` is given it runs (untimed) before each call and its result
+    is passed to fn.
+    """
+    runs = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        if setup:
+            fn(arg)
+        else:
+            fn()
+        runs.append(time.perf_counter() - start)
+    return runs
+
+
+def record(results, name, size, runs, **extra):
+    result = {
+        "name": name,
+        "size": size,
+        "seconds": statistics.median(runs),
+        "runs": runs,
+    }
+    result.update(extra)
+    results.append(result)
+    print("%-32s %9d  %10.2f ms" % (name, size, result["seconds"] * 1000))
+
+
+# ------------------------------------------------------------
+# BENCHMARKS
+# ------------------------------------------------------------
+def bench_storage(results, entries, modes, repeat):
+    size = len(entries)
+    for mode in modes:
+        with tempfile.TemporaryDirectory() as data_dir:
+            storage = open_storage("entries.json", mode=mode, data_dir=data_dir)
+
+            runs = measure(lambda: storage.save_entries(entries), repeat)
+            record(results, "save_entries[%s]" % mode, size, runs,
+                   bytes=_dir_size(data_dir))
+
+            runs = measure(storage.load_entries, repeat)
+            record(results, "load_entries[%s]" % mode, size, runs)
+
+            def stream():
+                for _ in storage.iter_entry_batches():
+                    pass
+
+            runs = measure(stream, repeat)
+            record(results, "iter_entry_batches[%s]" % mode, size, runs)
+
+            runs = measure(storage.load_archive, repeat)
+            record(results, "load_archive[%s]" % mode, size, runs)
+
+            # Any page should cost the same as the first
+            keys, key = [None], None
+            while True:
+                _, key = storage.archive_page(key, 50)
+                if key is None:
+                    break
+                keys.append(key)
+            for label, key in (("first", keys[0]), ("last", keys[-1])):
+                runs = measure(lambda: storage.archive_page(key, 50), repeat)
+                record(results, "archive_page[%s,%s]" % (mode, label), size, runs)
+
+
+def bench_views(results, entries, repeat):
+    size = len(entries)
+
+    runs = measure(lambda: EntryIndex(entries), repeat)
+    record(results, "index_build", size, runs)
+
+    index = EntryIndex(entries)
+    for view in VIEWS:
+        runs = measure(lambda: index.view(view), repeat)
+        record(results, "view[%s]" % view, size, runs)
+
+
+SEARCH_QUERIES = ("c", "call", "call den", "gro buy")
+
+
+def bench_search(results, entries, repeat):
+    size = len(entries)
+
+    runs = measure(lambda: SearchIndex.build(entries), repeat)
+    record(results, "search_build", size, runs)
+
+    search = SearchIndex.build(entries)
+    with tempfile.TemporaryDirectory() as data_dir:
+        path = os.path.join(data_dir, "search_index.json")
+        search.save(path, [])
+        runs = measure(lambda: SearchIndex.load(path, []), repeat)
+        record(results, "search_load", size, runs, bytes=os.path.getsize(path))
+
+    # One keystroke's worth: query plus ranking, capped like the app
+    for query in SEARCH_QUERIES:
+        runs = measure(lambda: search.search(query, 500), repeat)
+        record(results, "search[%s]" % query, size, runs)
+
+
+def bench_auto_archive(results, entries, repeat):
+    size = len(entries)
+
+    def fill():
+        archiver = AutoArchiver(app=None)
+        for entry in entries:
+            archiver.track(entry)
+        return archiver
+
+    runs = measure(fill, repeat)
+    record(results, "auto_archive_track_all", size, runs)
+
+    runs = measure(lambda archiver: archiver.pop_overdue(), repeat, setup=fill)
+    record(results, "auto_archive_overdue", size, runs)
+
+
+def bench_scheduler(results, entries, repeat):
+    size = len(entries)
+
+    def fill():
+        scheduler = ReminderScheduler()
+        scheduler.reschedule_many(entries)
+        return scheduler
+
+    runs = measure(fill, repeat)
+    record(results, "scheduler_reschedule_all", size, runs)
+
+    runs = measure(lambda scheduler: scheduler.tick(), repeat, setup=fill)
+    record(results, "scheduler_tick", size, runs)
+
+
+def bench_ui(results, entries, mode, repeat):
+    """Time refresh_current_view for every view through a real App."""
+    import tkinter as tk
+
+    size = len(entries)
+    with tempfile.TemporaryDirectory() as data_dir:
+        open_storage("entries.json", mode=mode, data_dir=data_dir).save_entries(entries)
+        os.environ["CALMMIND_DATA_DIR"] = data_dir
+        os.environ["CALMMIND_STORAGE"] = mode
+
+        from app import App
+
+        root = tk.Tk()
+        root.geometry("1000x700")
+        app = App(root)
+        while app.loading:
+            root.update()
+        root.update()
+
+        for view in VIEWS:
+            app.switch_view(view)
+
+            def render():
+                app.refresh_current_view()
+                root.update_idletasks()
+
+            runs = measure(render, repeat)
+            record(results, "render[%s]" % view, size, runs,
+                   widgets=_count_widgets(root))
+
+        app.on_close()
+
+
+def bench_startup(results, entries, mode, repeat):
+    """Time to first paint of a freshly started app process."""
+    size = len(entries)
+    with tempfile.TemporaryDirectory() as data_dir:
+        open_storage("entries.json", mode=mode, data_dir=data_dir).save_entries(entries)
+        env = dict(os.environ, CALMMIND_DATA_DIR=data_dir, CALMMIND_STORAGE=mode)
+
+        runs = []
+        for _ in range(repeat):
+            out = subprocess.run(
+                [sys.executable, os.path.join(ROOT, "app.py"), "--startup-time"],
+                env=env, capture_output=True, text=True, check=True,
+            ).stdout
+            line = next(l for l in out.splitlines() if l.startswith("first paint:"))
+            runs.append(float(line.split()[2]) / 1000)
+        record(results, "startup[first_paint]", size, runs)
+
+
+def _count_widgets(widget):
+    return 1 + sum(_count_widgets(child) for child in widget.winfo_children())
+
+
+def _dir_size(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+# ------------------------------------------------------------
+# HEADLESS DISPLAY
+# ------------------------------------------------------------
+def ensure_display():
+    """Make sure Tk has a display; returns an Xvfb process to stop, if any."""
+    if os.environ.get("DISPLAY") or os.name == "nt":
+        return None
+    if not shutil.which("Xvfb"):
+        return None
+
+    display = ":%d" % (90 + os.getpid() % 100)
+    proc = subprocess.Popen(
+        ["Xvfb", display, "-screen", "0", "1280x800x24", "-nolisten", "tcp"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    time.sleep(0.5)
+    os.environ["DISPLAY"] = display
+    return proc
+
+
+def has_display():
+    return bool(os.environ.get("DISPLAY")) or os.name == "nt"
+
+
+# ------------------------------------------------------------
+# BASELINE COMPARISON
+# ------------------------------------------------------------
+def compare(results, baseline_path, threshold):
+    """Print current/baseline ratios; returns the number of regressions."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    previous = {(r["name"], r["size"]): r["seconds"] for r in baseline["results"]}
+
+    regressions = 0
+    print("\n%-32s %9s  %8s" % ("benchmark", "size", "ratio"))
+    for r in results:
+        before = previous.get((r["name"], r["size"]))
+        if not before:
+            continue
+        ratio = r["seconds"] / before
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print("%-32s %9d  %7.2fx%s" % (r["name"], r["size"], ratio, flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000",
+                        help="comma-separated entry counts (e.g. 1000,10000,100000,1000000)")
+    parser.add_argument("--storage", default=",".join(STORAGE_MODES),
+                        help="comma-separated storage modes to benchmark")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--ui", action="store_true", help="also time Tk rendering")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="compare against an earlier results JSON")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="slowdown ratio counted as a regression (default 0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    modes = [m for m in args.storage.split(",") if m]
+
+    xvfb = ensure_display() if args.ui else None
+    results = []
+    try:
+        for size in sizes:
+            entries = generate_entries(size, seed=args.seed)
+            # One pass is plenty at a million entries
+            repeat = 1 if size >= 1000000 else args.repeat
+
+            bench_storage(results, entries, modes, repeat)
+            bench_views(results, entries, repeat)
+            bench_search(results, entries, repeat)
+            bench_auto_archive(results, entries, repeat)
+            bench_scheduler(results, entries, repeat)
+
+            if args.ui:
+                if has_display():
+                    bench_ui(results, entries, modes[0], repeat)
+                    bench_startup(results, entries, modes[0], repeat)
+                else:
+                    print("Skipping UI benchmarks: no display and no Xvfb")
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": sizes,
+            "storage": modes,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        return 1 if compare(results, args.baseline, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
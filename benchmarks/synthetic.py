@@ -0,0 +1,68 @@
+"""Synthetic CalmMind data sets for benchmarks.
+
+The mix roughly follows real use: mostly ideas, tasks that sometimes have
+a time, appointments that always do, spread over the past year and the
+next few months. Anything timed more than a day ago is archived (as
+auto-archive would have done), plus some ideas archived by hand.
+"""
+
+import random
+from datetime import datetime, timedelta
+
+from models import EntryModel
+
+
+TYPE_WEIGHTS = (("idea", 0.5), ("task", 0.3), ("appointment", 0.2))
+
+WORDS = (
+    "call dentist review budget plan trip buy groceries write notes read book "
+    "gym session team meeting draft email fix bike garden water plants pay "
+    "rent sketch idea app feature journal walk doctor birthday gift clean"
+).split()
+
+
+def _text(rng, min_words, max_words):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words)))
+
+
+def generate_entries(count, seed=42, now=None):
+    """Return `count` EntryModel objects with a realistic type/time/archive mix."""
+    rng = random.Random(seed)
+    now = (now or datetime.now()).replace(second=0, microsecond=0)
+    types = [t for t, _ in TYPE_WEIGHTS]
+    weights = [w for _, w in TYPE_WEIGHTS]
+
+    entries = []
+    for _ in range(count):
+        entry_type = rng.choices(types, weights)[0]
+
+        time = None
+        if entry_type == "appointment" or (entry_type == "task" and rng.random() < 0.5):
+            # Past year to ~three months ahead, on 15-minute steps
+            minutes = rng.randint(-365 * 24 * 4, 90 * 24 * 4) * 15
+            time = now + timedelta(minutes=minutes)
+
+        archived = False
+        done = False
+        notified = False
+        if time is not None and now - time > timedelta(hours=24):
+            archived = True
+            notified = True
+            done = rng.random() < 0.6
+        elif entry_type == "idea" and rng.random() < 0.2:
+            archived = True
+
+        details = _text(rng, 0, 30) if rng.random() < 0.7 else ""
+
+        entries.append(EntryModel(
+            type=entry_type,
+            title=_text(rng, 1, 5).capitalize(),
+            details=details,
+            time=time,
+            done=done,
+            archived=archived,
+            notified=notified,
+            reminder_time=time,
+        ))
+
+    return entries
@@ -0,0 +1,290 @@
+"""Compact binary format for entry snapshots.
+
+    header   MAGIC, version (u16), reserved (u16)
+    blocks   up to BLOCK_SIZE entries each, column by column:
+             count (u32), text size in bytes (u32)
+             flags     count x u8      DONE | ARCHIVED | NOTIFIED | REMINDER_IS_TIME | RAW_JSON
+             type      count x u8      index into TYPES, or CUSTOM_TYPE (name in the text)
+             time      count x i64     microseconds since 1970-01-01 (naive), NO_TIME if unset
+             reminder  count x i64
+             lengths   count x 4 x u32 id, type, title, details (in characters)
+             text      UTF-8, the four strings of every entry back to back
+
+All integers are little-endian. Columns load with array.frombytes and the
+text of a block is decoded once, so reading costs little more than
+building the EntryModel objects. An entry the columns cannot represent
+exactly (timezone-aware times, non-bool flags, a recurrence rule) is
+stored as RAW_JSON: its to_dict() JSON in the title slot.
+
+    python binary_format.py to-binary entries.json entries.bin
+    python binary_format.py to-json entries.bin entries.json
+"""
+
+import argparse
+import datetime
+import json
+import struct
+import sys
+from array import array
+
+from models import EntryModel
+
+MAGIC = b"CMBN"
+VERSION = 1
+BLOCK_SIZE = 4096
+
+HEADER = struct.Struct("<4sHH")
+BLOCK_HEADER = struct.Struct("<II")
+
+DONE = 1
+ARCHIVED = 2
+NOTIFIED = 4
+REMINDER_IS_TIME = 8
+RAW_JSON = 16
+
+TYPES = ("idea", "task", "appointment")
+TYPE_CODES = {name: code for code, name in enumerate(TYPES)}
+CUSTOM_TYPE = 255
+
+NO_TIME = -(2 ** 63)
+EPOCH = datetime.datetime(1970, 1, 1)
+MICROSECOND = datetime.timedelta(microseconds=1)
+
+# Fixed-width bytes per entry: flags, type, time, reminder, 4 lengths
+ENTRY_COLUMNS_SIZE = 1 + 1 + 8 + 8 + 16
+
+_SWAP = sys.byteorder == "big"
+
+
+def is_binary(path):
+    """Whether the file starts with the binary format's magic bytes."""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+# ------------------------------------------------------------
+# WRITE
+# ------------------------------------------------------------
+def write_entries(f, entries):
+    """Write entries to a binary file object; returns the bytes written."""
+    written = f.write(HEADER.pack(MAGIC, VERSION, 0))
+    for start in range(0, len(entries), BLOCK_SIZE):
+        written += f.write(_encode_block(entries[start:start + BLOCK_SIZE]))
+    return written
+
+
+def _encode_block(entries):
+    flags = bytearray()
+    types = bytearray()
+    times = array("q")
+    reminders = array("q")
+    lengths = array("I")
+    parts = []
+    stamps = {None: NO_TIME}
+
+    for e in entries:
+        t, r = e.time, e.reminder_time
+        try:
+            ts = stamps[t]
+        except KeyError:
+            ts = stamps[t] = NO_TIME if t.tzinfo else (t - EPOCH) // MICROSECOND
+        try:
+            rs = stamps[r]
+        except KeyError:
+            rs = stamps[r] = NO_TIME if r.tzinfo else (r - EPOCH) // MICROSECOND
+
+        done, archived, notified = e.done, e.archived, e.notified
+        exact = (
+            (ts != NO_TIME or t is None)
+            and (rs != NO_TIME or r is None)
+            and type(done) is bool and type(archived) is bool and type(notified) is bool
+            and e.recurrence is None
+        )
+
+        if not exact:
+            raw = json.dumps(e.to_dict())
+            flags.append(RAW_JSON)
+            types.append(0)
+            times.append(NO_TIME)
+            reminders.append(NO_TIME)
+            lengths.extend((0, 0, len(raw), 0))
+            parts.append(raw)
+            continue
+
+        f = done | archived << 1 | notified << 2
+        if r is t:
+            f |= REMINDER_IS_TIME
+        flags.append(f)
+
+        code = TYPE_CODES.get(e.type, CUSTOM_TYPE)
+        types.append(code)
+        custom = e.type if code == CUSTOM_TYPE else ""
+
+        times.append(ts)
+        reminders.append(rs)
+        lengths.extend((len(e.id), len(custom), len(e.title), len(e.details)))
+        parts += (e.id, custom, e.title, e.details)
+
+    text = "".join(parts).encode("utf-8")
+    if _SWAP:
+        for column in (times, reminders, lengths):
+            column.byteswap()
+
+    return b"".join((
+        BLOCK_HEADER.pack(len(entries), len(text)),
+        flags,
+        types,
+        times.tobytes(),
+        reminders.tobytes(),
+        lengths.tobytes(),
+        text,
+    ))
+
+
+# ------------------------------------------------------------
+# READ
+# ------------------------------------------------------------
+def read_entries(f):
+    entries = []
+    for block in iter_blocks(f):
+        entries.extend(block)
+    return entries
+
+
+def iter_blocks(f):
+    """Yield one list of EntryModel per block.
+
+    Raises ValueError for a foreign or newer file, or a truncated block
+    (blocks before it have already been yielded).
+    """
+    magic, version, _ = HEADER.unpack(_read_exactly(f, HEADER.size))
+    if magic != MAGIC:
+        raise ValueError("not a CalmMind binary file")
+    if version > VERSION:
+        raise ValueError("unsupported binary format version %d" % version)
+
+    while True:
+        head = f.read(BLOCK_HEADER.size)
+        if not head:
+            return
+        if len(head) < BLOCK_HEADER.size:
+            raise ValueError("truncated block header")
+        count, text_size = BLOCK_HEADER.unpack(head)
+        yield _decode_block(_read_exactly(f, count * ENTRY_COLUMNS_SIZE + text_size), count)
+
+
+def _read_exactly(f, size):
+    data = f.read(size)
+    if len(data) < size:
+        raise ValueError("unexpected end of file")
+    return data
+
+
+def _decode_block(data, count):
+    pos = 0
+    flags = data[pos:pos + count]
+    pos += count
+    types = data[pos:pos + count]
+    pos += count
+
+    times = array("q")
+    times.frombytes(data[pos:pos + 8 * count])
+    pos += 8 * count
+    reminders = array("q")
+    reminders.frombytes(data[pos:pos + 8 * count])
+    pos += 8 * count
+    lengths = array("I")
+    lengths.frombytes(data[pos:pos + 16 * count])
+    pos += 16 * count
+
+    if _SWAP:
+        for column in (times, reminders, lengths):
+            column.byteswap()
+
+    text = data[pos:].decode("utf-8")
+
+    new = EntryModel.__new__
+    stamps = {NO_TIME: None}
+    entries = []
+    o = 0
+
+    for f, code, ts, rs, (n_id, n_type, n_title, n_details) in zip(
+        flags, types, times, reminders, zip(*[iter(lengths)] * 4)
+    ):
+        entry_id = text[o:o + n_id]
+        o += n_id
+        custom = text[o:o + n_type]
+        o += n_type
+        title = text[o:o + n_title]
+        o += n_title
+        details = text[o:o + n_details]
+        o += n_details
+
+        if f & RAW_JSON:
+            entries.append(EntryModel.from_dict(json.loads(title)))
+            continue
+
+        t = stamps.get(ts, stamps)
+        if t is stamps:
+            t = stamps[ts] = EPOCH + ts * MICROSECOND
+        if f & REMINDER_IS_TIME:
+            r = t
+        else:
+            r = stamps.get(rs, stamps)
+            if r is stamps:
+                r = stamps[rs] = EPOCH + rs * MICROSECOND
+
+        entry = new(EntryModel)
+        entry.id = entry_id
+        entry.type = TYPES[code] if code != CUSTOM_TYPE else sys.intern(custom)
+        entry.title = title
+        entry.details = details
+        entry.time = t
+        entry.done = bool(f & DONE)
+        entry.archived = bool(f & ARCHIVED)
+        entry.notified = bool(f & NOTIFIED)
+        entry.reminder_time = r
+        entry.recurrence = None
+        entries.append(entry)
+
+    return entries
+
+
+# ------------------------------------------------------------
+# CONVERTER
+# ------------------------------------------------------------
+def json_to_binary(src, dst):
+    with open(src, "r") as f:
+        entries = EntryModel.from_dicts(json.load(f))
+    with open(dst, "wb") as f:
+        write_entries(f, entries)
+    return len(entries)
+
+
+def binary_to_json(src, dst):
+    """Write the entries back out exactly as Storage.save_entries would."""
+    with open(src, "rb") as f:
+        entries = read_entries(f)
+    with open(dst, "w") as f:
+        json.dump(EntryModel.to_dicts(entries), f, indent=4)
+    return len(entries)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert CalmMind entries between JSON and binary.")
+    parser.add_argument("direction", choices=("to-binary", "to-json"))
+    parser.add_argument("src")
+    parser.add_argument("dst")
+    args = parser.parse_args(argv)
+
+    convert = json_to_binary if args.direction == "to-binary" else binary_to_json
+    count = convert(args.src, args.dst)
+    print("Converted %d entries." % count)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
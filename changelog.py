@@ -0,0 +1,297 @@
+"""Log of changes to a data directory, for sync.py.
+
+Nothing is logged until the directory has taken part in a sync, which
+creates two files next to the entries:
+
+    sync.json  {"site": "<id of this directory>",
+                "peers": {"<site>": {"seq": 12, "offset": 4096, "inode": 1234}}}
+    sync.log   one record per change, oldest first:
+               {"seq":12,"id":"...","rev":3,"site":"...","op":"put","entry":{...}}
+               {"seq":13,"id":"...","rev":4,"site":"...","op":"delete"}
+
+`seq` numbers the records of this log. `rev` counts the versions of one
+entry and `site` names the directory that made a version; version() orders
+any two versions of an entry the same way in every directory. A peer's
+entry in sync.json says how far into that peer's log this directory has
+taken changes (the offset and inode only save re-reading it from the
+start). Callers hold the storage's file lock.
+"""
+
+import json
+import os
+import re
+import tempfile
+import uuid
+
+
+RECORD_HEAD = re.compile(rb'^\{"seq":(\d+),"id":"((?:[^"\\]|\\.)*)","rev":(\d+)', re.M)
+
+
+def version(record):
+    """Sort key of an entry version: more edits win, then a put over a
+    delete, then the greater site id."""
+    return record["rev"], record["op"] == "put", record["site"]
+
+
+def _encode(records):
+    return "".join(
+        json.dumps(record, separators=(",", ":")) + "\n" for record in records
+    ).encode()
+
+
+def _ends_at(f, offset, seq):
+    """Whether the record with number `seq` ends at `offset` in `f`."""
+    if offset == 0:
+        return True
+    f.seek(max(0, offset - 64 * 1024))
+    tail = f.read(offset - f.tell())
+    if not tail.endswith(b"\n"):
+        return False
+    heads = RECORD_HEAD.findall(tail)
+    return bool(heads) and int(heads[-1][0]) == seq
+
+
+class ChangeLog:
+    """The change log of one data directory; see the module docstring."""
+
+    # Rewrite the log once it holds this many records per entry
+    COMPACT_RATIO = 3
+
+    def __init__(self, data_dir):
+        self.state_path = os.path.join(data_dir, "sync.json")
+        self.log_path = os.path.join(data_dir, "sync.log")
+        self.data_dir = data_dir
+        self.suspended = False  # set while sync.py applies a peer's records
+        self._site = None
+        self._revs = {}  # id -> rev of its latest record
+        self._seq = 0
+        self._records = 0
+        self._inode, self._offset = None, 0  # how far _revs covers the log
+
+    @property
+    def enabled(self):
+        return os.path.exists(self.state_path)
+
+    @property
+    def site(self):
+        if self._site is None:
+            self._site = self.load_state()["site"]
+        return self._site
+
+    # ------------------------------------------------------------
+    # LOCAL CHANGES
+    # ------------------------------------------------------------
+    def record(self, saved, deleted):
+        """Log a batch written to the storage, each change as a new revision."""
+        if self.suspended or not self.enabled:
+            return
+        self._catch_up()
+
+        site = self.site
+        records = [
+            {"id": e.id, "rev": self._revs.get(e.id, 0) + 1, "site": site,
+             "op": "put", "entry": e.to_dict()}
+            for e in saved
+        ]
+        records += [
+            {"id": e.id, "rev": self._revs.get(e.id, 0) + 1, "site": site, "op": "delete"}
+            for e in deleted
+        ]
+        self.append(records)
+
+    def append(self, records):
+        """Add records to the log, numbering them; rev and site are kept."""
+        if not records:
+            return
+        # Only record() needs the revs; the last seq is at the end of the file
+        current = self._is_current()
+        if not current:
+            self._seq = max(self._seq, self._last_seq())
+        numbered = []
+        for record in records:
+            # seq, id, rev first: RECORD_HEAD reads them without parsing the line
+            self._seq += 1
+            line = {"seq": self._seq}
+            line.update((key, value) for key, value in record.items() if key != "seq")
+            numbered.append(line)
+        data = _encode(numbered)
+
+        try:
+            with open(self.log_path, "ab") as f:
+                start = f.tell()
+                f.write(data)
+                inode = os.fstat(f.fileno()).st_ino
+        except OSError as e:
+            print("ERROR writing sync log:", e)
+            return
+
+        if current:
+            # Under the lock nothing else was appended in between
+            self._inode, self._offset = inode, start + len(data)
+            for record in numbered:
+                self._revs[record["id"]] = record["rev"]
+            self._records += len(numbered)
+
+            if self._records > self.COMPACT_RATIO * len(self._revs) + 1000:
+                self._compact()
+
+    def _is_current(self):
+        """Whether _revs, _seq and _offset cover the whole log."""
+        try:
+            st = os.stat(self.log_path)
+        except OSError:
+            return self._inode is None
+        return (st.st_ino, st.st_size) == (self._inode, self._offset)
+
+    def _last_seq(self):
+        """seq of the last record, reading back from the end of the log."""
+        try:
+            f = open(self.log_path, "rb")
+        except OSError:
+            return 0
+        with f:
+            end = f.seek(0, os.SEEK_END)
+            tail = b""
+            while end > 0 and tail.count(b"\n") < 2:
+                start = max(0, end - 64 * 1024)
+                f.seek(start)
+                tail = f.read(end - start) + tail
+                end = start
+        heads = RECORD_HEAD.findall(tail)
+        return int(heads[-1][0]) if heads else 0
+
+    def _catch_up(self):
+        """Read the ids and revs other processes logged since we last looked."""
+        try:
+            f = open(self.log_path, "rb")
+        except OSError:
+            self._revs, self._seq, self._records = {}, 0, 0
+            self._inode, self._offset = None, 0
+            return
+
+        with f:
+            st = os.fstat(f.fileno())
+            if st.st_ino != self._inode or st.st_size < self._offset:
+                self._revs, self._records = {}, 0
+                self._inode, self._offset = st.st_ino, 0
+            if st.st_size == self._offset:
+                return
+            f.seek(self._offset)
+            data = f.read()
+
+        for match in RECORD_HEAD.finditer(data):
+            seq, entry_id, rev = match.groups()
+            entry_id = entry_id.decode()
+            if "\\" in entry_id:
+                entry_id = json.loads('"%s"' % entry_id)
+            self._revs[entry_id] = int(rev)
+            self._seq = max(self._seq, int(seq))
+            self._records += 1
+        self._offset += len(data)
+
+    def _compact(self):
+        """Keep only the latest record per entry (deletes included)."""
+        latest, _ = self.changes_since(None)
+        records = sorted(latest.values(), key=lambda r: r["seq"])
+
+        temp_fd, temp_path = tempfile.mkstemp(dir=self.data_dir)
+        try:
+            with os.fdopen(temp_fd, "wb") as tmp:
+                tmp.write(_encode(records))
+            os.replace(temp_path, self.log_path)
+        except Exception as e:
+            print("ERROR compacting sync log:", e)
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return
+
+        # Peers holding an offset into the old file fall back to its seq
+        self._inode, self._offset = None, 0
+        self._catch_up()
+
+    # ------------------------------------------------------------
+    # WHAT A PEER HAS NOT SEEN
+    # ------------------------------------------------------------
+    def changes_since(self, mark):
+        """The latest record per id logged after `mark` (from end()).
+
+        Returns ({id: record}, end mark). Reads from the marked offset when
+        the record just before it is still the marked one, otherwise from
+        the start of the log (after a compaction).
+        """
+        seq, offset, inode = 0, 0, None
+        if mark:
+            seq, offset, inode = mark["seq"], mark["offset"], mark["inode"]
+
+        latest = {}
+        try:
+            f = open(self.log_path, "rb")
+        except OSError:
+            return latest, self.end()
+
+        with f:
+            st = os.fstat(f.fileno())
+            if st.st_ino != inode or st.st_size < offset or not _ends_at(f, offset, seq):
+                offset = 0
+            f.seek(offset)
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    # Typically a torn last line after a crash
+                    print("Skipping invalid sync log record:", e)
+                    continue
+                if record["seq"] > seq:
+                    latest[record["id"]] = record
+            end = {"seq": max([seq] + [r["seq"] for r in latest.values()]),
+                   "offset": f.tell(), "inode": st.st_ino}
+        return latest, end
+
+    def end(self):
+        """Mark for everything logged so far."""
+        if self._is_current():
+            return {"seq": self._seq, "offset": self._offset, "inode": self._inode}
+        try:
+            st = os.stat(self.log_path)
+        except OSError:
+            return None
+        return {"seq": self._last_seq(), "offset": st.st_size, "inode": st.st_ino}
+
+    # ------------------------------------------------------------
+    # STATE
+    # ------------------------------------------------------------
+    def enable(self, entries):
+        """Start logging, with `entries` (the current contents) as revision 1."""
+        site = uuid.uuid4().hex
+        self._site = site
+        records = [
+            {"seq": seq, "id": e.id, "rev": 1, "site": site, "op": "put", "entry": e.to_dict()}
+            for seq, e in enumerate(entries, 1)
+        ]
+        temp_fd, temp_path = tempfile.mkstemp(dir=self.data_dir)
+        with os.fdopen(temp_fd, "wb") as tmp:
+            tmp.write(_encode(records))
+        os.replace(temp_path, self.log_path)
+        self._inode, self._offset = None, 0
+        self.save_state({"site": site, "peers": {}})
+
+    def load_state(self):
+        with open(self.state_path, "r") as f:
+            return json.load(f)
+
+    def save_state(self, state):
+        temp_fd, temp_path = tempfile.mkstemp(dir=self.data_dir)
+        with os.fdopen(temp_fd, "w") as tmp:
+            json.dump(state, tmp, indent=2)
+        os.replace(temp_path, self.state_path)
+
+    def peer(self, site):
+        """How far this directory has taken changes from `site`'s log."""
+        return self.load_state()["peers"].get(site)
+
+    def set_peer(self, site, mark):
+        state = self.load_state()
+        state["peers"][site] = mark
+        self.save_state(state)
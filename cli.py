@@ -0,0 +1,436 @@
+"""Command-line interface to CalmMind data; no GUI needed.
+
+    python cli.py list --view next
+    python cli.py add --type task --title "Pay rent" --time "2025-02-01 09:00" --repeat monthly
+    python cli.py archive 3f2a9c
+    python cli.py delete 3f2a9c 81bd04
+    python cli.py import old-notes.jsonl
+    python cli.py export --view everything backup.csv
+    python cli.py import-ics calendar.ics
+    python cli.py export-ics --view next upcoming.ics
+    python cli.py sync /media/usb/CalmMind/data
+
+Works on the same data as the app ($CALMMIND_DATA_DIR, $CALMMIND_STORAGE,
+or --data-dir / --storage). Entries are named by id or any unique id
+prefix. Imports and bulk changes are written once per batch; with the
+journal, binary and sqlite engines an import only ever holds one batch in
+memory. Files are JSON Lines (one entry object per line) or CSV, chosen
+by extension or --format; "-" means stdin/stdout. Calendars are read and
+written as iCalendar by the -ics commands. `sync` exchanges changes with
+another data directory (see sync.py).
+"""
+
+import argparse
+import csv
+import json
+import sys
+from datetime import datetime
+
+import ical
+from archiver import AutoArchiver
+from entry_index import VIEWS, entry_in_view
+from models import EntryModel
+from recurrence import FREQUENCIES, Recurrence, display_time
+from storage import STORAGE_MODES, batched, open_storage
+from sync import sync_storages
+
+
+FIELDS = ("id", "type", "title", "details", "time", "done", "archived", "notified", "reminder_time", "recurrence")
+TYPES = ("idea", "task", "appointment")
+TRUE_WORDS = ("1", "true", "yes", "y")
+
+
+# ------------------------------------------------------------
+# READING ENTRIES (STREAMING)
+# ------------------------------------------------------------
+def iter_view(storage, view, batch_size=1000, now=None):
+    """Yield the entries of a view, or of "everything", without loading all of them."""
+    now = now or datetime.now()
+
+    query_view = getattr(storage, "query_view", None)
+    if query_view is not None and view in ("ideas", "next"):
+        # SQLite answers these from its indexes
+        yield from query_view(view, now)
+        return
+
+    if view in ("all", "ideas", "everything"):
+        for batch in storage.iter_entry_batches(batch_size):
+            for entry in batch:
+                if view == "everything" or entry_in_view(entry, view, now):
+                    yield entry
+
+    elif view == "next":
+        upcoming = []
+        for batch in storage.iter_entry_batches(batch_size):
+            upcoming.extend(e for e in batch if entry_in_view(e, "next", now))
+        upcoming.sort(key=lambda e: display_time(e, now))
+        yield from upcoming
+
+    if view in ("archive", "everything"):
+        page, key = storage.archive_page(None, batch_size)
+        yield from page
+        while key is not None:
+            page, key = storage.archive_page(key, batch_size)
+            yield from page
+
+
+def find_entries(storage, prefixes, include_archive):
+    """Resolve ids or unique id prefixes; returns (entries, error message)."""
+    matches = {prefix: [] for prefix in prefixes}
+    view = "everything" if include_archive else "all"
+
+    for entry in iter_view(storage, view):
+        for prefix, found in matches.items():
+            if entry.id.startswith(prefix):
+                found.append(entry)
+
+    entries = []
+    for prefix, found in matches.items():
+        if not found:
+            return None, "No entry matches %r." % prefix
+        if len(found) > 1:
+            return None, "%r matches %d entries; give more of the id." % (prefix, len(found))
+        entries.append(found[0])
+    return entries, None
+
+
+# ------------------------------------------------------------
+# WRITING ENTRIES (BATCHED)
+# ------------------------------------------------------------
+def commit(storage, saved, deleted):
+    """Persist one batch of changes in a single write."""
+    storage.save_batch(saved, deleted, None)
+    storage.flush()
+
+
+# ------------------------------------------------------------
+# FILE FORMATS
+# ------------------------------------------------------------
+def guess_format(path, fmt):
+    if fmt:
+        return fmt
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+def open_file(path, mode):
+    if path == "-":
+        return sys.stdin if "r" in mode else sys.stdout
+    # csv and ics write their own CRLFs
+    raw = path.lower().endswith((".csv", ".ics"))
+    return open(path, mode, newline="" if raw else None, encoding="utf-8")
+
+
+def read_records(f, fmt):
+    """Yield (line number, dict) for every record in a JSONL or CSV file."""
+    if fmt == "csv":
+        reader = csv.DictReader(f)
+        for row in reader:
+            record = {key: value for key, value in row.items() if key in FIELDS}
+            for flag in ("done", "archived", "notified"):
+                if flag in record:
+                    record[flag] = (record[flag] or "").strip().lower() in TRUE_WORDS
+            for key in ("id", "time", "reminder_time", "recurrence"):
+                if not record.get(key):
+                    record.pop(key, None)
+            if "recurrence" in record:
+                try:
+                    record["recurrence"] = json.loads(record["recurrence"])
+                except ValueError:
+                    del record["recurrence"]
+            yield reader.line_num, record
+        return
+
+    for number, line in enumerate(f, 1):
+        line = line.strip()
+        if line:
+            try:
+                yield number, json.loads(line)
+            except ValueError as e:
+                print("Skipping line %d: %s" % (number, e), file=sys.stderr)
+
+
+def parse_entries(records):
+    for number, record in records:
+        try:
+            yield EntryModel.from_dict(record)
+        except Exception as e:
+            print("Skipping record %d: %s" % (number, e), file=sys.stderr)
+
+
+def write_entries(entries, f, fmt):
+    count = 0
+    if fmt == "csv":
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        for entry in entries:
+            row = entry.to_dict()
+            if "recurrence" in row:
+                row["recurrence"] = json.dumps(row["recurrence"])
+            writer.writerow(row)
+            count += 1
+    else:
+        for entry in entries:
+            f.write(json.dumps(entry.to_dict(), ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+# ------------------------------------------------------------
+# COMMANDS
+# ------------------------------------------------------------
+def cmd_list(storage, args):
+    entries = iter_view(storage, args.view)
+    if args.limit:
+        entries = (e for _, e in zip(range(args.limit), entries))
+
+    if args.format in ("jsonl", "csv"):
+        write_entries(entries, sys.stdout, args.format)
+        return 0
+
+    now = datetime.now()
+    for entry in entries:
+        when = display_time(entry, now).strftime("%Y-%m-%d %H:%M") if entry.time else ""
+        mark = "x" if entry.done else " "
+        title = entry.title
+        if entry.recurrence is not None:
+            title += "  (%s)" % entry.recurrence.describe()
+        print("%-8s [%s] %-11s %-16s %s" % (entry.id[:8], mark, entry.type, when, title))
+    return 0
+
+
+def cmd_add(storage, args):
+    title = args.title.strip()
+    if not title:
+        print("Title cannot be empty.", file=sys.stderr)
+        return 1
+
+    parsed_time = None
+    if args.time:
+        try:
+            parsed_time = datetime.fromisoformat(args.time)
+        except ValueError:
+            print("Invalid time %r; use YYYY-MM-DD HH:MM." % args.time, file=sys.stderr)
+            return 1
+
+    # Same rules as the New Entry dialog
+    if args.type == "idea" and parsed_time is not None:
+        print("Ideas have no time.", file=sys.stderr)
+        return 1
+    if args.type == "appointment" and parsed_time is None:
+        print("Appointments need --time.", file=sys.stderr)
+        return 1
+
+    recurrence = None
+    if args.repeat:
+        if parsed_time is None:
+            print("Only entries with a --time can repeat.", file=sys.stderr)
+            return 1
+        try:
+            until = datetime.fromisoformat(args.until) if args.until else None
+            if until is not None and len(args.until) == 10:
+                until = until.replace(hour=23, minute=59, second=59)  # the whole day
+            recurrence = Recurrence(args.repeat, interval=args.every, until=until, count=args.count)
+        except ValueError as e:
+            print("Invalid repeat: %s" % e, file=sys.stderr)
+            return 1
+        recurrence.notified_until = datetime.now()
+
+    entry = EntryModel(
+        type=args.type,
+        title=title,
+        details=args.details or "",
+        time=parsed_time,
+        reminder_time=parsed_time,
+        recurrence=recurrence,
+    )
+    commit(storage, [entry], [])
+    print(entry.id)
+    return 0
+
+
+def cmd_archive(storage, args):
+    entries, error = find_entries(storage, args.ids, include_archive=False)
+    if error:
+        print(error, file=sys.stderr)
+        return 1
+
+    for entry in entries:
+        entry.archived = True
+    commit(storage, entries, [])
+    print("Archived %d entries." % len(entries))
+    return 0
+
+
+def cmd_delete(storage, args):
+    entries, error = find_entries(storage, args.ids, include_archive=True)
+    if error:
+        print(error, file=sys.stderr)
+        return 1
+
+    commit(storage, [], entries)
+    print("Deleted %d entries." % len(entries))
+    return 0
+
+
+def cmd_import(storage, args):
+    fmt = guess_format(args.file, args.format)
+    count = 0
+
+    with open_file(args.file, "r") as f:
+        entries = parse_entries(read_records(f, fmt))
+
+        if storage.appends:
+            for batch in batched(entries, args.batch_size):
+                commit(storage, batch, [])
+                count += len(batch)
+        else:
+            batch = list(entries)
+            commit(storage, batch, [])
+            count = len(batch)
+
+    print("Imported %d entries." % count, file=sys.stderr)
+    return 0
+
+
+def cmd_export(storage, args):
+    fmt = guess_format(args.file, args.format)
+    with open_file(args.file, "w") as f:
+        count = write_entries(iter_view(storage, args.view), f, fmt)
+    print("Exported %d entries." % count, file=sys.stderr)
+    return 0
+
+
+def dedupe_key(entry):
+    return (entry.type, entry.title.strip().casefold(), entry.time)
+
+
+def cmd_import_ics(storage, args):
+    # One pass over what is stored, one over the file, one commit
+    known_ids, known_keys = set(), set()
+    for entry in iter_view(storage, "everything"):
+        known_ids.add(entry.id)
+        known_keys.add(dedupe_key(entry))
+
+    now = datetime.now()
+    errors, new = [], []
+    skipped = 0
+
+    with open_file(args.file, "r") as f:
+        for entry in ical.read_entries(f, errors):
+            key = dedupe_key(entry)
+            if entry.id in known_ids or key in known_keys:
+                skipped += 1
+                continue
+            known_ids.add(entry.id)
+            known_keys.add(key)
+
+            # Settle the past now rather than on the app's next start
+            deadline = AutoArchiver.deadline(entry)
+            if deadline is not None and deadline <= now:
+                entry.archived = True
+            if entry.recurrence is not None:
+                entry.recurrence.notified_until = now
+            elif entry.reminder_time and entry.reminder_time <= now:
+                entry.notified = True
+            new.append(entry)
+
+    for error in errors:
+        print("Skipping " + error, file=sys.stderr)
+
+    if new:
+        commit(storage, new, [])
+    print("Imported %d entries, %d already present." % (len(new), skipped), file=sys.stderr)
+    return 0
+
+
+def cmd_export_ics(storage, args):
+    with open_file(args.file, "w") as f:
+        count = ical.write_calendar(iter_view(storage, args.view), f)
+    print("Exported %d appointments and tasks." % count, file=sys.stderr)
+    return 0
+
+
+def cmd_sync(storage, args):
+    other = open_storage("entries.json", mode=args.other_storage or args.storage, data_dir=args.other_dir)
+    try:
+        to_here, to_other = sync_storages(storage, other)
+    except ValueError as e:
+        print("ERROR: %s" % e, file=sys.stderr)
+        return 1
+    print("Synced: %d changes received, %d sent." % (to_here, to_other))
+    return 0
+
+
+# ------------------------------------------------------------
+# ENTRY POINT
+# ------------------------------------------------------------
+def build_parser():
+    parser = argparse.ArgumentParser(prog="calmmind", description="CalmMind from the command line.")
+    parser.add_argument("--data-dir", help="data directory (default: the app's)")
+    parser.add_argument("--storage", choices=sorted(STORAGE_MODES), help="storage engine (default: $CALMMIND_STORAGE or journal)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    views = VIEWS + ("everything",)
+
+    p = commands.add_parser("list", help="print the entries of a view")
+    p.add_argument("--view", choices=views, default="all")
+    p.add_argument("--limit", type=int, default=0)
+    p.add_argument("--format", choices=("table", "jsonl", "csv"), default="table")
+    p.set_defaults(run=cmd_list)
+
+    p = commands.add_parser("add", help="add an entry")
+    p.add_argument("--type", choices=TYPES, default="idea")
+    p.add_argument("--title", required=True)
+    p.add_argument("--details", default="")
+    p.add_argument("--time", help="YYYY-MM-DD HH:MM")
+    p.add_argument("--repeat", choices=FREQUENCIES)
+    p.add_argument("--every", type=int, default=1, help="repeat interval (days, weeks or months)")
+    p.add_argument("--count", type=int, help="number of occurrences")
+    p.add_argument("--until", help="last possible occurrence, YYYY-MM-DD[ HH:MM]")
+    p.set_defaults(run=cmd_add)
+
+    p = commands.add_parser("archive", help="archive entries by id")
+    p.add_argument("ids", nargs="+")
+    p.set_defaults(run=cmd_archive)
+
+    p = commands.add_parser("delete", help="delete entries (active or archived) by id")
+    p.add_argument("ids", nargs="+")
+    p.set_defaults(run=cmd_delete)
+
+    p = commands.add_parser("import", help="add or replace entries from a JSONL/CSV file")
+    p.add_argument("file")
+    p.add_argument("--format", choices=("jsonl", "csv"))
+    p.add_argument("--batch-size", type=int, default=1000)
+    p.set_defaults(run=cmd_import)
+
+    p = commands.add_parser("export", help="write entries to a JSONL/CSV file")
+    p.add_argument("file")
+    p.add_argument("--format", choices=("jsonl", "csv"))
+    p.add_argument("--view", choices=views, default="everything")
+    p.set_defaults(run=cmd_export)
+
+    p = commands.add_parser("import-ics", help="add events and todos from an iCalendar file")
+    p.add_argument("file")
+    p.set_defaults(run=cmd_import_ics)
+
+    p = commands.add_parser("export-ics", help="write appointments and tasks as iCalendar")
+    p.add_argument("file")
+    p.add_argument("--view", choices=views, default="everything")
+    p.set_defaults(run=cmd_export_ics)
+
+    p = commands.add_parser("sync", help="exchange changes with another data directory")
+    p.add_argument("other_dir")
+    p.add_argument("--other-storage", choices=sorted(STORAGE_MODES), help="its storage engine (default: the same as --storage)")
+    p.set_defaults(run=cmd_sync)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    storage = open_storage("entries.json", mode=args.storage, data_dir=args.data_dir)
+    return args.run(storage, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
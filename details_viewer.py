@@ -0,0 +1,86 @@
+import tkinter as tk
+
+
+class DetailsViewer:
+    """Read-only window with the full details of one entry.
+
+    Cards cut details to a couple of lines; their "More…" button opens
+    this. Built on first use, then only withdrawn and refilled, like
+    EntryDialog.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.window = None
+
+    def open(self, entry):
+        if self.window is None:
+            self._build()
+
+        self.window.title(entry.title)
+        self.title.configure(text=entry.title)
+        self.text.configure(state="normal")
+        self.text.delete("1.0", tk.END)
+        self.text.insert("1.0", entry.details)
+        self.text.configure(state="disabled")
+        self.text.yview_moveto(0)
+
+        self.window.deiconify()
+        self.window.lift()
+        self.app.focus_window(self.window)
+
+    def close(self):
+        self.window.grab_release()
+        self.window.withdraw()
+
+    def _build(self):
+        colors = self.app.colors
+        window = tk.Toplevel(self.app.root)
+        window.withdraw()
+        window.configure(bg=colors["main_bg"])
+        window.geometry("500x420")
+        window.protocol("WM_DELETE_WINDOW", self.close)
+        window.bind("<Escape>", lambda e: self.close())
+        self.window = window
+
+        self.title = tk.Label(
+            window,
+            bg=colors["main_bg"],
+            fg=colors["text_main"],
+            font=("Helvetica", 14, "bold"),
+            anchor="w",
+            wraplength=460,
+            justify="left"
+        )
+        self.title.pack(fill="x", padx=20, pady=(15, 5))
+
+        frame = tk.Frame(window, bg=colors["main_bg"])
+        frame.pack(fill="both", expand=True, padx=20, pady=5)
+
+        scrollbar = tk.Scrollbar(frame)
+        scrollbar.pack(side="right", fill="y")
+        # Selectable for copying, but not editable
+        self.text = tk.Text(
+            frame,
+            wrap="word",
+            bg=colors["card_bg"],
+            fg=colors["text_main"],
+            relief="flat",
+            padx=8,
+            pady=8,
+            yscrollcommand=scrollbar.set
+        )
+        self.text.pack(side="left", fill="both", expand=True)
+        scrollbar.configure(command=self.text.yview)
+
+        tk.Button(
+            window,
+            text="Close",
+            command=self.close,
+            bg=colors["accent"],
+            fg="white",
+            bd=0,
+            padx=10,
+            pady=6,
+            font=("Helvetica", 11, "bold")
+        ).pack(pady=(5, 15))
@@ -0,0 +1,322 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+from datetime import date, datetime
+
+from models import EntryModel
+from recurrence import Recurrence
+
+
+class EntryDialog:
+    """The New / Edit entry window.
+
+    Built withdrawn by prebuild() once the main window is up (that is also
+    when tkcalendar is imported), or by the first open() if that comes
+    sooner. After that it is only withdrawn on close and refilled by
+    open(), so no open creates widgets.
+    """
+
+    REPEAT_CHOICES = ("Never", "Daily", "Weekly", "Monthly")
+
+    def __init__(self, app):
+        self.app = app
+        self.window = None
+        self.entry = None  # being edited; None for a new entry
+
+    # ------------------------------------------------------------
+    # OPEN / CLOSE
+    # ------------------------------------------------------------
+    def prebuild(self):
+        """Build the window hidden, ahead of the first open()."""
+        if self.window is None:
+            self._build()
+
+    def open(self, entry=None):
+        """Show the dialog for `entry`, or blank for a new one."""
+        self.prebuild()
+        self.entry = entry
+        self._fill(entry)
+
+        self.window.title("Edit Entry" if entry else "New Entry")
+        self.type_label.configure(text="Type:" if entry else "Select type:")
+        self.save_btn.configure(text="Save Changes" if entry else "Save Entry")
+
+        self.window.deiconify()
+        self.window.lift()
+        self.app.focus_window(self.window)
+        self.title_entry.focus_set()
+
+    def close(self):
+        self.entry = None
+        self.window.grab_release()
+        self.window.withdraw()
+
+    # ------------------------------------------------------------
+    # BUILD (once)
+    # ------------------------------------------------------------
+    def _build(self):
+        from tkcalendar import DateEntry
+
+        colors = self.app.colors
+        window = tk.Toplevel(self.app.root)
+        window.withdraw()
+        window.configure(bg=colors["main_bg"])
+        window.geometry("500x720")
+        window.protocol("WM_DELETE_WINDOW", self.close)
+        window.bind("<Escape>", lambda e: self.close())
+        self.window = window
+
+        label_style = {
+            "bg": colors["main_bg"],
+            "fg": colors["text_main"],
+            "font": ("Helvetica", 12, "bold"),
+            "anchor": "w",
+            "padx": 10,
+            "pady": 4
+        }
+
+        entry_style = {
+            "bg": colors["card_bg"],
+            "fg": colors["text_main"],
+            "insertbackground": colors["accent"],
+            "relief": "flat",
+        }
+
+        container = tk.Frame(window, bg=colors["main_bg"])
+        container.pack(fill="both", expand=True, padx=10, pady=10)
+
+        # TYPE SELECTOR
+        self.type_label = tk.Label(container, **label_style)
+        self.type_label.pack(fill="x")
+
+        self.selected_type = tk.StringVar(value="idea")
+        type_frame = tk.Frame(container, bg=colors["main_bg"])
+        type_frame.pack(fill="x", pady=(0, 10))
+
+        for text, value in (("Idea", "idea"), ("Task", "task"), ("Appointment", "appointment")):
+            tk.Radiobutton(
+                type_frame,
+                text=text,
+                variable=self.selected_type,
+                value=value,
+                bg=colors["main_bg"],
+                fg=colors["text_main"],
+                selectcolor=colors["sidebar_bg"],
+                activebackground=colors["main_bg"],
+                activeforeground=colors["text_main"],
+                highlightthickness=0,
+                font=("Helvetica", 11)
+            ).pack(side="left", padx=10)
+
+        # Checkbox for task time
+        self.task_time_var = tk.BooleanVar(value=False)
+        self.task_time_checkbox = tk.Checkbutton(
+            container,
+            text="Set a time",
+            variable=self.task_time_var,
+            bg=colors["main_bg"],
+            fg=colors["text_muted"],
+            activebackground=colors["main_bg"],
+            selectcolor=colors["sidebar_bg"],
+            font=("Helvetica", 10)
+        )
+
+        # TITLE
+        tk.Label(container, text="Title:", **label_style).pack(fill="x")
+        self.title_entry = tk.Entry(container, width=40, **entry_style)
+        self.title_entry.pack(fill="x", padx=10, pady=(0, 10))
+
+        # DETAILS
+        tk.Label(container, text="Details:", **label_style).pack(fill="x")
+        self.content_text = tk.Text(container, height=8, wrap="word", **entry_style)
+        self.content_text.pack(fill="both", padx=10, pady=(0, 10))
+
+        # DATE/TIME CARD
+        tk.Label(container, text="Date & Time:", **label_style).pack(fill="x")
+
+        time_card = tk.Frame(container, bg=colors["card_bg"])
+        time_card.pack(fill="x", padx=10, pady=5)
+        card_label = {"bg": colors["card_bg"], "fg": colors["text_main"]}
+
+        tk.Label(time_card, text="Date:", **card_label).grid(row=0, column=0, sticky="w", padx=5, pady=5)
+        self.date_picker = DateEntry(
+            time_card,
+            width=12,
+            background=colors["accent"],
+            foreground="white",
+            borderwidth=0,
+            date_pattern="yyyy-mm-dd",
+            justify="center",
+            selectbackground=colors["accent"],
+            selectforeground="white",
+            normalbackground=colors["card_bg"],
+            normalforeground=colors["text_main"],
+        )
+        self.date_picker.grid(row=0, column=1, padx=5, pady=5)
+
+        tk.Label(time_card, text="Hour:", **card_label).grid(row=1, column=0, sticky="w", padx=5, pady=5)
+        self.hour_box = ttk.Combobox(time_card, values=[f"{i:02d}" for i in range(24)], width=4, state="readonly")
+        self.hour_box.grid(row=1, column=1, padx=5, pady=5)
+
+        tk.Label(time_card, text="Minute:", **card_label).grid(row=2, column=0, sticky="w", padx=5, pady=5)
+        self.minute_box = ttk.Combobox(time_card, values=[f"{i:02d}" for i in range(60)], width=4, state="readonly")
+        self.minute_box.grid(row=2, column=1, padx=5, pady=5)
+
+        # REPEAT
+        tk.Label(time_card, text="Repeat:", **card_label).grid(row=3, column=0, sticky="w", padx=5, pady=5)
+        self.repeat_box = ttk.Combobox(time_card, values=self.REPEAT_CHOICES, width=9, state="readonly")
+        self.repeat_box.grid(row=3, column=1, padx=5, pady=5)
+
+        tk.Label(time_card, text="Every:", **card_label).grid(row=4, column=0, sticky="w", padx=5, pady=5)
+        self.every_box = tk.Spinbox(time_card, from_=1, to=99, width=4)
+        self.every_box.grid(row=4, column=1, padx=5, pady=5)
+
+        tk.Label(time_card, text="Times (0 = no end):", **card_label).grid(row=5, column=0, sticky="w", padx=5, pady=5)
+        self.times_box = tk.Spinbox(time_card, from_=0, to=999, width=4)
+        self.times_box.grid(row=5, column=1, padx=5, pady=5)
+
+        self.selected_type.trace_add("write", self._update_time_ui)
+        self.task_time_var.trace_add("write", self._update_time_ui)
+
+        # SAVE BUTTON
+        self.save_btn = tk.Button(
+            container,
+            bg=colors["accent"],
+            fg="#ffffff",
+            bd=0,
+            relief="flat",
+            padx=10,
+            pady=8,
+            font=("Helvetica", 12, "bold"),
+            command=self._save,
+        )
+        self.app.add_hover(self.save_btn, colors["accent"], "#769dff")
+        self.save_btn.pack(fill="x", padx=10, pady=15)
+
+    # ------------------------------------------------------------
+    # FILL / READ
+    # ------------------------------------------------------------
+    def _fill(self, entry):
+        """Reset every field to `entry`, or to a blank new entry."""
+        self.selected_type.set(entry.type if entry else "idea")
+        self.task_time_var.set(bool(entry and entry.type == "task" and entry.time is not None))
+
+        self.title_entry.delete(0, tk.END)
+        self.content_text.delete("1.0", tk.END)
+        if entry:
+            self.title_entry.insert(0, entry.title)
+            self.content_text.insert("1.0", entry.details)
+
+        when = entry.time if entry else None
+        # set_date() refuses while the picker is disabled
+        self.date_picker.configure(state="normal")
+        self.date_picker.set_date(when.date() if when else date.today())
+        self.hour_box.set(f"{when.hour:02d}" if when else "12")
+        self.minute_box.set(f"{when.minute:02d}" if when else "00")
+
+        recurrence = entry.recurrence if entry else None
+        self.repeat_box.configure(state="readonly")
+        self.repeat_box.set(recurrence.freq.capitalize() if recurrence else "Never")
+        for box, value in ((self.every_box, recurrence.interval if recurrence else 1),
+                           (self.times_box, (recurrence.count or 0) if recurrence else 0)):
+            box.configure(state="normal")
+            box.delete(0, tk.END)
+            box.insert(0, str(value))
+
+        self._update_time_ui()
+
+    def _update_time_ui(self, *args):
+        t = self.selected_type.get()
+        timed = t == "appointment" or (t == "task" and self.task_time_var.get())
+
+        if t == "task":
+            self.task_time_checkbox.pack(anchor="w", padx=10, before=self.save_btn)
+        else:
+            self.task_time_checkbox.pack_forget()
+
+        self.date_picker.configure(state="normal" if timed else "disabled")
+        self.hour_box.config(state="readonly" if timed else "disabled")
+        self.minute_box.config(state="readonly" if timed else "disabled")
+
+        self.repeat_box.config(state="readonly" if timed else "disabled")
+        self.every_box.config(state="normal" if timed else "disabled")
+        self.times_box.config(state="normal" if timed else "disabled")
+
+    def _read_time(self):
+        t = self.selected_type.get()
+        if t == "appointment" or (t == "task" and self.task_time_var.get()):
+            day = self.date_picker.get_date()
+            return datetime(day.year, day.month, day.day, int(self.hour_box.get()), int(self.minute_box.get()))
+        return None
+
+    def _read_repeat(self):
+        choice = self.repeat_box.get()
+        if choice == "Never":
+            return None
+        try:
+            interval = max(1, int(self.every_box.get()))
+            count = max(0, int(self.times_box.get()))
+        except ValueError:
+            interval, count = 1, 0
+        # An end date can only come from an import; keep it
+        old = self.entry.recurrence if self.entry else None
+        until = old.until if old else None
+        return Recurrence(choice.lower(), interval=interval, until=until, count=count or None)
+
+    # ------------------------------------------------------------
+    # SAVE
+    # ------------------------------------------------------------
+    def _save(self):
+        if not self.title_entry.get().strip():
+            messagebox.showerror("Error", "Title cannot be empty.", parent=self.window)
+            return
+        if self.entry is None:
+            self._save_new()
+        else:
+            self._save_changes(self.entry)
+
+    def _save_new(self):
+        parsed_time = self._read_time()
+        recurrence = self._read_repeat() if parsed_time else None
+        if recurrence is not None:
+            # No reminders for occurrences already past
+            recurrence.notified_until = datetime.now()
+
+        new_entry = EntryModel(
+            type=self.selected_type.get(),
+            title=self.title_entry.get().strip(),
+            details=self.content_text.get("1.0", tk.END).strip(),
+            time=parsed_time,
+            done=False,
+            archived=False,
+            notified=False,
+            reminder_time=parsed_time,
+            recurrence=recurrence
+        )
+
+        app = self.app
+        app.entries[new_entry.id] = new_entry
+        app.entry_changed(new_entry)
+        app.refresh_entry(new_entry)
+        self.close()
+
+    def _save_changes(self, entry):
+        old_time = entry.time
+        entry.type = self.selected_type.get()
+        entry.title = self.title_entry.get().strip()
+        entry.details = self.content_text.get("1.0", tk.END).strip()
+        entry.time = self._read_time()
+
+        # Reset reminder to point to the updated time
+        entry.notified = False
+        entry.reminder_time = entry.time
+
+        recurrence = self._read_repeat() if entry.time else None
+        if recurrence is not None and recurrence.same_rule(entry.recurrence) and entry.time == old_time:
+            recurrence = entry.recurrence  # unchanged: keep per-occurrence state
+        elif recurrence is not None:
+            recurrence.notified_until = datetime.now()
+        entry.recurrence = recurrence
+
+        self.app.entry_changed(entry)
+        self.app.refresh_entry(entry)
+        self.close()
@@ -0,0 +1,137 @@
+import bisect
+import heapq
+import itertools
+from datetime import datetime
+
+from recurrence import next_occurrence
+
+
+VIEWS = ("all", "next", "ideas", "archive")
+
+
+def entry_in_view(entry, view_name, now):
+    """Whether an entry is shown in a view (unknown views behave like "all")."""
+    if view_name == "next":
+        if not entry.time or entry.archived:
+            return False
+        if entry.recurrence is not None:
+            return next_occurrence(entry, now) is not None
+        return entry.time >= now
+    if view_name == "ideas":
+        return entry.type == "idea" and not entry.archived
+    if view_name == "archive":
+        return entry.archived
+    return not entry.archived
+
+
+class EntryIndex:
+    """Per-view membership kept up to date as entries change.
+
+    "all", "ideas" and "archive" are lists of (seq, entry) sorted by the
+    order entries were added, so views keep the order of App.entries.
+    "next" is served from a list of (time, seq, entry) over every active
+    timed entry: a bisect on `now` finds where the upcoming ones start.
+    Recurring entries move along as time passes, so they are kept apart
+    and placed by their next occurrence when "next" is asked for.
+
+    Call add/update/remove after every mutation. The keys an entry was
+    filed under are remembered, so update() works after the entry's
+    fields have already been changed.
+    """
+
+    def __init__(self, entries=()):
+        self._counter = itertools.count()
+        self._seq = {}      # entry -> insertion sequence number
+        self._placed = {}   # entry -> [(sorted list, key), ...]
+        self.by_id = {}
+
+        self._members = {"all": [], "ideas": [], "archive": []}
+        self._timed = []
+        self._recurring = []  # (seq, entry) of active recurring entries
+
+        for entry in entries:
+            self.add(entry)
+
+    def __len__(self):
+        return len(self._seq)
+
+    def get(self, entry_id):
+        return self.by_id.get(entry_id)
+
+    def seq_of(self, entry):
+        """The entry's place in the order entries were added; views sort by it."""
+        return self._seq[entry]
+
+    # ------------------------------------------------------------
+    # MUTATIONS
+    # ------------------------------------------------------------
+    def add(self, entry):
+        if entry in self._seq:
+            self.update(entry)
+            return
+        self._seq[entry] = next(self._counter)
+        self.by_id[entry.id] = entry
+        self._file(entry)
+
+    def update(self, entry):
+        if entry not in self._seq:
+            self.add(entry)
+            return
+        self._unfile(entry)
+        self._file(entry)
+
+    def remove(self, entry):
+        if entry not in self._seq:
+            return
+        self._unfile(entry)
+        del self._seq[entry]
+        self.by_id.pop(entry.id, None)
+
+    def _file(self, entry):
+        seq = self._seq[entry]
+        placed = []
+
+        if entry.archived:
+            placed.append((self._members["archive"], (seq, entry)))
+        else:
+            placed.append((self._members["all"], (seq, entry)))
+            if entry.type == "idea":
+                placed.append((self._members["ideas"], (seq, entry)))
+            if entry.time and entry.recurrence is not None:
+                placed.append((self._recurring, (seq, entry)))
+            elif entry.time:
+                placed.append((self._timed, (entry.time, seq, entry)))
+
+        for sorted_list, key in placed:
+            # seq is unique, so comparisons never reach the entry itself
+            bisect.insort(sorted_list, key)
+        self._placed[entry] = placed
+
+    def _unfile(self, entry):
+        for sorted_list, key in self._placed.pop(entry, ()):
+            i = bisect.bisect_left(sorted_list, key[:-1])
+            if i < len(sorted_list) and sorted_list[i][-1] is entry:
+                del sorted_list[i]
+
+    # ------------------------------------------------------------
+    # QUERIES
+    # ------------------------------------------------------------
+    def view(self, view_name, now=None):
+        """Entries of a view, in display order."""
+        if view_name == "next":
+            now = now or datetime.now()
+            start = bisect.bisect_left(self._timed, (now,))
+            upcoming = self._timed[start:]
+            if not self._recurring:
+                return [item[-1] for item in upcoming]
+
+            repeats = []
+            for seq, entry in self._recurring:
+                moment = next_occurrence(entry, now)
+                if moment is not None:
+                    repeats.append((moment, seq, entry))
+            repeats.sort()
+            return [item[-1] for item in heapq.merge(upcoming, repeats)]
+
+        members = self._members.get(view_name, self._members["all"])
+        return [item[-1] for item in members]
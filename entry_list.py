@@ -0,0 +1,379 @@
+import bisect
+import tkinter as tk
+from tkinter import ttk
+from datetime import datetime
+
+from recurrence import display_time
+
+
+class EntryCard:
+    """One entry card. Cards are recycled: bind() points them at another entry."""
+
+    DETAILS_MAX_LINES = 2
+    DETAILS_MAX_CHARS = 170
+
+    def __init__(self, app, parent):
+        self.app = app
+        self.entry = None
+        self.index = None
+        self.cut = False  # details shortened: "More…" shows them in full
+        colors = app.colors
+
+        self.frame = tk.Frame(parent, bg=colors["card_bg"], padx=10, pady=8)
+        self.frame.pack_propagate(False)
+
+        # Header
+        header = tk.Frame(self.frame, bg=colors["card_bg"])
+        header.pack(fill="x")
+
+        # Type badge
+        self.badge = tk.Label(
+            header,
+            fg="#000000",
+            font=("Helvetica", 9, "bold"),
+            padx=6,
+            pady=1
+        )
+        self.badge.pack(side="left")
+
+        # Title
+        self.title = tk.Label(
+            header,
+            bg=colors["card_bg"],
+            fg=colors["text_main"],
+            font=("Helvetica", 14, "bold"),
+            padx=8
+        )
+        self.title.pack(side="left")
+
+        # Time
+        self.time = tk.Label(
+            header,
+            bg=colors["card_bg"],
+            fg=colors["text_muted"],
+            font=("Helvetica", 10, "italic")
+        )
+
+        # Details
+        self.details = tk.Label(
+            self.frame,
+            bg=colors["card_bg"],
+            fg=colors["text_main"],
+            wraplength=600,
+            justify="left"
+        )
+
+        # Actions
+        self.actions = tk.Frame(self.frame, bg=colors["card_bg"])
+        self.actions.pack(fill="x", pady=(4, 0))
+
+        self.restore_btn = self._make_button("Restore", "#4caf50", "#66bb6a", "#ffffff")
+        self.delete_btn = self._make_button("Delete", "#ff4d4d", "#ff6666", "#ffffff")
+        self.edit_btn = self._make_button("Edit", "#5b8def", "#769dff", "white")
+        self.archive_btn = self._make_button("Archive", "#44445a", "#55556b", colors["text_main"])
+        # Shown when the details are cut short; opens them in full
+        self.more_btn = self._make_button("More…", "#44445a", "#55556b", colors["text_main"])
+        self.more_btn.configure(command=lambda: self.app.show_details(self.entry))
+        self.details.bind("<Button-1>", self._on_details_click)
+
+    def _make_button(self, text, bg, hover_bg, fg):
+        btn = tk.Button(
+            self.actions,
+            text=text,
+            bg=bg,
+            fg=fg,
+            bd=0,
+            padx=6,
+            pady=2
+        )
+        self.app.add_hover(btn, bg, hover_bg)
+        return btn
+
+    def _on_details_click(self, event):
+        if self.cut:
+            self.app.show_details(self.entry)
+
+    @classmethod
+    def short_details(cls, details):
+        lines = details.splitlines()
+        text = "\n".join(lines[:cls.DETAILS_MAX_LINES])
+        if len(lines) > cls.DETAILS_MAX_LINES or len(text) > cls.DETAILS_MAX_CHARS:
+            text = text[:cls.DETAILS_MAX_CHARS].rstrip() + "…"
+        return text
+
+    def bind(self, entry, view):
+        app = self.app
+        self.entry = entry
+
+        type_color = app.type_colors.get(entry.type, app.colors["accent"])
+        self.badge.configure(text=entry.type.capitalize(), bg=type_color)
+        self.title.configure(text=entry.title)
+
+        if entry.time:
+            text = display_time(entry, datetime.now()).strftime("%Y-%m-%d %H:%M")
+            if entry.recurrence is not None:
+                text = "↻ " + text  # next occurrence
+            self.time.configure(text=text)
+            self.time.pack(side="right")
+        else:
+            self.time.pack_forget()
+
+        short = self.short_details(entry.details) if entry.details else ""
+        self.cut = cut = short != entry.details.strip()
+        if short:
+            self.details.configure(text=short, cursor="hand2" if cut else "")
+            self.details.pack(anchor="w", pady=(4, 2), before=self.actions)
+        else:
+            self.details.pack_forget()
+
+        for btn in (self.restore_btn, self.delete_btn, self.edit_btn, self.archive_btn, self.more_btn):
+            btn.pack_forget()
+        if cut:
+            self.more_btn.pack(side="left")
+
+        # Archived entries also turn up in search results
+        if entry.archived:
+            can_restore = True
+
+            # If it has a time AND it's more than 24h overdue → hide restore
+            if entry.time:
+                age_seconds = (datetime.now() - entry.time).total_seconds()
+                if age_seconds > 24 * 3600:
+                    can_restore = False
+
+            if can_restore:
+                self.restore_btn.configure(command=lambda e=entry: app.unarchive_entry(e))
+                self.restore_btn.pack(side="right", padx=4)
+
+            self.delete_btn.configure(command=lambda e=entry: app.delete_entry(e))
+            self.delete_btn.pack(side="right", padx=4)
+
+        else:
+            self.edit_btn.configure(command=lambda e=entry: app.open_edit(e))
+            self.edit_btn.pack(side="right", padx=4)
+
+            self.archive_btn.configure(command=lambda e=entry: app.archive_entry(e))
+            self.archive_btn.pack(side="right", padx=4)
+
+
+class VirtualEntryList:
+    """Scrollable list that only materializes the cards near the viewport.
+
+    Every entry occupies a fixed ROW_HEIGHT slot, so the slot of any entry
+    is a multiplication away and the scroll region is known without
+    measuring anything. Cards that scroll out of range go back to a pool
+    and are rebound to whichever entries scroll in.
+
+    If `on_end` is set it is called whenever the last row comes into
+    range, so a paged view can extend() the list (infinite scroll).
+
+    `members` maps each listed entry to its sort key as of when it was
+    listed, so whether an entry is listed is a lookup and, in a list kept
+    sorted by key, its row is a bisect, even after its fields changed.
+    """
+
+    ROW_HEIGHT = 128
+    ROW_GAP = 12
+    OVERSCAN = 2  # extra rows materialized above and below the viewport
+
+    def __init__(self, app, parent):
+        self.app = app
+        self.entries = []
+        self.view = None
+        self.key = None
+        self.members = {}  # entry -> its key when listed (None without a key)
+        self.on_end = None
+
+        self.visible = {}  # row index -> EntryCard
+        self.cards_by_entry = {}  # entry -> its materialized EntryCard
+        self.pool = []
+
+        self.canvas = tk.Canvas(
+            parent,
+            bg=app.colors["main_bg"],
+            highlightthickness=0
+        )
+
+        self.scrollbar = ttk.Scrollbar(
+            parent,
+            orient="vertical",
+            command=self.canvas.yview
+        )
+
+        # Every scroll (wheel, scrollbar, moveto) reports back through here
+        self.canvas.configure(yscrollcommand=self._on_scroll)
+        self.canvas.bind("<Configure>", self._on_resize)
+
+        self.canvas.bind_all(
+            "<MouseWheel>",
+            lambda e: self.canvas.yview_scroll(
+                int(-1 * (e.delta / 120)), "units"
+            )
+        )
+
+    # ------------------------------------------------------------
+    # VISIBILITY
+    # ------------------------------------------------------------
+    def show(self):
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+    def hide(self):
+        self.canvas.pack_forget()
+        self.scrollbar.pack_forget()
+
+    # ------------------------------------------------------------
+    # DATA
+    # ------------------------------------------------------------
+    def set_entries(self, entries, view, keep_scroll=False, key=None):
+        """Show `entries`; pass `key` if they are sorted by it."""
+        self.entries = entries
+        self.view = view
+        self.key = key
+        self.members = {entry: key(entry) if key else None for entry in entries}
+
+        for index in list(self.visible):
+            self._release(index)
+
+        self._update_scrollregion()
+        if not keep_scroll:
+            self.canvas.yview_moveto(0)
+        self.render_visible()
+
+    # ------------------------------------------------------------
+    # INCREMENTAL UPDATES (one entry changed)
+    # ------------------------------------------------------------
+    def index_of(self, entry):
+        """Row of `entry`, or None if it is not listed."""
+        if entry not in self.members:
+            return None
+        card = self.cards_by_entry.get(entry)
+        if card is not None:
+            return card.index
+
+        if self.key is not None:
+            value = self.members[entry]
+            index = bisect.bisect_left(self.entries, value, key=self.members.__getitem__)
+            while index < len(self.entries) and self.members[self.entries[index]] == value:
+                if self.entries[index] is entry:
+                    return index
+                index += 1
+        # No sort key (archive pages, search results), or out of order
+        return self.entries.index(entry)
+
+    def sorted_row(self, value):
+        """Row for a new entry with key `value` in a list set with a key."""
+        return bisect.bisect_right(self.entries, value, key=self.members.__getitem__)
+
+    def update(self, entry):
+        """Rebind the entry's card if it is currently materialized."""
+        card = self.cards_by_entry.get(entry)
+        if card is not None:
+            card.bind(entry, self.view)
+
+    def remove(self, entry):
+        index = self.index_of(entry)
+        if index is None:
+            return
+
+        if index in self.visible:
+            self._release(index)
+        del self.entries[index]
+        del self.members[entry]
+        self._shift_cards(index, -1)
+
+        self._update_scrollregion()
+        self.render_visible()
+
+    def extend(self, entries):
+        self.entries.extend(entries)
+        for entry in entries:
+            self.members[entry] = self.key(entry) if self.key else None
+        self._update_scrollregion()
+        self.render_visible()
+
+    def insert(self, index, entry):
+        self.entries.insert(index, entry)
+        self.members[entry] = self.key(entry) if self.key else None
+        self._shift_cards(index, 1)
+
+        self._update_scrollregion()
+        self.render_visible()
+
+    def _shift_cards(self, start, delta):
+        """Move materialized cards at rows >= start by delta rows."""
+        moved = sorted((i for i in self.visible if i >= start), reverse=delta > 0)
+        for index in moved:
+            card = self.visible.pop(index)
+            card.index = index + delta
+            self.visible[card.index] = card
+            self.canvas.coords(card.item, 0, card.index * self.ROW_HEIGHT + self.ROW_GAP // 2)
+
+    def _update_scrollregion(self):
+        height = len(self.entries) * self.ROW_HEIGHT
+        self.canvas.configure(scrollregion=(0, 0, self.canvas.winfo_width(), height))
+
+    # ------------------------------------------------------------
+    # RENDERING
+    # ------------------------------------------------------------
+    def render_visible(self):
+        top = self.canvas.canvasy(0)
+        height = self.canvas.winfo_height()
+
+        first = max(0, int(top // self.ROW_HEIGHT) - self.OVERSCAN)
+        last = min(len(self.entries), int((top + height) // self.ROW_HEIGHT) + 1 + self.OVERSCAN)
+
+        for index in list(self.visible):
+            if not first <= index < last:
+                self._release(index)
+
+        for index in range(first, last):
+            if index not in self.visible:
+                self._materialize(index)
+
+        if self.on_end is not None and self.entries and last >= len(self.entries):
+            self.on_end()
+
+    def _materialize(self, index):
+        card = self.pool.pop() if self.pool else self._new_card()
+        card.bind(self.entries[index], self.view)
+        card.index = index
+
+        self.canvas.coords(card.item, 0, index * self.ROW_HEIGHT + self.ROW_GAP // 2)
+        self.canvas.itemconfigure(card.item, state="normal")
+        self.visible[index] = card
+        self.cards_by_entry[card.entry] = card
+
+    def _release(self, index):
+        card = self.visible.pop(index)
+        self.canvas.itemconfigure(card.item, state="hidden")
+        self.cards_by_entry.pop(card.entry, None)
+        card.entry = None
+        self.pool.append(card)
+
+    def _new_card(self):
+        card = EntryCard(self.app, self.canvas)
+        card.item = self.canvas.create_window(
+            0, 0,
+            window=card.frame,
+            anchor="nw",
+            width=self.canvas.winfo_width(),
+            height=self.ROW_HEIGHT - self.ROW_GAP
+        )
+        return card
+
+    # ------------------------------------------------------------
+    # EVENTS
+    # ------------------------------------------------------------
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self.render_visible()
+
+    def _on_resize(self, event):
+        for card in self.visible.values():
+            self.canvas.itemconfigure(card.item, width=event.width)
+        for card in self.pool:
+            self.canvas.itemconfigure(card.item, width=event.width)
+
+        self._update_scrollregion()
+        self.render_visible()
@@ -0,0 +1,97 @@
+"""Advisory lock shared between processes through a lock file.
+
+fcntl.flock on POSIX, msvcrt.locking on Windows. Only cooperating
+CalmMind processes (the app, the CLI) honour it.
+"""
+
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """Exclusive, reentrant lock on `path`.
+
+    Threads of one process queue on an RLock first, so the OS lock is
+    taken once per outermost acquire() and nested use is free.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def acquire(self, blocking=True):
+        """Take the lock; with blocking=False returns False if it is held."""
+        if not self._thread_lock.acquire(blocking):
+            return False
+
+        if self._depth == 0:
+            try:
+                self._fd = self._lock_file(blocking)
+            except OSError as e:
+                # Better to go on unlocked than to stop saving altogether
+                print("WARNING: could not lock %s: %s" % (self.path, e))
+                self._fd = None
+            if self._fd is False:
+                self._fd = None
+                self._thread_lock.release()
+                return False
+
+        self._depth += 1
+        return True
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0 and self._fd is not None:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+                else:
+                    os.lseek(self._fd, 0, os.SEEK_SET)
+                    msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+            finally:
+                os.close(self._fd)
+                self._fd = None
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def _lock_file(self, blocking):
+        """The locked descriptor, or False if busy and not blocking."""
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+                try:
+                    fcntl.flock(fd, flags)
+                except BlockingIOError:
+                    os.close(fd)
+                    return False
+                return fd
+
+            # LK_NBLCK fails at once if the byte is locked; retry to block
+            while True:
+                try:
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                    return fd
+                except OSError:
+                    if not blocking:
+                        os.close(fd)
+                        return False
+                    time.sleep(0.05)
+        except Exception:
+            os.close(fd)
+            raise
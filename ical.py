@@ -0,0 +1,413 @@
+"""Streaming iCalendar (RFC 5545) reader and writer.
+
+VEVENTs map to appointments and VTODOs to tasks; the earliest VALARM
+trigger becomes reminder_time. Daily, weekly and monthly RRULEs become a
+Recurrence; other rules import as their first occurrence. Both
+directions work one content line at a time (continuation lines are
+unfolded as they are read), so a multi-year calendar export is never
+held in memory.
+
+Times are converted to the naive local times entries use: UTC and TZID
+times via zoneinfo, floating times as they are. Written files use
+floating times, which calendar tools read as local.
+"""
+
+import re
+import uuid
+from datetime import datetime, timedelta, timezone
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:  # Python < 3.9: TZID times are read as local
+    ZoneInfo = None
+
+from models import EntryModel
+from recurrence import Recurrence
+
+
+CRLF = "\r\n"
+PRODID = "-//CalmMind//CalmMind//EN"
+UID_DOMAIN = "@calmmind"  # UIDs of exported entries are "<entry id>@calmmind"
+UID_NAMESPACE = uuid.UUID("6b1f4c8e-2f53-4c53-9a55-0c4a1f0e7d21")
+
+_DURATION_RE = re.compile(
+    r"([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$"
+)
+_ESCAPED_RE = re.compile(r"\\(.)")
+_ENTRY_ID_RE = re.compile(r"[0-9a-f]{32}$")
+
+RRULE_FREQS = {"DAILY": "daily", "WEEKLY": "weekly", "MONTHLY": "monthly"}
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+_zones = {}
+
+
+class ICalError(ValueError):
+    pass
+
+
+# ------------------------------------------------------------
+# CONTENT LINES
+# ------------------------------------------------------------
+def unfold(f):
+    """Yield logical content lines, joining folded continuation lines."""
+    current = None
+    for raw in f:
+        line = raw.rstrip("\r\n")
+        if line[:1] in (" ", "\t"):
+            if current is not None:
+                current += line[1:]
+            continue
+        if current:
+            yield current
+        current = line
+    if current:
+        yield current
+
+
+def parse_line(line):
+    """(NAME, {PARAM: value}, value) of a content line, or None."""
+    quoted = False
+    for i, ch in enumerate(line):
+        if ch == '"':
+            quoted = not quoted
+        elif ch == ":" and not quoted:
+            break
+    else:
+        return None
+
+    name, *params = line[:i].split(";")
+    param_dict = {}
+    for param in params:
+        key, _, value = param.partition("=")
+        param_dict[key.upper()] = value.strip('"')
+    return name.upper(), param_dict, line[i + 1:]
+
+
+def fold(line):
+    """A content line folded at 75 octets, with its CRLF."""
+    if len(line.encode("utf-8")) <= 75:
+        return line + CRLF
+
+    parts = []
+    current, size, limit = [], 0, 75
+    for ch in line:
+        n = len(ch.encode("utf-8"))
+        if size + n > limit:
+            parts.append("".join(current))
+            current, size, limit = [], 0, 74  # continuation lines start with a space
+        current.append(ch)
+        size += n
+    parts.append("".join(current))
+    return (CRLF + " ").join(parts) + CRLF
+
+
+def unescape_text(value):
+    return _ESCAPED_RE.sub(lambda m: "\n" if m.group(1) in "nN" else m.group(1), value)
+
+
+def escape_text(value):
+    return (
+        value.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+# ------------------------------------------------------------
+# VALUES
+# ------------------------------------------------------------
+def _zone(tzid):
+    if tzid not in _zones:
+        try:
+            _zones[tzid] = ZoneInfo(tzid) if ZoneInfo else None
+        except Exception:
+            _zones[tzid] = None  # e.g. Windows zone names; read as local
+    return _zones[tzid]
+
+
+def parse_datetime(value, params):
+    """Naive local datetime of a DATE or DATE-TIME value."""
+    value = value.strip()
+    if params.get("VALUE") == "DATE" or len(value) == 8:
+        return datetime.strptime(value[:8], "%Y%m%d")
+
+    t = datetime.strptime(value[:15], "%Y%m%dT%H%M%S")
+    if value.endswith("Z"):
+        zone = timezone.utc
+    elif "TZID" in params:
+        zone = _zone(params["TZID"])
+    else:
+        zone = None  # floating
+    if zone is not None:
+        t = t.replace(tzinfo=zone).astimezone().replace(tzinfo=None)
+    return t
+
+
+def format_datetime(t):
+    if t.tzinfo is not None:
+        return t.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return t.strftime("%Y%m%dT%H%M%S")
+
+
+def parse_duration(value):
+    match = _DURATION_RE.match(value.strip())
+    if not match:
+        raise ICalError("bad duration %r" % value)
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    delta = timedelta(
+        weeks=int(weeks or 0), days=int(days or 0),
+        hours=int(hours or 0), minutes=int(minutes or 0), seconds=int(seconds or 0),
+    )
+    return -delta if sign == "-" else delta
+
+
+def format_duration(delta):
+    seconds = int(delta.total_seconds())
+    sign = "-" if seconds < 0 else ""
+    days, rest = divmod(abs(seconds), 86400)
+    hours, rest = divmod(rest, 3600)
+    minutes, seconds = divmod(rest, 60)
+
+    text = sign + "P" + ("%dD" % days if days else "")
+    if hours or minutes or seconds or not days:
+        text += "T"
+        text += "%dH" % hours if hours else ""
+        text += "%dM" % minutes if minutes else ""
+        text += "%dS" % seconds if seconds or not (hours or minutes) else ""
+    return text
+
+
+def parse_rrule(value, start):
+    """Recurrence for an RRULE, or None if it needs more than we store.
+
+    BYDAY / BYMONTHDAY are accepted only when they restate the start.
+    """
+    parts = {}
+    for part in value.upper().split(";"):
+        key, _, item = part.partition("=")
+        parts[key.strip()] = item.strip()
+
+    freq = RRULE_FREQS.get(parts.pop("FREQ", None))
+    if freq is None:
+        return None
+    parts.pop("WKST", None)
+
+    byday = parts.pop("BYDAY", None)
+    if byday is not None and (freq != "weekly" or byday != WEEKDAYS[start.weekday()]):
+        return None
+    bymonthday = parts.pop("BYMONTHDAY", None)
+    if bymonthday is not None and (freq != "monthly" or bymonthday != str(start.day)):
+        return None
+
+    interval = int(parts.pop("INTERVAL", 1))
+    count = int(parts.pop("COUNT")) if "COUNT" in parts else None
+    until = None
+    if "UNTIL" in parts:
+        raw = parts.pop("UNTIL")
+        until = parse_datetime(raw, {})
+        if len(raw) == 8:
+            until += timedelta(days=1, microseconds=-1)  # the whole day
+    if parts:
+        return None
+    return Recurrence(freq, interval=interval, until=until, count=count)
+
+
+def format_rrule(recurrence):
+    parts = ["FREQ=" + recurrence.freq.upper()]
+    if recurrence.interval != 1:
+        parts.append("INTERVAL=%d" % recurrence.interval)
+    if recurrence.count is not None:
+        parts.append("COUNT=%d" % recurrence.count)
+    if recurrence.until is not None:
+        parts.append("UNTIL=" + format_datetime(recurrence.until))
+    return ";".join(parts)
+
+
+# ------------------------------------------------------------
+# READ
+# ------------------------------------------------------------
+def iter_components(f):
+    """Yield (kind, properties, alarms) for every VEVENT and VTODO.
+
+    properties maps NAME -> (params, raw value), first occurrence wins;
+    alarms is a list of such dicts, one per VALARM.
+    """
+    props = alarm = None
+    alarms = []
+
+    for line in unfold(f):
+        parsed = parse_line(line)
+        if parsed is None:
+            continue
+        name, params, value = parsed
+
+        if name == "BEGIN":
+            kind = value.strip().upper()
+            if kind in ("VEVENT", "VTODO"):
+                props, alarms = {}, []
+            elif kind == "VALARM" and props is not None:
+                alarm = {}
+        elif name == "END":
+            kind = value.strip().upper()
+            if kind == "VALARM" and alarm is not None:
+                alarms.append(alarm)
+                alarm = None
+            elif kind in ("VEVENT", "VTODO") and props is not None:
+                yield kind, props, alarms
+                props = alarm = None
+        else:
+            target = alarm if alarm is not None else props
+            if target is not None and name not in target:
+                target[name] = (params, value)
+
+
+def entry_id_for(uid, recurrence_id=None):
+    """Stable entry id for a calendar UID, so importing again finds it."""
+    if uid.endswith(UID_DOMAIN) and _ENTRY_ID_RE.match(uid[:-len(UID_DOMAIN)]) \
+            and recurrence_id is None:
+        return uid[:-len(UID_DOMAIN)]  # one of ours, exported earlier
+    key = uid if recurrence_id is None else uid + "/" + recurrence_id
+    return uuid.uuid5(UID_NAMESPACE, key).hex
+
+
+def _reminder(alarms, start, end):
+    """Earliest alarm trigger of a component, or None."""
+    times = []
+    for alarm in alarms:
+        if "TRIGGER" not in alarm:
+            continue
+        params, value = alarm["TRIGGER"]
+        if params.get("VALUE") == "DATE-TIME":
+            times.append(parse_datetime(value, params))
+            continue
+        anchor = end if params.get("RELATED") == "END" else start
+        if anchor is not None:
+            times.append(anchor + parse_duration(value))
+    return min(times) if times else None
+
+
+def component_to_entry(kind, props, alarms):
+    """EntryModel for a VEVENT/VTODO; raises ICalError if it has no use."""
+
+    def text(name):
+        return unescape_text(props[name][1]) if name in props else ""
+
+    def when(name):
+        if name not in props:
+            return None
+        params, value = props[name]
+        return parse_datetime(value, params)
+
+    try:
+        start = when("DTSTART")
+        if kind == "VEVENT":
+            if start is None:
+                raise ICalError("event without DTSTART")
+            entry_type, time, done = "appointment", start, False
+            end = when("DTEND")
+            if end is None and "DURATION" in props:
+                end = start + parse_duration(props["DURATION"][1])
+        else:
+            entry_type, time = "task", when("DUE") or start
+            done = text("STATUS").upper() == "COMPLETED" or "COMPLETED" in props
+            end = time
+        reminder = _reminder(alarms, start or time, end)
+    except ValueError as e:
+        raise ICalError(str(e)) from None
+
+    uid = props["UID"][1].strip() if "UID" in props else ""
+    recurrence_id = props["RECURRENCE-ID"][1].strip() if "RECURRENCE-ID" in props else None
+
+    recurrence = None
+    if "RRULE" in props and time is not None and recurrence_id is None:
+        try:
+            recurrence = parse_rrule(props["RRULE"][1], time)
+        except ValueError:
+            recurrence = None  # unreadable rule: keep the first occurrence
+
+    return EntryModel(
+        id=entry_id_for(uid, recurrence_id) if uid else None,
+        type=entry_type,
+        title=text("SUMMARY").strip() or "(untitled)",
+        details=text("DESCRIPTION"),
+        time=time,
+        done=done,
+        reminder_time=reminder or time,
+        recurrence=recurrence,
+    )
+
+
+def read_entries(f, errors=None):
+    """Yield an EntryModel per usable VEVENT/VTODO in a text file object.
+
+    Components that cannot be converted are skipped; their messages are
+    appended to `errors` if given.
+    """
+    for kind, props, alarms in iter_components(f):
+        try:
+            yield component_to_entry(kind, props, alarms)
+        except ICalError as e:
+            if errors is not None:
+                summary = props.get("SUMMARY", (None, "?"))[1]
+                errors.append("%s %r: %s" % (kind, summary, e))
+
+
+# ------------------------------------------------------------
+# WRITE
+# ------------------------------------------------------------
+def entry_lines(entry, stamp):
+    """Content lines (unfolded) of one appointment or task."""
+    kind = "VEVENT" if entry.type == "appointment" else "VTODO"
+    lines = [
+        "BEGIN:" + kind,
+        "UID:" + entry.id + UID_DOMAIN,
+        "DTSTAMP:" + stamp,
+        "SUMMARY:" + escape_text(entry.title),
+    ]
+    if entry.details:
+        lines.append("DESCRIPTION:" + escape_text(entry.details))
+
+    if kind == "VEVENT":
+        lines.append("DTSTART:" + format_datetime(entry.time))
+    else:
+        if entry.time:
+            lines.append("DUE:" + format_datetime(entry.time))
+        lines.append("STATUS:" + ("COMPLETED" if entry.done else "NEEDS-ACTION"))
+
+    if entry.recurrence is not None and entry.time:
+        lines.append("RRULE:" + format_rrule(entry.recurrence))
+
+    if entry.reminder_time and not entry.done:
+        if entry.time:
+            trigger = "TRIGGER;RELATED=END:" if kind == "VTODO" else "TRIGGER:"
+            trigger += format_duration(entry.reminder_time - entry.time)
+        else:
+            trigger = "TRIGGER;VALUE=DATE-TIME:" + format_datetime(entry.reminder_time.astimezone(timezone.utc))
+        lines += [
+            "BEGIN:VALARM",
+            "ACTION:DISPLAY",
+            "DESCRIPTION:" + escape_text(entry.title),
+            trigger,
+            "END:VALARM",
+        ]
+
+    lines.append("END:" + kind)
+    return lines
+
+
+def write_calendar(entries, f):
+    """Write the appointments and tasks among entries; returns how many."""
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    f.write(fold("BEGIN:VCALENDAR") + fold("VERSION:2.0") + fold("PRODID:" + PRODID))
+
+    count = 0
+    for entry in entries:
+        if entry.type == "task" or (entry.type == "appointment" and entry.time):
+            f.write("".join(fold(line) for line in entry_lines(entry, stamp)))
+            count += 1
+
+    f.write(fold("END:VCALENDAR"))
+    return count
@@ -0,0 +1,152 @@
+"""Opt-in timing instrumentation for the hot paths.
+
+Enable with CALMMIND_PROFILE=1 (or `python app.py --profile`). While
+enabled, @timed functions record call counts and durations and count()
+records values such as bytes written. A summary is printed at exit; set
+CALMMIND_TRACE=<path> (or --trace=<path>) to also write a Chrome trace
+file, viewable in chrome://tracing or https://ui.perfetto.dev.
+
+When disabled, a @timed call costs one extra function call and a global
+lookup.
+"""
+
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+
+MAX_TRACE_EVENTS = 200000
+
+enabled = False
+trace_path = None
+
+_lock = threading.Lock()
+_spans = {}      # name -> [calls, total seconds, max seconds]
+_counters = {}   # name -> [samples, total]
+_events = []     # Chrome trace "complete" events
+_t0 = time.perf_counter()
+
+
+def enable(trace_file=None):
+    global enabled, trace_path
+    if trace_file:
+        trace_path = trace_file
+    if enabled:
+        return
+    enabled = True
+    atexit.register(_at_exit)
+
+
+# ------------------------------------------------------------
+# RECORDING
+# ------------------------------------------------------------
+def timed(name):
+    """Decorator recording a span for every call while enabled."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _record_span(name, start, time.perf_counter())
+        return wrapper
+    return decorator
+
+
+class span:
+    """Context manager form of @timed."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if enabled:
+            _record_span(self.name, self.start, time.perf_counter())
+
+
+def record(name, start):
+    """Record a span that began at time.perf_counter() value `start`."""
+    if enabled:
+        _record_span(name, start, time.perf_counter())
+
+
+def count(name, value=1):
+    if not enabled:
+        return
+    with _lock:
+        counter = _counters.setdefault(name, [0, 0])
+        counter[0] += 1
+        counter[1] += value
+
+
+def _record_span(name, start, end):
+    duration = end - start
+    with _lock:
+        stats = _spans.setdefault(name, [0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += duration
+        stats[2] = max(stats[2], duration)
+
+        if trace_path and len(_events) < MAX_TRACE_EVENTS:
+            _events.append({
+                "name": name,
+                "ph": "X",
+                "ts": (start - _t0) * 1e6,
+                "dur": duration * 1e6,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+            })
+
+
+# ------------------------------------------------------------
+# REPORTING
+# ------------------------------------------------------------
+def summary():
+    """The collected statistics as a printable table."""
+    with _lock:
+        spans = sorted(_spans.items(), key=lambda item: -item[1][1])
+        counters = sorted(_counters.items())
+
+    lines = ["%-36s %8s %11s %10s %10s" % ("span", "calls", "total ms", "mean ms", "max ms")]
+    for name, (calls, total, longest) in spans:
+        lines.append("%-36s %8d %11.2f %10.3f %10.3f" % (
+            name, calls, total * 1000, total * 1000 / calls, longest * 1000))
+
+    if counters:
+        lines.append("")
+        lines.append("%-36s %8s %11s %10s" % ("counter", "samples", "total", "mean"))
+        for name, (samples, total) in counters:
+            lines.append("%-36s %8d %11d %10.1f" % (name, samples, total, total / samples))
+
+    return "\n".join(lines)
+
+
+def write_trace(path):
+    with _lock:
+        events = list(_events)
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+def _at_exit():
+    print("\n--- CalmMind timing summary ---")
+    print(summary())
+    if trace_path:
+        try:
+            write_trace(trace_path)
+            print("Trace written to", trace_path)
+        except OSError as e:
+            print("ERROR writing trace:", e)
+
+
+if os.environ.get("CALMMIND_PROFILE") or os.environ.get("CALMMIND_TRACE"):
+    enable(os.environ.get("CALMMIND_TRACE"))
@@ -0,0 +1,91 @@
+import queue
+import threading
+from storage import batched
+
+
+class ProgressiveLoader:
+    """Reads entries on a background thread and hands them to the UI in batches.
+
+    Active entries are handed over as soon as they are parsed; archived
+    ones are held back until the whole file has been read, so the main
+    views fill first. Batches travel through a queue that the Tk main loop
+    drains with root.after; the worker thread never touches Tk.
+    """
+
+    POLL_MS = 30
+    MAX_BATCHES_PER_POLL = 4  # bounds the main-loop time spent per poll
+
+    def __init__(self, app, storage, batch_size=500):
+        self.app = app
+        self.storage = storage
+        self.batch_size = batch_size
+
+        self.queue = queue.Queue()
+        self.started = False
+        self.done = False
+
+    def start(self):
+        self.started = True
+        thread = threading.Thread(target=self._read, daemon=True)
+        thread.start()
+        self.app.root.after(self.POLL_MS, self._poll)
+
+    def finish(self):
+        """Block until everything has been handed to the app."""
+        if not self.started:
+            self.start()
+        if not self.done:
+            self._drain(block=True)
+
+    # ------------------------------------------------------------
+    # WORKER THREAD
+    # ------------------------------------------------------------
+    def _read(self):
+        archived = []
+        try:
+            for batch in self.storage.iter_entry_batches(self.batch_size):
+                active = [e for e in batch if not e.archived]
+                archived.extend(e for e in batch if e.archived)
+                if active:
+                    self.queue.put(active)
+
+            for batch in batched(archived, self.batch_size):
+                self.queue.put(batch)
+
+        except Exception as e:
+            print("ERROR loading entries:", e)
+
+        finally:
+            self.queue.put(None)  # end of data
+
+    # ------------------------------------------------------------
+    # MAIN THREAD
+    # ------------------------------------------------------------
+    def _poll(self):
+        if self.done:
+            return
+        if self._drain():
+            self.app.root.after(self.POLL_MS, self._poll)
+
+    def _drain(self, block=False):
+        """Pass queued batches to the app. Returns False once loading is done."""
+        loaded = []
+        finished = False
+
+        while block or len(loaded) < self.MAX_BATCHES_PER_POLL:
+            try:
+                batch = self.queue.get(block=block)
+            except queue.Empty:
+                break
+            if batch is None:
+                finished = True
+                break
+            loaded.append(batch)
+
+        if loaded:
+            self.app.add_loaded_entries([e for batch in loaded for e in batch])
+
+        if finished:
+            self.done = True
+            self.app.on_load_complete()
+        return not finished
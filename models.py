@@ -1,7 +1,25 @@
 import datetime
+import sys
+import uuid
+
+from recurrence import Recurrence
 
 
 class EntryModel:
+    # No per-instance __dict__: large histories keep 100k+ of these in memory
+    __slots__ = (
+        "id",
+        "type",
+        "title",
+        "details",
+        "time",
+        "done",
+        "archived",
+        "notified",
+        "reminder_time",
+        "recurrence",
+    )
+
     def __init__(
         self,
         type,
@@ -12,8 +30,12 @@ class EntryModel:
         archived=False,
         notified=False,
         reminder_time=None,
+        id=None,
+        recurrence=None,
     ):
-        self.type = type
+        # Stable identity used by journal records and row-level updates.
+        self.id = id or uuid.uuid4().hex
+        self.type = sys.intern(type)
         self.title = title
         self.details = details
         self.time = time
@@ -25,11 +47,15 @@ class EntryModel:
         # For new entries, reminder_time == time by default (for timed entries).
         self.reminder_time = reminder_time if reminder_time is not None else time
 
+        # Recurrence rule (see recurrence.py); `time` is the first occurrence
+        self.recurrence = recurrence
+
     # --------------------------
     # SERIALIZE TO DICT FOR JSON
     # --------------------------
     def to_dict(self):
-        return {
+        d = {
+            "id": self.id,
             "type": self.type,
             "title": self.title,
             "details": self.details,
@@ -39,6 +65,10 @@ class EntryModel:
             "notified": self.notified,
             "reminder_time": self.reminder_time.isoformat() if self.reminder_time else None,
         }
+        # Only recurring entries carry the key, so other records are unchanged
+        if self.recurrence is not None:
+            d["recurrence"] = self.recurrence.to_dict()
+        return d
 
     # --------------------------
     # PARSE FROM JSON TO OBJECT
@@ -66,8 +96,16 @@ class EntryModel:
         if parsed_reminder is None:
             parsed_reminder = parsed_time
 
+        recurrence = None
+        if d.get("recurrence"):
+            try:
+                recurrence = Recurrence.from_dict(d["recurrence"])
+            except Exception:
+                recurrence = None  # unreadable rule: keep the first occurrence
+
         return EntryModel(
-            type=d.get("type", "idea"),
+            id=d.get("id"),
+            type=d.get("type") or "idea",
             title=d.get("title", ""),
             details=d.get("details", ""),
             time=parsed_time,
@@ -75,4 +113,92 @@ class EntryModel:
             archived=d.get("archived", False),
             notified=d.get("notified", False),
             reminder_time=parsed_reminder,
+            recurrence=recurrence,
         )
+
+    # --------------------------
+    # BULK PATHS (WHOLE FILES)
+    # --------------------------
+    @staticmethod
+    def from_dicts(dicts):
+        """Parse a whole list of dicts at once.
+
+        Each distinct timestamp string is parsed once and the datetime is
+        shared (reminder_time is usually the same string as time). There
+        is no per-record error handling: if anything in the batch is
+        malformed, the batch is re-parsed with the tolerant from_dict().
+        """
+        try:
+            return EntryModel._from_dicts_fast(dicts)
+        except (TypeError, ValueError, AttributeError, KeyError):
+            return [EntryModel.from_dict(d) for d in dicts]
+
+    @staticmethod
+    def _from_dicts_fast(dicts):
+        fromisoformat = datetime.datetime.fromisoformat
+        new = EntryModel.__new__
+        intern = sys.intern
+        stamps = {None: None, "": None}
+        types = {}
+        entries = []
+
+        for d in dicts:
+            time_str = d.get("time")
+            parsed_time = stamps.get(time_str, stamps)
+            if parsed_time is stamps:
+                parsed_time = stamps[time_str] = fromisoformat(time_str)
+
+            reminder_str = d.get("reminder_time")
+            parsed_reminder = stamps.get(reminder_str, stamps)
+            if parsed_reminder is stamps:
+                parsed_reminder = stamps[reminder_str] = fromisoformat(reminder_str)
+            if parsed_reminder is None:
+                parsed_reminder = parsed_time
+
+            entry_type = d.get("type") or "idea"
+            entry_type = types.get(entry_type) or types.setdefault(entry_type, intern(entry_type))
+
+            entry = new(EntryModel)
+            entry.id = d.get("id") or uuid.uuid4().hex
+            entry.type = entry_type
+            entry.title = d.get("title", "")
+            entry.details = d.get("details", "")
+            entry.time = parsed_time
+            entry.done = d.get("done", False)
+            entry.archived = d.get("archived", False)
+            entry.notified = d.get("notified", False)
+            entry.reminder_time = parsed_reminder
+            rule = d.get("recurrence")
+            entry.recurrence = Recurrence.from_dict(rule) if rule else None
+            entries.append(entry)
+
+        return entries
+
+    @staticmethod
+    def to_dicts(entries):
+        """Serialize a whole list; shared timestamps are formatted once."""
+        dicts = []
+        for e in entries:
+            t = e.time
+            ts = t.isoformat() if t else None
+            rt = e.reminder_time
+            if rt is t:
+                rts = ts
+            else:
+                rts = rt.isoformat() if rt else None
+
+            d = {
+                "id": e.id,
+                "type": e.type,
+                "title": e.title,
+                "details": e.details,
+                "time": ts,
+                "done": e.done,
+                "archived": e.archived,
+                "notified": e.notified,
+                "reminder_time": rts,
+            }
+            if e.recurrence is not None:
+                d["recurrence"] = e.recurrence.to_dict()
+            dicts.append(d)
+        return dicts
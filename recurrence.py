@@ -0,0 +1,251 @@
+"""Recurring entries: the rule is stored once, occurrences are generated on demand.
+
+A recurring entry keeps the start of its first occurrence in `time` and a
+Recurrence in `recurrence`. Occurrence n starts at `time` plus n times the
+interval in days, weeks or months (a monthly rule on the 31st falls on the
+last day of shorter months), so the first occurrence after any moment is
+found by arithmetic instead of by walking the series. Nothing is ever
+materialized: the "next" view asks for the first occurrence from now on,
+the scheduler for the next reminder, and both stop there.
+
+Per-occurrence state is sparse. `overrides` maps an occurrence start to
+{"done": True} or to a snoozed {"reminder_time": ..., "notified": ...},
+only for occurrences someone acted on. Regular reminders that already
+fired are covered by one watermark, `notified_until`. The overrides dict
+is replaced rather than changed in place (see set_override()), because
+the storage worker serializes entries while the UI thread edits them.
+"""
+
+import calendar
+from datetime import datetime, timedelta
+
+
+FREQUENCIES = ("daily", "weekly", "monthly")
+
+# Overrides of occurrences further back than this no longer matter to the
+# "next" view or the scheduler (whose catch-up window is a day)
+OVERRIDE_HORIZON = timedelta(days=2)
+
+
+def _parse_time(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+class Recurrence:
+    __slots__ = ("freq", "interval", "until", "count", "overrides", "notified_until")
+
+    def __init__(self, freq, interval=1, until=None, count=None, overrides=None, notified_until=None):
+        if freq not in FREQUENCIES:
+            raise ValueError("unknown frequency %r" % freq)
+        if interval < 1:
+            raise ValueError("interval must be at least 1")
+        if count is not None and count < 1:
+            raise ValueError("count must be at least 1")
+
+        self.freq = freq
+        self.interval = interval
+        self.until = until
+        self.count = count
+        self.overrides = overrides or {}  # occurrence start -> state dict
+        self.notified_until = notified_until
+
+    def same_rule(self, other):
+        return other is not None and (self.freq, self.interval, self.until, self.count) == (
+            other.freq, other.interval, other.until, other.count)
+
+    def describe(self):
+        unit = {"daily": "day", "weekly": "week", "monthly": "month"}[self.freq]
+        text = self.freq if self.interval == 1 else "every %d %ss" % (self.interval, unit)
+        if self.count is not None:
+            text += ", %d times" % self.count
+        if self.until is not None:
+            text += " until %s" % self.until.strftime("%Y-%m-%d")
+        return text
+
+    # ------------------------------------------------------------
+    # SERIALIZE
+    # ------------------------------------------------------------
+    def to_dict(self):
+        d = {"freq": self.freq, "interval": self.interval}
+        if self.until is not None:
+            d["until"] = self.until.isoformat()
+        if self.count is not None:
+            d["count"] = self.count
+        if self.notified_until is not None:
+            d["notified_until"] = self.notified_until.isoformat()
+        if self.overrides:
+            d["overrides"] = {
+                start.isoformat(): {
+                    key: value.isoformat() if isinstance(value, datetime) else value
+                    for key, value in state.items()
+                }
+                for start, state in self.overrides.items()
+            }
+        return d
+
+    @staticmethod
+    def from_dict(d):
+        overrides = {}
+        for start, state in (d.get("overrides") or {}).items():
+            state = dict(state)
+            if state.get("reminder_time"):
+                state["reminder_time"] = datetime.fromisoformat(state["reminder_time"])
+            overrides[datetime.fromisoformat(start)] = state
+
+        return Recurrence(
+            d["freq"],
+            interval=int(d.get("interval", 1)),
+            until=_parse_time(d.get("until")),
+            count=d.get("count"),
+            overrides=overrides,
+            notified_until=_parse_time(d.get("notified_until")),
+        )
+
+    # ------------------------------------------------------------
+    # SERIES
+    # ------------------------------------------------------------
+    def nth(self, start, n):
+        """Start of occurrence n (0 is `start` itself)."""
+        if self.freq == "monthly":
+            month = start.month - 1 + n * self.interval
+            year = start.year + month // 12
+            month = month % 12 + 1
+            day = min(start.day, calendar.monthrange(year, month)[1])
+            return start.replace(year=year, month=month, day=day)
+        return start + n * self._step()
+
+    def _step(self):
+        return timedelta(days=self.interval * (7 if self.freq == "weekly" else 1))
+
+    def index_at(self, start, moment):
+        """Number of the first occurrence starting at or after `moment`."""
+        if moment <= start:
+            return 0
+        if self.freq == "monthly":
+            months = (moment.year - start.year) * 12 + moment.month - start.month
+            n = months // self.interval
+        else:
+            n, rest = divmod(moment - start, self._step())
+            if not rest:
+                return n
+        while self.nth(start, n) < moment:
+            n += 1
+        return n
+
+    def occurrences(self, start, after=None):
+        """Occurrence starts from `after` on (inclusive), oldest first."""
+        n = 0 if after is None else self.index_at(start, after)
+        while self.count is None or n < self.count:
+            try:
+                moment = self.nth(start, n)
+            except (OverflowError, ValueError):
+                return  # past year 9999
+            if self.until is not None and moment > self.until:
+                return
+            yield moment
+            n += 1
+
+    def last(self, start):
+        """Start of the final occurrence, or None if the series never ends."""
+        if self.until is not None:
+            n = self.index_at(start, self.until)
+            if self.nth(start, n) > self.until:
+                n -= 1
+            if self.count is not None:
+                n = min(n, self.count - 1)
+            return self.nth(start, max(n, 0))
+        if self.count is not None:
+            return self.nth(start, self.count - 1)
+        return None
+
+
+# ------------------------------------------------------------
+# ENTRY HELPERS
+# ------------------------------------------------------------
+def next_occurrence(entry, now):
+    """Start of the first occurrence at or after `now` not yet done, or None."""
+    rule = entry.recurrence
+    overrides = rule.overrides
+    for moment in rule.occurrences(entry.time, now):
+        state = overrides.get(moment)
+        if state is None or not state.get("done"):
+            return moment
+    return None
+
+
+def display_time(entry, now):
+    """The time to show for an entry: its next occurrence if it recurs."""
+    if entry.recurrence is not None and entry.time is not None:
+        return next_occurrence(entry, now) or entry.time
+    return entry.time
+
+
+def next_reminder(entry, after):
+    """(reminder time, occurrence start) of the next reminder to fire at or
+    after `after`, or (None, None).
+
+    Snoozed occurrences fire at their override's reminder_time; every
+    other occurrence at its start plus the entry's reminder offset, once
+    that is past notified_until.
+    """
+    rule = entry.recurrence
+    offset = entry.reminder_time - entry.time if entry.reminder_time else timedelta(0)
+    best = (None, None)
+
+    for moment, state in rule.overrides.items():
+        due = state.get("reminder_time")
+        if due is not None and due >= after and not state.get("notified") and not state.get("done"):
+            if best[0] is None or due < best[0]:
+                best = (due, moment)
+
+    floor = after
+    if rule.notified_until is not None and rule.notified_until > floor:
+        floor = rule.notified_until
+
+    for moment in rule.occurrences(entry.time, floor - offset):
+        due = moment + offset
+        if due < after or (rule.notified_until is not None and due <= rule.notified_until):
+            continue
+        state = rule.overrides.get(moment)
+        if state is not None and (state.get("done") or "reminder_time" in state):
+            continue
+        if best[0] is None or due < best[0]:
+            best = (due, moment)
+        break
+
+    return best
+
+
+def set_override(entry, moment, state, now=None):
+    """Replace the state of one occurrence (None clears it).
+
+    Builds a new dict and drops overrides too old to matter, so the
+    mapping stays small and is never mutated while being saved.
+    """
+    horizon = (now or datetime.now()) - OVERRIDE_HORIZON
+    overrides = {
+        start: old for start, old in entry.recurrence.overrides.items()
+        if start >= horizon or (old.get("reminder_time") or start) >= horizon
+    }
+    if state:
+        overrides[moment] = state
+    else:
+        overrides.pop(moment, None)
+    entry.recurrence.overrides = overrides
+
+
+def mark_fired(entry, due, after):
+    """Record that the reminder due at `due` was delivered; returns its occurrence."""
+    _, moment = next_reminder(entry, after)
+    state = entry.recurrence.overrides.get(moment)
+    if state is not None and "reminder_time" in state:
+        set_override(entry, moment, dict(state, notified=True))
+    else:
+        entry.recurrence.notified_until = due
+    return moment
+
+
+def complete_occurrence(entry, moment):
+    """Mark one occurrence done; returns True if that finished the series."""
+    set_override(entry, moment, {"done": True})
+    return next_occurrence(entry, moment + timedelta(microseconds=1)) is None
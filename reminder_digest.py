@@ -0,0 +1,160 @@
+import tkinter as tk
+
+
+class ReminderDigest:
+    """One window for a burst of reminders (after sleep, or a shared time).
+
+    Shows up to MAX_ROWS reminders with their own Snooze / Done buttons and
+    a count of the rest; the bulk buttons act on all of them. Reminders
+    firing while it is open are added to it. Every action goes through the
+    App, which saves the affected entries as one batch.
+    """
+
+    MAX_ROWS = 8
+
+    def __init__(self, app):
+        self.app = app
+        self.items = {}  # entry id -> (entry, occurrence), in arrival order
+        self.rows = {}   # entry id -> row frame, for the shown items
+        colors = app.colors
+
+        self.window = tk.Toplevel(app.root)
+        self.window.title("Reminders")
+        self.window.configure(bg=colors["card_bg"])
+        self.window.geometry("460x480")
+        self.window.attributes("-topmost", True)
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.heading = tk.Label(
+            self.window,
+            bg=colors["card_bg"],
+            fg=colors["text_main"],
+            font=("Helvetica", 16, "bold")
+        )
+        self.heading.pack(pady=(10, 6))
+
+        self.list_frame = tk.Frame(self.window, bg=colors["card_bg"])
+        self.list_frame.pack(fill="both", expand=True, padx=10)
+
+        self.more_label = tk.Label(
+            self.window,
+            bg=colors["card_bg"],
+            fg=colors["text_muted"],
+            font=("Helvetica", 10, "italic")
+        )
+        self.more_label.pack()
+
+        # Bulk actions
+        bulk_row = tk.Frame(self.window, bg=colors["card_bg"])
+        bulk_row.pack(pady=10)
+        self._button(bulk_row, "Snooze all 5 min", lambda: self.snooze(list(self.items), 5)).pack(side="left", padx=5)
+        self._button(bulk_row, "Snooze all 10 min", lambda: self.snooze(list(self.items), 10)).pack(side="left", padx=5)
+        self._button(bulk_row, "All done", lambda: self.done(list(self.items)), done=True).pack(side="left", padx=5)
+
+        tk.Button(
+            self.window,
+            text="Close",
+            command=self.close,
+            bg=colors["accent"],
+            fg="white",
+            bd=0,
+            padx=10,
+            pady=6,
+            font=("Helvetica", 11, "bold")
+        ).pack(pady=(0, 10))
+
+    def add(self, items):
+        """Add (entry, occurrence) pairs; an entry already listed is updated."""
+        for entry, occurrence in items:
+            self.items[entry.id] = (entry, occurrence)
+            if entry.id in self.rows:
+                self.rows.pop(entry.id).destroy()
+        self._fill_rows()
+        self.window.lift()
+
+    def close(self):
+        self.window.destroy()
+        self.window = None
+        self.app.reminder_digest = None
+
+    # ------------------------------------------------------------
+    # ACTIONS
+    # ------------------------------------------------------------
+    def snooze(self, entry_ids, minutes):
+        self.app.snooze_reminders([self.items[i] for i in entry_ids], minutes)
+        self._remove(entry_ids)
+
+    def done(self, entry_ids):
+        self.app.complete_reminders([self.items[i] for i in entry_ids])
+        self._remove(entry_ids)
+
+    def _remove(self, entry_ids):
+        for entry_id in entry_ids:
+            self.items.pop(entry_id, None)
+            row = self.rows.pop(entry_id, None)
+            if row is not None:
+                row.destroy()
+        if not self.items:
+            self.close()
+        else:
+            self._fill_rows()
+
+    # ------------------------------------------------------------
+    # ROWS
+    # ------------------------------------------------------------
+    def _fill_rows(self):
+        """Show rows for the first MAX_ROWS items; only missing rows are built."""
+        for entry_id in list(self.items)[:self.MAX_ROWS]:
+            if entry_id not in self.rows:
+                self.rows[entry_id] = self._build_row(*self.items[entry_id])
+
+        hidden = len(self.items) - len(self.rows)
+        self.heading.configure(text="🔔 %d reminders" % len(self.items))
+        self.more_label.configure(text="…and %d more" % hidden if hidden else "")
+
+    def _build_row(self, entry, occurrence):
+        colors = self.app.colors
+        row = tk.Frame(self.list_frame, bg=colors["card_bg"])
+        row.pack(fill="x", pady=3)
+
+        tk.Label(
+            row,
+            text=entry.type.capitalize(),
+            bg=self.app.type_colors.get(entry.type, colors["accent"]),
+            fg="#000000",
+            font=("Helvetica", 9, "bold"),
+            padx=6,
+            pady=1
+        ).pack(side="left")
+
+        when = occurrence or entry.time
+        text = entry.title if not when else "%s  %s" % (when.strftime("%H:%M"), entry.title)
+        tk.Label(
+            row,
+            text=text,
+            bg=colors["card_bg"],
+            fg=colors["text_main"],
+            anchor="w",
+            font=("Helvetica", 11)
+        ).pack(side="left", fill="x", expand=True, padx=8)
+
+        entry_id = entry.id
+        self._button(row, "Done", lambda: self.done([entry_id]), done=True).pack(side="right", padx=2)
+        self._button(row, "10 min", lambda: self.snooze([entry_id], 10)).pack(side="right", padx=2)
+        self._button(row, "5 min", lambda: self.snooze([entry_id], 5)).pack(side="right", padx=2)
+        return row
+
+    def _button(self, parent, text, command, done=False):
+        normal, hover = ("#4caf50", "#66bb6a") if done else ("#44445a", "#55556b")
+        button = tk.Button(
+            parent,
+            text=text,
+            command=command,
+            bg=normal,
+            fg="#ffffff" if done else self.app.colors["text_main"],
+            bd=0,
+            padx=8,
+            pady=5
+        )
+        self.app.add_hover(button, normal, hover)
+        return button
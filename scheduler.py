@@ -1,36 +1,160 @@
+import heapq
+import itertools
+import queue
 import threading
-import time
-from datetime import datetime
+from datetime import datetime, timedelta
+import instrument
+from recurrence import next_reminder
+
+
+class DueQueue:
+    """Min-heap of items (entries, or entry ids) ordered by a due time.
+
+    Items are re-pushed with their new due time whenever they change;
+    stale heap items are dropped lazily when they reach the top, so
+    updates cost O(log n).
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._due = {}  # item -> due time currently queued for it
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._due)
+
+    def push_due(self, item, due):
+        """Queue `item` for `due` (None removes it)."""
+        if due is None:
+            self._due.pop(item, None)
+            return
+        if self._due.get(item) == due:
+            return
+
+        self._due[item] = due
+        heapq.heappush(self._heap, (due, next(self._counter), item))
+
+    def discard(self, item):
+        self._due.pop(item, None)
+
+    def peek_time(self):
+        """Earliest due time still queued, or None if the queue is empty."""
+        while self._heap:
+            due, _, item = self._heap[0]
+            if self._due.get(item) == due:
+                return due
+            heapq.heappop(self._heap)
+        return None
+
+    def pop_due(self, now):
+        """Remove every item whose due time is <= now; returns (item, due) pairs."""
+        fired = []
+        while self._heap and self._heap[0][0] <= now:
+            due, _, item = heapq.heappop(self._heap)
+            if self._due.get(item) != due:
+                continue  # stale: item was rescheduled or discarded
+            del self._due[item]
+            fired.append((item, due))
+        return fired
 
 
 class ReminderScheduler:
-    def __init__(self, app, check_interval=30):
-        self.app = app          # reference to App instance
+    """Background thread that reports due reminders.
+
+    The thread only ever sees (entry id, due time) pairs captured by
+    reschedule() on the caller's thread, never the live entries. When a
+    reminder is due it puts (entry_id, due) on `events`; the Tk main loop
+    drains that queue (see App.poll_reminders), re-checks the entry and
+    does the popup and the save itself.
+    """
+
+    def __init__(self, check_interval=30, catch_up_window=timedelta(hours=24)):
+        # Upper bound for a single sleep. The wait uses a monotonic clock,
+        # which may not advance while the machine is suspended.
         self.check_interval = check_interval
+        # Reminders missed by more than this are dropped instead of shown
+        # (they are auto-archived anyway).
+        self.catch_up_window = catch_up_window
         self.running = True
 
+        self.queue = DueQueue()  # entry id -> reminder time
+        self.events = queue.Queue()
+        self._wakeup = threading.Condition()
+
+    def reminder_due(self, entry, now=None):
+        """When the entry's reminder should fire, or None if it should not."""
+        if entry.archived or entry.done:
+            return None
+        if entry.recurrence is not None and entry.time is not None:
+            # Only one occurrence at a time is queued: the next one from
+            # the start of the catch-up window on
+            after = (now or datetime.now()) - self.catch_up_window
+            return next_reminder(entry, after)[0]
+        if entry.notified:
+            return None
+        return entry.reminder_time
+
     def start(self):
         thread = threading.Thread(target=self.loop, daemon=True)
         thread.start()
 
-    def loop(self):
-        while self.running:
-            now = datetime.now().replace(second=0, microsecond=0)
+    def stop(self):
+        with self._wakeup:
+            self.running = False
+            self._wakeup.notify()
+
+    # ------------------------------------------------------------
+    # QUEUE UPDATES (call after add / edit / snooze / archive / delete)
+    # ------------------------------------------------------------
+    def reschedule(self, entry):
+        self.reschedule_many([entry])
+
+    def reschedule_many(self, entries):
+        # Read the entries here, on the caller's thread
+        updates = [(entry.id, self.reminder_due(entry)) for entry in entries]
 
-            for entry in self.app.entries:
-                # Skip if no reminder time, archived, or done
-                if not getattr(entry, "reminder_time", None):
-                    continue
-                if entry.archived or entry.done:
-                    continue
+        with self._wakeup:
+            for entry_id, due in updates:
+                self.queue.push_due(entry_id, due)
+            self._wakeup.notify()
 
-                due = entry.reminder_time.replace(second=0, microsecond=0)
+    def unschedule(self, entry):
+        with self._wakeup:
+            self.queue.discard(entry.id)
+            self._wakeup.notify()
+
+    # ------------------------------------------------------------
+    # MAIN LOOP
+    # ------------------------------------------------------------
+    @instrument.timed("scheduler.tick")
+    def tick(self, now=None):
+        """Post every reminder due by `now` to `events`; returns how many."""
+        now = now or datetime.now()
+        with self._wakeup:
+            fired = self.queue.pop_due(now)
+
+        for entry_id, due in fired:
+            self.events.put((entry_id, due))
+        return len(fired)
+
+    def loop(self):
+        while self.running:
+            if self.tick():
+                continue
 
-                # If the reminder time matches AND not notified yet
-                if due == now and not getattr(entry, "notified", False):
-                    # Show popup in main thread context
-                    self.app.show_reminder_popup(entry)
-                    entry.notified = True
-                    self.app.storage.save_entries(self.app.entries)
+            with self._wakeup:
+                timeout = self.check_interval
+                next_due = self.queue.peek_time()
+                if next_due is not None:
+                    seconds = (next_due - datetime.now()).total_seconds()
+                    timeout = min(timeout, max(seconds, 0))
+                self._wakeup.wait(timeout)
 
-            time.sleep(self.check_interval)
+    def drain_events(self):
+        """Due (entry_id, due) pairs posted so far. Main thread only."""
+        events = []
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                return events
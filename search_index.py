@@ -0,0 +1,203 @@
+import bisect
+import heapq
+import json
+import os
+import re
+import tempfile
+
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return set(TOKEN_RE.findall(text.lower()))
+
+
+class SearchIndex:
+    """Inverted index over entry titles and details.
+
+    Each indexed entry gets a document number from a counter, so higher
+    numbers are more recent and ranking by recency is ranking by number.
+    An entry whose text changes gets a new number, so "recent" means
+    added or last edited. Entries have no edit time, so build() can only
+    number them in the order given: the order they were stored in.
+    Postings are sorted lists of document numbers; a query walks the
+    postings of its most selective term from the newest end and stops
+    once `limit` results are found. Every term matches as a prefix: the
+    sorted vocabulary gives the range of tokens starting with it. The
+    other terms are checked against the entry's token text (" tok tok"),
+    where " " + term is a substring exactly when some token starts with it.
+
+    Persisted with a fingerprint of the data files it was built from;
+    load() refuses a file whose fingerprint does not match.
+    """
+
+    VERSION = 1
+
+    def __init__(self):
+        self.postings = {}    # token -> sorted list of document numbers
+        self.vocabulary = []  # sorted tokens
+        self.ids = []         # document number -> entry id (None once removed)
+        self.texts = []       # document number -> " tok tok ..." (None once removed)
+        self.doc_of = {}      # entry id -> document number
+
+    def __len__(self):
+        return len(self.doc_of)
+
+    @classmethod
+    def build(cls, entries):
+        """Index all entries at once, in order (faster than update() each)."""
+        index = cls()
+        postings = index.postings
+        for doc, entry in enumerate(entries):
+            tokens = sorted(tokenize(entry.title + " " + entry.details))
+            for token in tokens:
+                docs = postings.get(token)
+                if docs is None:
+                    docs = postings[token] = []
+                docs.append(doc)
+            index.ids.append(entry.id)
+            index.texts.append("".join(" " + token for token in tokens))
+            index.doc_of[entry.id] = doc
+
+        index.vocabulary = sorted(postings)
+        return index
+
+    # ------------------------------------------------------------
+    # UPDATES
+    # ------------------------------------------------------------
+    def update(self, entry):
+        tokens = tokenize(entry.title + " " + entry.details)
+        text = "".join(" " + token for token in sorted(tokens))
+        doc = self.doc_of.get(entry.id)
+        if doc is not None and self.texts[doc] != text:
+            # Edited: it becomes the most recent document
+            self.remove(entry.id)
+            doc = None
+        if doc is None:
+            doc = len(self.ids)
+            self.ids.append(entry.id)
+            self.texts.append("")
+            self.doc_of[entry.id] = doc
+
+        self._set_tokens(doc, tokens)
+        self.texts[doc] = text
+
+    def remove(self, entry_id):
+        doc = self.doc_of.pop(entry_id, None)
+        if doc is None:
+            return
+        self._set_tokens(doc, set())
+        self.ids[doc] = None
+        self.texts[doc] = None
+
+    def _set_tokens(self, doc, tokens):
+        old = set(self.texts[doc].split())
+
+        for token in old - tokens:
+            docs = self.postings[token]
+            del docs[bisect.bisect_left(docs, doc)]
+            if not docs:
+                del self.postings[token]
+                del self.vocabulary[bisect.bisect_left(self.vocabulary, token)]
+
+        for token in tokens - old:
+            docs = self.postings.get(token)
+            if docs is None:
+                docs = self.postings[token] = []
+                bisect.insort(self.vocabulary, token)
+            if not docs or docs[-1] < doc:
+                docs.append(doc)  # the common case: a new entry
+            else:
+                bisect.insort(docs, doc)
+
+    # ------------------------------------------------------------
+    # QUERIES
+    # ------------------------------------------------------------
+    def _tokens_with_prefix(self, prefix):
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        end = bisect.bisect_left(self.vocabulary, prefix + "\U0010ffff", start)
+        return self.vocabulary[start:end]
+
+    def _newest_first(self, tokens):
+        """Document numbers containing any of the tokens, newest first."""
+        if len(tokens) == 1:
+            yield from reversed(self.postings[tokens[0]])
+            return
+
+        last = None
+        for doc in heapq.merge(*(reversed(self.postings[t]) for t in tokens), reverse=True):
+            if doc != last:
+                yield doc
+                last = doc
+
+    def search(self, query, limit=None):
+        """Ids of entries matching every term of the query, newest first."""
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        matches = {term: self._tokens_with_prefix(term) for term in terms}
+        if not all(matches.values()):
+            return []
+
+        # Walk the term with the fewest postings; test the others per entry
+        def size(term):
+            return sum(len(self.postings[token]) for token in matches[term])
+
+        driver = min(terms, key=size)
+        others = [" " + term for term in terms if term != driver]
+
+        ids, texts = self.ids, self.texts
+        result = []
+        for doc in self._newest_first(matches[driver]):
+            text = texts[doc]
+            if all(term in text for term in others):
+                result.append(ids[doc])
+                if len(result) == limit:
+                    break
+        return result
+
+    # ------------------------------------------------------------
+    # PERSISTENCE
+    # ------------------------------------------------------------
+    def save(self, path, fingerprint):
+        data = {
+            "version": self.VERSION,
+            "fingerprint": fingerprint,
+            "ids": self.ids,
+            "texts": self.texts,
+            "postings": self.postings,
+        }
+
+        temp_fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(temp_fd, "w") as tmp:
+                json.dump(data, tmp, separators=(",", ":"))
+            os.replace(temp_path, path)
+        except Exception as e:
+            print("ERROR saving search index:", e)
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+    @classmethod
+    def load(cls, path, fingerprint):
+        """The persisted index, or None if missing, unreadable or stale."""
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if data.get("version") != cls.VERSION or data.get("fingerprint") != fingerprint:
+            return None
+
+        index = cls()
+        index.ids = data["ids"]
+        index.texts = data["texts"]
+        index.postings = data["postings"]
+        index.vocabulary = sorted(index.postings)
+        index.doc_of = {entry_id: doc for doc, entry_id in enumerate(index.ids) if entry_id is not None}
+        return index
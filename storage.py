@@ -1,7 +1,18 @@
+import datetime
 import json
 import os
+import sqlite3
 import tempfile
+import threading
+import uuid
+import binary_format
+from archive_index import ArchiveIndex
+from changelog import ChangeLog
+from filelock import FileLock
+import instrument
+from entry_index import entry_in_view
 from models import EntryModel
+from recurrence import display_time
 
 
 def get_app_data_dir(app_name="CalmMind"):
@@ -13,13 +24,303 @@ def get_app_data_dir(app_name="CalmMind"):
     return os.path.join(base, app_name)
 
 
+def iter_json_array(f, chunk_size=64 * 1024):
+    """Yield the items of a top-level JSON array without reading it whole."""
+    decoder = json.JSONDecoder()
+    buf, pos, eof = "", 0, False
+    started = False
+
+    while True:
+        # Skip whitespace and separators, reading more input as needed
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buf) or eof:
+                break
+            chunk = f.read(chunk_size)
+            buf, pos, eof = buf[pos:] + chunk, 0, not chunk
+
+        if pos >= len(buf):
+            raise ValueError("unexpected end of file")
+
+        if not started:
+            if buf[pos] != "[":
+                raise ValueError("expected a JSON array")
+            started = True
+            pos += 1
+            continue
+
+        if buf[pos] == "]":
+            return
+
+        try:
+            item, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            end = None
+            if eof:
+                raise
+
+        # Incomplete item (or one that may continue past the buffer): read on
+        if end is None or (end == len(buf) and not eof):
+            chunk = f.read(chunk_size)
+            buf, pos, eof = buf[pos:] + chunk, 0, not chunk
+            continue
+
+        yield item
+        pos = end
+
+
+def batched(items, batch_size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def replay_journal(path, changes):
+    """Apply a file of put/delete records to {id: EntryModel or None}.
+
+    Returns the number of records read (0 if the file does not exist).
+    """
+    if not os.path.exists(path):
+        return 0
+
+    with open(path, "r") as f:
+        return apply_records(f, changes)
+
+
+def apply_records(lines, changes):
+    """replay_journal() for lines already read; returns how many were valid."""
+    count = 0
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+            if record["op"] == "put":
+                entry = EntryModel.from_dict(record["entry"])
+                changes[entry.id] = entry
+            elif record["op"] == "delete":
+                changes[record["id"]] = None
+            count += 1
+        except Exception as e:
+            # Typically a torn last line after a crash
+            print("Skipping invalid journal record:", e)
+
+    return count
+
+
+def _encode_records(records):
+    return "".join(
+        json.dumps(record, separators=(",", ":")) + "\n" for record in records
+    ).encode()
+
+
+def _record_id(record):
+    return record["entry"]["id"] if record["op"] == "put" else record["id"]
+
+
+def _inode(path):
+    try:
+        return os.stat(path).st_ino
+    except OSError:
+        return None
+
+
+def _signature(path):
+    """(inode, size, mtime) of a file, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def _give_ids(raw_items, start):
+    """Give records from before entries had ids one; True if any lacked it.
+
+    The id comes from the record's position and contents, so every read
+    of the same file gives the same ids until they are saved.
+    """
+    missing = False
+    for position, item in enumerate(raw_items, start):
+        if isinstance(item, dict) and "id" not in item:
+            key = "%d:%s" % (position, json.dumps(item, sort_keys=True))
+            item["id"] = uuid.uuid5(uuid.NAMESPACE_OID, key).hex
+            missing = True
+    return missing
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+# ------------------------------------------------------------
+# CHANGES MADE BY OTHER PROCESSES
+# ------------------------------------------------------------
+class ChangeSet:
+    """What other processes changed on disk, as found by poll_changes().
+
+    put:             {id: EntryModel}, active or archived versions
+    deleted:         ids of entries deleted while active
+    archive_deleted: ids that left the archive (deleted or restored)
+    complete:        put holds every active entry; active entries missing
+                     from it are gone, except those whose ids are in keep
+    """
+
+    __slots__ = ("put", "deleted", "archive_deleted", "complete", "keep")
+
+    def __init__(self, complete=False):
+        self.put = {}
+        self.deleted = set()
+        self.archive_deleted = set()
+        self.complete = complete
+        self.keep = set()
+
+    def __bool__(self):
+        return bool(self.put or self.deleted or self.archive_deleted or self.complete)
+
+    def add_records(self, changes, archive=False):
+        """Add journal changes, {id: EntryModel or None}.
+
+        Archive records never replace a hot version found in the same poll.
+        """
+        gone = self.archive_deleted if archive else self.deleted
+        for entry_id, entry in changes.items():
+            if entry is None:
+                gone.add(entry_id)
+                if not archive:
+                    self.put.pop(entry_id, None)
+            elif archive:
+                self.put.setdefault(entry_id, entry)
+            else:
+                self.put[entry_id] = entry
+                self.deleted.discard(entry_id)
+
+    def discard(self, entry_ids):
+        for entry_id in entry_ids:
+            self.put.pop(entry_id, None)
+            self.deleted.discard(entry_id)
+            self.archive_deleted.discard(entry_id)
+
+
+class JournalTail:
+    """How far this process has read a file of journal records.
+
+    `inode` and `offset` mark the end of what was read. Records this
+    process appends past that point are noted in `own` (file inode, byte
+    range, entry ids), so read() hands out only what other processes wrote
+    and knows where one of our own later records supersedes theirs.
+    Callers hold the storage's file lock.
+    """
+
+    def __init__(self):
+        self.inode = None
+        self.offset = 0
+        self.own = []
+        self.last_mine = set()  # ids whose last record in the latest read() was ours
+
+    def restart(self, inode=None, offset=0):
+        self.inode, self.offset, self.own = inode, offset, []
+
+    def switch(self, inode):
+        """Follow on to a new file from its start."""
+        self.own = [own for own in self.own if own[0] != self.inode]
+        self.inode, self.offset = inode, 0
+
+    def wrote(self, f, start, ids):
+        """Note an append of ours to `f`, an open file, that began at `start`."""
+        inode = os.fstat(f.fileno()).st_ino
+        if self.inode is None and start == 0:
+            self.inode = inode  # we created the file
+        if inode == self.inode and start == self.offset:
+            self.offset = f.tell()  # nothing foreign in between
+        else:
+            self.own.append((inode, start, f.tell(), ids))
+
+    def read(self, path, changes):
+        """Apply the records others wrote past `offset` to `changes`.
+
+        Returns how many there were, or None if `path` is not the file
+        being followed (it was rotated away or replaced).
+        """
+        try:
+            f = open(path, "rb")
+        except OSError:
+            return None
+        with f:
+            inode = os.fstat(f.fileno()).st_ino
+            if inode != self.inode:
+                return None
+            base = self.offset
+            f.seek(base)
+            data = f.read()
+
+        own = sorted(o[1:] for o in self.own if o[0] == inode)
+        end = base + len(data)
+        count, pos = 0, base
+        mine = set()
+        for start, stop, ids in own + [(end, end, ())]:
+            if start > pos:
+                count += apply_records(data[pos - base:start - base].splitlines(), changes)
+            for entry_id in ids:
+                changes.pop(entry_id, None)  # our later write wins
+            mine.update(ids)
+            pos = max(pos, stop)
+        self.last_mine = mine.difference(changes)
+
+        # Under the lock a line without its newline is torn, not in progress
+        self.offset = end
+        self.own = [o for o in self.own if o[0] != inode]
+        return count
+
+
+def get_data_dir():
+    """Directory holding entries.json; $CALMMIND_DATA_DIR overrides the default."""
+    override = os.environ.get("CALMMIND_DATA_DIR")
+    if override:
+        return override
+    return os.path.join(get_app_data_dir("CalmMind"), "data")
+
+
 class Storage:
-    def __init__(self, filename="entries.json"):
-        base_dir = get_app_data_dir("CalmMind")
-        data_dir = os.path.join(base_dir, "data")
+    """Entries as one JSON array in `entries.json`.
+
+    Every write takes `entries.lock`, an advisory lock shared with other
+    CalmMind processes (the CLI, a second window) using the same data
+    directory, and poll_changes() reports what they wrote. This engine can
+    only tell that the file changed, so it re-reads it whole. If it changed
+    save_batch() re-reads it under the lock and applies the batch to what
+    is on disk, so a change made elsewhere is kept, not overwritten by the
+    list in memory; the next poll reports it.
+    """
+
+    # Snapshot format written by save_entries; load detects either one
+    binary = False
+    # Whether save_batch() appends records rather than rewriting the file
+    appends = False
+    # ChangeLog that save_batch() reports to, set by open_storage()
+    change_log = None
+
+    def __init__(self, filename="entries.json", data_dir=None):
+        if data_dir is None:
+            data_dir = get_data_dir()
         os.makedirs(data_dir, exist_ok=True)
 
+        self.data_dir = data_dir
         self.filepath = os.path.join(data_dir, filename)
+        # entries.json and entries.bin share one lock
+        self.file_lock = FileLock(os.path.splitext(self.filepath)[0] + ".lock")
+        self._snapshot_seen = None  # _signature() of the snapshot last read or written
+        self._stale = False  # merged a change of others' at a save: reload on next poll
 
         if not os.path.exists(self.filepath):
             with open(self.filepath, "w") as f:
@@ -28,21 +329,41 @@ class Storage:
     # ------------------------------------------------------------
     # LOAD
     # ------------------------------------------------------------
+    @instrument.timed("storage.load_entries")
     def load_entries(self):
         """Load list of EntryModel objects from JSON file safely."""
+        return self._read_snapshot()[0]
+
+    def _read_snapshot(self):
+        """(entries, missing_ids) from the snapshot, JSON or binary.
+
+        missing_ids is True for JSON written before entries had ids.
+        """
+        self._snapshot_seen = _signature(self.filepath)
+        if binary_format.is_binary(self.filepath):
+            return self._read_binary(), False
+
+        raw_list = self._read_raw()
+        missing_ids = _give_ids(raw_list, 0)
+        return self._entries_from_dicts(raw_list), missing_ids
 
+    def _read_binary(self):
+        entries = []
         try:
-            with open(self.filepath, "r") as f:
-                raw_list = json.load(f)
+            with open(self.filepath, "rb") as f:
+                for block in binary_format.iter_blocks(f):
+                    entries.extend(block)
+        except Exception as e:
+            # Keep the file and whatever was read before the damage
+            print("ERROR reading entries:", e)
+        return entries
 
-            entries = []
-            for item in raw_list:
-                try:
-                    entries.append(EntryModel.from_dict(item))
-                except Exception as e:
-                    print("Skipping invalid entry:", e)
+    def _read_raw(self):
+        """Read the raw list of entry dicts from the JSON file."""
 
-            return entries
+        try:
+            with open(self.filepath, "r") as f:
+                return json.load(f)
 
         except json.JSONDecodeError:
             print("WARNING: entries.json corrupted. Resetting file.")
@@ -53,28 +374,199 @@ class Storage:
             print("ERROR reading entries:", e)
             return []
 
+    def iter_entry_batches(self, batch_size=500):
+        """Yield lists of EntryModel while the file is still being read."""
+        for batch, _ in self._iter_snapshot_batches(batch_size):
+            yield batch
+
+    def _iter_snapshot_batches(self, batch_size):
+        """Yield (entries, missing_ids) batches from the snapshot, JSON or binary."""
+        self._snapshot_seen = _signature(self.filepath)
+        if binary_format.is_binary(self.filepath):
+            try:
+                with open(self.filepath, "rb") as f:
+                    for block in binary_format.iter_blocks(f):
+                        yield from ((batch, False) for batch in batched(block, batch_size))
+            except Exception as e:
+                print("ERROR reading entries:", e)
+            return
+
+        position = 0
+        for raw_batch in self._iter_raw_batches(batch_size):
+            missing_ids = _give_ids(raw_batch, position)
+            position += len(raw_batch)
+            yield self._entries_from_dicts(raw_batch), missing_ids
+
+    def _iter_raw_batches(self, batch_size):
+        try:
+            with open(self.filepath, "r") as f:
+                yield from batched(iter_json_array(f), batch_size)
+
+        except ValueError as e:
+            # Unlike load_entries, keep the file: part of it may be fine
+            print("WARNING: entries.json corrupted, stopped reading:", e)
+
+        except Exception as e:
+            print("ERROR reading entries:", e)
+
+    def _entries_from_dicts(self, raw_list):
+        try:
+            return EntryModel.from_dicts(raw_list)
+        except Exception:
+            pass  # some records are unusable; sort them out one by one
+
+        entries = []
+        for item in raw_list:
+            try:
+                entries.append(EntryModel.from_dict(item))
+            except Exception as e:
+                print("Skipping invalid entry:", e)
+
+        return entries
+
     # ------------------------------------------------------------
     # SAVE (ATOMIC)
     # ------------------------------------------------------------
+    @instrument.timed("storage.save_entries")
     def save_entries(self, entries):
-        """Safely save entries using an atomic write (prevents corruption)."""
+        """Safely save entries using an atomic write (prevents corruption).
 
-        data = [entry.to_dict() for entry in entries]
+        Returns True if the file was replaced.
+        """
+        temp_path = self._write_temp(entries)
+        if temp_path is None:
+            return False
+        with self.file_lock:
+            return self._install(temp_path)
 
-        # Atomic write → write to temp file, then replace original
-        temp_fd, temp_path = tempfile.mkstemp()
+    def _write_temp(self, entries):
+        """Write a snapshot to a temp file next to the original; returns its path."""
+        # Atomic write → write to temp file next to the original, then replace
+        temp_fd, temp_path = tempfile.mkstemp(dir=self.data_dir)
         try:
-            with os.fdopen(temp_fd, "w") as tmp:
-                json.dump(data, tmp, indent=4)
+            if self.binary:
+                with os.fdopen(temp_fd, "wb") as tmp:
+                    written = binary_format.write_entries(tmp, list(entries))
+            else:
+                data = EntryModel.to_dicts(entries)
+                with os.fdopen(temp_fd, "w") as tmp:
+                    json.dump(data, tmp, indent=4)
+                    written = tmp.tell()
 
-            os.replace(temp_path, self.filepath)
+            instrument.count("storage.bytes_written", written)
+            return temp_path
 
         except Exception as e:
             print("ERROR saving entries:", e)
+            _remove_quietly(temp_path)
+            return None
+
+    def _install(self, temp_path):
+        """Move a snapshot from _write_temp() into place; caller holds the file lock."""
+        try:
+            os.replace(temp_path, self.filepath)
+        except OSError as e:
+            print("ERROR saving entries:", e)
+            _remove_quietly(temp_path)
+            return False
+        self._snapshot_seen = _signature(self.filepath)
+        return True
+
+    # ------------------------------------------------------------
+    # SINGLE-ENTRY MUTATIONS
+    # ------------------------------------------------------------
+    # The plain JSON store has no cheaper way to persist one change, so it
+    # rewrites the whole file. `entries`, the live list, is not used: it may
+    # lack what other processes wrote since it was last merged with a poll.
+    def save_entry(self, entry, entries):
+        self.save_batch([entry], [], entries)
+
+    def delete_entry(self, entry, entries):
+        self.save_batch([], [entry], entries)
+
+    @instrument.timed("storage.save_batch")
+    def save_batch(self, saved, deleted, entries):
+        """Persist several changed and deleted entries in one write."""
+        if not (saved or deleted):
+            return
+        with self.file_lock:
+            temp_path = self._write_temp(self._merged_from_disk(saved, deleted))
+            if temp_path is not None:
+                self._install(temp_path)
+
+    def _merged_from_disk(self, saved, deleted):
+        """The entries on disk with a batch applied; caller holds the file lock."""
+        if self._maybe_changed():
+            self._stale = True  # what others wrote goes out with the next poll
+        by_id = {entry.id: entry for entry in self._read_snapshot()[0]}
+        for entry in deleted:
+            by_id.pop(entry.id, None)
+        for entry in saved:
+            by_id[entry.id] = entry
+        return list(by_id.values())
+
+    def flush(self):
+        """Block until every write issued so far is on disk."""
+
+    # ------------------------------------------------------------
+    # CHANGES FROM OTHER PROCESSES
+    # ------------------------------------------------------------
+    def poll_changes(self):
+        """What other processes wrote since the last load or poll.
+
+        Returns a ChangeSet, or None if nothing changed. Cheap when nothing
+        did: a stat or two. If another process is writing right now, also
+        None; the next poll picks the change up.
+        """
+        if not self._maybe_changed():
+            return None
+        if not self.file_lock.acquire(blocking=False):
+            return None
+        try:
+            changes = self._poll_locked()
+        finally:
+            self.file_lock.release()
+        return changes or None
+
+    def _maybe_changed(self):
+        return self._stale or _signature(self.filepath) != self._snapshot_seen
+
+    def _poll_locked(self):
+        if not self._maybe_changed():
+            return ChangeSet()
+        return self._reload()
+
+    def _own_latest(self):
+        """Ids whose latest record in the last poll was this process's own."""
+        return ()
+
+    def _reload(self):
+        """Every active entry on disk, as a complete ChangeSet."""
+        self._stale = False
+        changes = ChangeSet(complete=True)
+        changes.add_records({entry.id: entry for entry in self._load_all()[0]})
+        return changes
+
+    def _load_all(self):
+        """(entries, missing_ids) as currently on disk."""
+        return self._read_snapshot()
+
+    # ------------------------------------------------------------
+    # FINGERPRINT (FOR DERIVED FILES SUCH AS THE SEARCH INDEX)
+    # ------------------------------------------------------------
+    def data_files(self):
+        return [self.filepath]
+
+    def fingerprint(self):
+        """Name, size and mtime of every data file; changes on any write."""
+        result = []
+        for path in self.data_files():
             try:
-                os.remove(temp_path)
-            except:
-                pass
+                st = os.stat(path)
+            except OSError:
+                continue
+            result.append([os.path.basename(path), st.st_size, st.st_mtime_ns])
+        return result
 
     # ------------------------------------------------------------
     # RESET FILE (USED IF CORRUPTED)
@@ -82,3 +574,1188 @@ class Storage:
     def _reset_file(self):
         with open(self.filepath, "w") as f:
             json.dump([], f)
+
+
+class JournalStorage(Storage):
+    """Snapshot + append-only journal.
+
+    `entries.json` stays the snapshot (same format as Storage). Single-entry
+    mutations are appended to `entries.journal` as one JSON record per line:
+
+        {"op": "put", "entry": {...}}
+        {"op": "delete", "id": "..."}
+
+    Once the journal grows past `compact_threshold` bytes it is rotated to
+    `entries.journal.old` and a fresh snapshot is written in the background.
+    Replaying a record twice is harmless, so a crash at any point during
+    compaction loses nothing; the next open folds a journal left rotated.
+
+    Other processes append to the same journal under the file lock.
+    poll_changes() reads only what was appended since the last poll,
+    following the journal to `.old` when another process rotates it. Once
+    another process has written here, compaction rebuilds the snapshot
+    from disk rather than from the in-memory list.
+    """
+
+    appends = True
+
+    def __init__(self, filename="entries.json", data_dir=None, compact_threshold=1024 * 1024):
+        super().__init__(filename, data_dir)
+
+        self.journal_path = self._journal_path()
+        self.old_journal_path = self.journal_path + ".old"
+        self.compact_threshold = compact_threshold
+
+        self._lock = threading.Lock()
+        self._compactor = None
+        self._failed_rotation = None  # inode of a rotated journal we failed to fold
+
+        # For poll_changes(); all guarded by the file lock
+        self.tail = JournalTail()
+        self._unpolled = {}        # records of others read early, at a rotation
+        self._stale = False        # lost track of the journal: reload on next poll
+        self._shared = False       # another process has written here
+        self._followed_rotation = False  # another process is compacting
+
+        self._finish_compaction()
+
+    def _journal_path(self):
+        return os.path.splitext(self.filepath)[0] + ".journal"
+
+    # ------------------------------------------------------------
+    # LOAD (SNAPSHOT + REPLAY)
+    # ------------------------------------------------------------
+    @instrument.timed("storage.load_entries")
+    def load_entries(self):
+        entries, missing_ids = self._load_all()
+
+        # Snapshots written before entries had ids get them persisted now,
+        # otherwise journal records could not refer back to them.
+        if missing_ids:
+            self.save_entries(entries)
+
+        return entries
+
+    def _load_all(self):
+        snapshot, missing_ids = self._read_snapshot()
+
+        by_id = {}
+        for entry in snapshot:
+            by_id[entry.id] = entry
+
+        for entry_id, entry in self._read_changes().items():
+            if entry is None:
+                by_id.pop(entry_id, None)
+            else:
+                by_id[entry_id] = entry
+
+        return list(by_id.values()), missing_ids
+
+    def iter_entry_batches(self, batch_size=500):
+        """Stream the snapshot with the journal applied on the fly.
+
+        The journal is bounded by compact_threshold, so it is read up front;
+        entries that exist only in the journal come last.
+        """
+        changes = self._read_changes()
+        migrate = False
+
+        for snapshot_batch, missing_ids in self._iter_snapshot_batches(batch_size):
+            migrate = migrate or missing_ids
+            batch = []
+            for entry in snapshot_batch:
+                if entry.id in changes:
+                    entry = changes.pop(entry.id)
+                    if entry is None:
+                        continue
+                batch.append(entry)
+            yield batch
+
+        yield from batched(
+            (entry for entry in changes.values() if entry is not None), batch_size
+        )
+
+        if migrate:
+            # Snapshots written before entries had ids get them persisted
+            # now (the same ids as yielded), so journal records can refer
+            # back to them
+            self.save_entries(self._load_all()[0])
+
+    def _read_changes(self):
+        """Journal contents as {id: latest EntryModel, or None if deleted}.
+
+        poll_changes() goes on from where this stopped.
+        """
+        changes = {}
+        with self.file_lock:
+            replay_journal(self.old_journal_path, changes)
+            self.tail.restart(_inode(self.journal_path))
+            self.tail.read(self.journal_path, changes)
+        return changes
+
+    # ------------------------------------------------------------
+    # SAVE
+    # ------------------------------------------------------------
+    def save_entries(self, entries):
+        """Write a full snapshot and drop the journal it supersedes."""
+        self._wait_for_compaction()
+
+        with self._lock, self.file_lock:
+            ok = super().save_entries(entries)
+            if ok:
+                for path in (self.journal_path, self.old_journal_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+                # Whatever others wrote before is superseded by this save
+                self.tail.restart()
+                self._unpolled = {}
+                self._stale = self._followed_rotation = False
+            return ok
+
+    def save_entry(self, entry, entries):
+        self._append([{"op": "put", "entry": entry.to_dict()}], entries)
+
+    def delete_entry(self, entry, entries):
+        self._append([{"op": "delete", "id": entry.id}], entries)
+
+    @instrument.timed("storage.save_batch")
+    def save_batch(self, saved, deleted, entries):
+        records = [{"op": "put", "entry": entry.to_dict()} for entry in saved]
+        records += [{"op": "delete", "id": entry.id} for entry in deleted]
+        if records:
+            self._append(records, entries)
+
+    def flush(self):
+        self._wait_for_compaction()
+
+    def data_files(self):
+        return [self.filepath, self.journal_path, self.old_journal_path]
+
+    def _append(self, records, entries):
+        """Append records to the journal; raises OSError if that fails.
+
+        A torn last line from a failed write is skipped on replay.
+        """
+        data = _encode_records(records)
+
+        with self._lock, self.file_lock:
+            with open(self.journal_path, "ab") as f:
+                start = f.tell()
+                f.write(data)
+                f.flush()
+                self.tail.wrote(f, start, [_record_id(r) for r in records])
+                size = f.tell()
+
+            instrument.count("storage.bytes_written", len(data))
+
+            if size > self.compact_threshold:
+                self._start_compaction(entries)
+
+    # ------------------------------------------------------------
+    # COMPACTION
+    # ------------------------------------------------------------
+    def _start_compaction(self, entries):
+        # Caller holds self._lock and the file lock
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        rotated = _inode(self.old_journal_path)
+        if rotated is not None:
+            if rotated != self._failed_rotation:
+                return  # a compaction (maybe another process's) is still running
+            # Ours could not write its snapshot: try again, reading the
+            # rotated journal back as it is no longer all in memory
+            self._failed_rotation = None
+            self._compactor = threading.Thread(
+                target=self._compact, args=(None, rotated), daemon=True
+            )
+            self._compactor.start()
+            return
+
+        # Records of others not yet polled go out with the next poll; the
+        # tail then starts over on the new journal
+        count = self.tail.read(self.journal_path, self._unpolled)
+        if count is None:
+            self._stale = True
+        self._shared = self._shared or bool(count) or self._stale
+
+        os.replace(self.journal_path, self.old_journal_path)
+        rotated = _inode(self.old_journal_path)
+        self.tail.restart()
+
+        # Only this process has written here: the live list is exactly the
+        # snapshot plus the rotated journal, no need to read them back.
+        # Callers without the list (entries=None: the CLI, sync) read them.
+        snapshot = None if self._shared or entries is None else list(entries)
+        self._compactor = threading.Thread(
+            target=self._compact, args=(snapshot, rotated), daemon=True
+        )
+        self._compactor.start()
+
+    def _compact(self, snapshot, rotated):
+        # Records appended after the rotation land in the new journal and are
+        # replayed on top of this snapshot, so the lock is only needed to
+        # put it in place.
+        if snapshot is None:
+            changes = {}
+            replay_journal(self.old_journal_path, changes)
+            by_id = {entry.id: entry for entry in self._read_snapshot()[0]}
+            for entry_id, entry in changes.items():
+                if entry is None:
+                    by_id.pop(entry_id, None)
+                else:
+                    by_id[entry_id] = entry
+            snapshot = list(by_id.values())
+
+        temp_path = self._write_temp(snapshot)
+
+        with self.file_lock:
+            if _inode(self.old_journal_path) != rotated:
+                # A full save (here or elsewhere) superseded this snapshot
+                if temp_path is not None:
+                    _remove_quietly(temp_path)
+                return
+            if temp_path is not None and self._install(temp_path):
+                _remove_quietly(self.old_journal_path)
+            else:
+                # Its records are still replayed from .old; the next append
+                # past the threshold retries
+                self._failed_rotation = rotated
+
+    def _finish_compaction(self):
+        """Fold a rotated journal left by a compaction that never finished.
+
+        Run on open. A compaction another process still has running finds
+        .old gone and drops its own snapshot.
+        """
+        with self.file_lock:
+            rotated = _inode(self.old_journal_path)
+            if rotated is not None:
+                self._compact(None, rotated)
+
+    def _wait_for_compaction(self):
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+
+    # ------------------------------------------------------------
+    # CHANGES FROM OTHER PROCESSES
+    # ------------------------------------------------------------
+    def _maybe_changed(self):
+        try:
+            st = os.stat(self.journal_path)
+            journal = (st.st_ino, st.st_size)
+        except OSError:
+            journal = (None, 0)
+        return (
+            journal != (self.tail.inode, self.tail.offset)
+            or bool(self._unpolled)
+            or self._stale
+            or _signature(self.filepath) != self._snapshot_seen
+        )
+
+    def _poll_locked(self):
+        self.tail.last_mine = set()
+        if self._stale:
+            return self._reload()
+
+        tail = self.tail
+        records, self._unpolled = self._unpolled, {}
+        old = _inode(self.old_journal_path)
+
+        if tail.inode is not None and tail.inode != _inode(self.journal_path):
+            if tail.inode != old:
+                return self._reload()  # replaced by a full save elsewhere
+            # Another process rotated the journal to compact it: finish
+            # reading it under its new name, then go on with the new one
+            self._note_foreign(tail.read(self.old_journal_path, records))
+            tail.switch(None)
+            self._followed_rotation = True
+
+        if tail.inode is None:
+            tail.inode = _inode(self.journal_path)
+        if tail.inode is not None:
+            self._note_foreign(tail.read(self.journal_path, records))
+
+        snapshot = _signature(self.filepath)
+        if snapshot != self._snapshot_seen:
+            if not self._followed_rotation:
+                return self._reload()
+            # The compaction we followed installed its snapshot: it holds
+            # nothing the journal did not
+            self._snapshot_seen = snapshot
+        if old is None:
+            self._followed_rotation = False
+
+        changes = ChangeSet()
+        changes.add_records(records)
+        return changes
+
+    def _own_latest(self):
+        return self.tail.last_mine
+
+    def _note_foreign(self, count):
+        if count:
+            self._shared = True
+
+    def _reload(self):
+        self._stale = self._followed_rotation = False
+        self._shared = True
+        self._unpolled = {}
+        return super()._reload()
+
+
+class BinaryStorage(JournalStorage):
+    """JournalStorage with the snapshot in the compact binary format.
+
+    The snapshot is `entries.bin` (see binary_format), with its own
+    `entries.bin.journal`. On first use existing JSON data (plus journal)
+    is converted once; entries.json itself is left alone.
+    """
+
+    binary = True
+
+    def __init__(self, filename="entries.json", data_dir=None, compact_threshold=1024 * 1024):
+        json_filename = filename
+        filename = os.path.splitext(filename)[0] + ".bin"
+        fresh = not os.path.exists(os.path.join(data_dir or get_data_dir(), filename))
+
+        super().__init__(filename, data_dir, compact_threshold)
+
+        if fresh:
+            entries = []
+            if os.path.exists(os.path.join(self.data_dir, json_filename)):
+                # Only the hot tier: the archive segment is shared
+                entries = JournalStorage(json_filename, data_dir=self.data_dir).load_entries()
+            self.save_entries(entries)
+
+    def _journal_path(self):
+        return self.filepath + ".journal"
+
+
+class TieredStorage:
+    """Hot/cold split around a file engine.
+
+    Active entries live in the wrapped engine, the hot tier, so startup,
+    saves and compaction only ever see them. Archived entries move to an
+    append-only cold segment, `entries.archive.jsonl`, in the journal's
+    record format. It is read only by load_archive(), and written only when
+    entries are archived, restored or deleted from the archive.
+
+    An entry moving between tiers is written to its destination first, so
+    after a crash in between it may exist in both; the hot copy wins.
+
+    The segment is written under the hot engine's file lock, and
+    poll_changes() tails it the same way as the journal.
+    """
+
+    # Rewrite the segment on load once this share of its records is dead
+    COMPACT_RATIO = 2
+
+    def __init__(self, storage):
+        self.hot = storage
+        self.archive_path = os.path.splitext(storage.filepath)[0] + ".archive.jsonl"
+        self.archive_index = ArchiveIndex(self.archive_path)
+        self.cold_ids = set()  # ids known to be in the cold segment
+        self.archive_tail = JournalTail()
+        self.change_log = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        # filepath, data_dir, flush, ... come from the hot engine
+        return getattr(self.hot, name)
+
+    # ------------------------------------------------------------
+    # LOAD
+    # ------------------------------------------------------------
+    def iter_entry_batches(self, batch_size=500):
+        """Yield the active entries only.
+
+        Archived entries still found in the hot tier (data from before
+        tiering) are moved to the cold segment once the read completes.
+        """
+        self._start_archive_tail()
+        active, stray = [], []
+        for batch in self.hot.iter_entry_batches(batch_size):
+            hot_batch = [e for e in batch if not e.archived]
+            stray.extend(e for e in batch if e.archived)
+            active.extend(hot_batch)
+            if hot_batch:
+                yield hot_batch
+
+        if stray:
+            self._move_to_archive(stray, active)
+
+    def load_entries(self):
+        """Every entry from both tiers."""
+        self._start_archive_tail()
+        entries = self.hot.load_entries()
+        hot_ids = {e.id for e in entries}
+        entries.extend(e for e in self.load_archive() if e.id not in hot_ids)
+        return entries
+
+    @instrument.timed("storage.load_archive")
+    def load_archive(self):
+        """The archived entries, read from the cold segment."""
+        changes = {}
+        with self._lock, self.hot.file_lock:
+            records = replay_journal(self.archive_path, changes)
+            entries = [entry for entry in changes.values() if entry is not None]
+            # In place: the write-behind worker may be updating it
+            self.cold_ids.update(entry.id for entry in entries)
+
+            if records > self.COMPACT_RATIO * len(entries) + 100:
+                self._rewrite_archive(entries)
+
+        return entries
+
+    @instrument.timed("storage.archive_page")
+    def archive_page(self, before, count):
+        """Up to `count` archived entries newest first, continuing from the
+        key `before` (None: from the newest).
+
+        Returns (entries, key of the next page or None after the last). A
+        key is an (inode, offset) pair; once the segment is rewritten the
+        old keys lead nowhere and paging has to start over.
+        """
+        with self._lock, self.hot.file_lock:
+            index = self.archive_index
+            if not index.refresh():
+                return [], None
+            if before is not None and before[0] != index.inode:
+                return [], None
+            entries, offset = index.read_page(None if before is None else before[1], count)
+            self.cold_ids.update(entry.id for entry in entries)
+        return entries, None if offset is None else (index.inode, offset)
+
+    def archived_entries(self, entry_ids):
+        """The archived entries among `entry_ids`, read through the index."""
+        with self._lock, self.hot.file_lock:
+            index = self.archive_index
+            if not index.refresh():
+                return []
+            entries = index.read_entries(entry_ids)
+            self.cold_ids.update(entry.id for entry in entries)
+        return entries
+
+    # ------------------------------------------------------------
+    # SAVE
+    # ------------------------------------------------------------
+    def save_entries(self, entries):
+        """Replace both tiers with `entries` (which must be complete)."""
+        active = [e for e in entries if not e.archived]
+        archived = [e for e in entries if e.archived]
+        with self._lock, self.hot.file_lock:
+            self._rewrite_archive(archived)
+            self.cold_ids.clear()
+            self.cold_ids.update(e.id for e in archived)
+        return self.hot.save_entries(active)
+
+    def save_entry(self, entry, entries):
+        self.save_batch([entry], [], entries)
+
+    def delete_entry(self, entry, entries):
+        self.save_batch([], [entry], entries)
+
+    @instrument.timed("storage.save_batch")
+    def save_batch(self, saved, deleted, entries):
+        cold = self.cold_ids
+        cold_put = [e for e in saved if e.archived]
+        hot_put = [e for e in saved if not e.archived]
+        # Even for ids in the cold segment: another process may have put a
+        # hot copy since, which would win over the archived one
+        hot_delete = [e for e in saved if e.archived]
+        hot_delete += deleted
+
+        # Destination first: archiving writes cold before hot, restoring
+        # writes hot before cold. One lock hold, so other processes see
+        # an entry move between tiers in a single poll.
+        with self.hot.file_lock:
+            # cold_ids can be behind: callers without the live list (the
+            # CLI, sync) may never have read the archive, and another
+            # process may have archived an entry since our last poll.
+            # Look the rest up in the index (a hash match only costs a
+            # needless delete record).
+            unknown = [e.id for e in hot_put + deleted if e.id not in cold]
+            if unknown:
+                cold.update(self._in_archive(unknown))
+            cold_delete = [e for e in hot_put if e.id in cold]
+            cold_delete += [e for e in deleted if e.id in cold]
+
+            if cold_put:
+                self._append_archive([{"op": "put", "entry": e.to_dict()} for e in cold_put])
+                cold.update(e.id for e in cold_put)
+
+            if hot_put or hot_delete:
+                active = None if entries is None else [e for e in entries if not e.archived]
+                self.hot.save_batch(hot_put, hot_delete, active)
+
+            if cold_delete:
+                self._append_archive([{"op": "delete", "id": e.id} for e in cold_delete])
+                cold.difference_update(e.id for e in cold_delete)
+
+            if self.change_log is not None:
+                self.change_log.record(saved, deleted)
+
+    def data_files(self):
+        # Not the .idx file: it changes on reads
+        return self.hot.data_files() + [self.archive_path]
+
+    fingerprint = Storage.fingerprint
+
+    # ------------------------------------------------------------
+    # CHANGES FROM OTHER PROCESSES
+    # ------------------------------------------------------------
+    def poll_changes(self):
+        """Changes to both tiers since the last load or poll; see Storage."""
+        hot = self.hot
+        if not hot._maybe_changed() and self._archive_end() == (
+            self.archive_tail.inode, self.archive_tail.offset
+        ):
+            return None
+        if not hot.file_lock.acquire(blocking=False):
+            return None
+        try:
+            changes = hot._poll_locked()
+            self._poll_archive(changes, hot._own_latest())
+        finally:
+            hot.file_lock.release()
+        return changes or None
+
+    def _archive_end(self):
+        try:
+            st = os.stat(self.archive_path)
+            return st.st_ino, st.st_size
+        except OSError:
+            return None, 0
+
+    def _start_archive_tail(self):
+        with self.hot.file_lock:
+            self.archive_tail.restart(*self._archive_end())
+
+    def _poll_archive(self, changes, hot_mine=()):
+        # Caller holds the file lock. hot_mine: ids whose latest hot record
+        # is this process's own, so the hot copy wins over any archive record.
+        tail = self.archive_tail
+        inode = _inode(self.archive_path)
+        records = {}
+
+        if inode != tail.inode and tail.inode is not None:
+            # Rewritten elsewhere (compacted or replaced by a full save):
+            # read it whole, and whatever is no longer there left it
+            tail.restart(inode)
+            tail.read(self.archive_path, records)
+            for entry_id in self.cold_ids.difference(records):
+                records[entry_id] = None
+        else:
+            tail.inode = inode
+            tail.read(self.archive_path, records)
+
+        for entry_id, entry in records.items():
+            if entry is None:
+                self.cold_ids.discard(entry_id)
+            else:
+                self.cold_ids.add(entry_id)
+        for entry_id in hot_mine:
+            records.pop(entry_id, None)
+        changes.add_records(records, archive=True)
+
+    # ------------------------------------------------------------
+    # COLD SEGMENT
+    # ------------------------------------------------------------
+    def _move_to_archive(self, stray, active):
+        self._append_archive([{"op": "put", "entry": e.to_dict()} for e in stray])
+        self.cold_ids.update(e.id for e in stray)
+        self.hot.save_entries(active)
+
+    def _in_archive(self, entry_ids):
+        """Those of `entry_ids` the archive index lists (compared by hash)."""
+        # Caller holds the file lock
+        with self._lock:
+            index = self.archive_index
+            if not index.refresh():
+                return []
+            return [entry_id for entry_id in entry_ids if index.contains(entry_id)]
+
+    def _append_archive(self, records):
+        # Raises OSError like JournalStorage._append(), before the hot
+        # tier drops an entry the archive did not take
+        data = _encode_records(records)
+        with self._lock, self.hot.file_lock:
+            with open(self.archive_path, "ab") as f:
+                start = f.tell()
+                f.write(data)
+                f.flush()
+                self.archive_tail.wrote(f, start, [_record_id(r) for r in records])
+        instrument.count("storage.bytes_written", len(data))
+
+    def _rewrite_archive(self, entries):
+        # Caller holds self._lock and the file lock
+        temp_fd, temp_path = tempfile.mkstemp(dir=self.hot.data_dir)
+        try:
+            with os.fdopen(temp_fd, "w") as tmp:
+                for e in entries:
+                    tmp.write(json.dumps({"op": "put", "entry": e.to_dict()}, separators=(",", ":")) + "\n")
+                written = tmp.tell()
+            os.replace(temp_path, self.archive_path)
+            self.archive_index.invalidate()
+            # Records others appended before are either in `entries` (read
+            # under the same lock) or superseded by a full save
+            self.archive_tail.restart(*self._archive_end())
+            instrument.count("storage.bytes_written", written)
+        except Exception as e:
+            print("ERROR saving archive:", e)
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+
+class WriteBehindStorage:
+    """Write-behind wrapper around any storage engine.
+
+    Save calls only record what changed and return immediately. A single
+    worker thread waits `latency` seconds after the first change, then
+    writes everything that accumulated in one go: repeated saves of the same
+    entry collapse into one record, and a full save supersedes all pending
+    single-entry changes. A write that fails is queued again, under any
+    newer change to the same entries, and retried. Call flush() before
+    exiting.
+    """
+
+    def __init__(self, storage, latency=0.5):
+        self.storage = storage
+        self.latency = latency
+
+        self._cond = threading.Condition()
+        self._full = None      # list snapshot if a full save is pending
+        self._saved = {}       # entry id -> entry
+        self._deleted = {}     # entry id -> entry
+        self._entries = None   # live list passed with the latest change
+        self._writing = set()  # ids of the batch being written right now
+        # Held while writing and while polling, so a poll knows exactly
+        # which local changes are not on disk yet
+        self._write_lock = threading.Lock()
+        self._busy = False
+        self._flushing = False
+        self._held = False
+        self._failures = 0     # writes failed so far; flush() stops at one
+
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def __getattr__(self, name):
+        # filepath, data_dir, load_entries, ... come from the wrapped engine
+        return getattr(self.storage, name)
+
+    # ------------------------------------------------------------
+    # MARK DIRTY
+    # ------------------------------------------------------------
+    def save_entries(self, entries):
+        with self._cond:
+            self._full = list(entries)
+            self._saved.clear()
+            self._deleted.clear()
+            self._cond.notify_all()
+
+    def save_entry(self, entry, entries):
+        with self._cond:
+            self._deleted.pop(entry.id, None)
+            self._saved[entry.id] = entry
+            self._entries = entries
+            self._cond.notify_all()
+
+    def delete_entry(self, entry, entries):
+        with self._cond:
+            self._saved.pop(entry.id, None)
+            self._deleted[entry.id] = entry
+            self._entries = entries
+            self._cond.notify_all()
+
+    def save_batch(self, saved, deleted, entries):
+        with self._cond:
+            for entry in saved:
+                self._deleted.pop(entry.id, None)
+                self._saved[entry.id] = entry
+            for entry in deleted:
+                self._saved.pop(entry.id, None)
+                self._deleted[entry.id] = entry
+            self._entries = entries
+            self._cond.notify_all()
+
+    def hold(self):
+        """Keep changes queued (not written) until release() or flush()."""
+        with self._cond:
+            self._held = True
+
+    def release(self):
+        with self._cond:
+            self._held = False
+            self._cond.notify_all()
+
+    def flush(self):
+        with self._cond:
+            self._flushing = True
+            self._cond.notify_all()
+            failures = self._failures
+            # Stop at a failed write rather than retrying for ever; its
+            # changes stay queued
+            self._cond.wait_for(
+                lambda: (not self._dirty() and not self._busy) or self._failures != failures
+            )
+            self._flushing = False
+
+        self.storage.flush()
+
+    def poll_changes(self):
+        """The engine's poll_changes(), minus entries with writes still
+        queued or in progress here: the version in memory is newer."""
+        if not self._write_lock.acquire(blocking=False):
+            return None  # a write is under way; look again next time
+        try:
+            with self._cond:
+                if self._full is not None:
+                    return None  # the pending full save replaces all of it
+                pending = set(self._saved) | set(self._deleted) | self._writing
+            changes = self.storage.poll_changes()
+        finally:
+            self._write_lock.release()
+        if changes is None:
+            return None
+
+        changes.discard(pending)
+        changes.keep = pending
+        return changes or None
+
+    # ------------------------------------------------------------
+    # WORKER
+    # ------------------------------------------------------------
+    def _dirty(self):
+        return self._full is not None or self._saved or self._deleted
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._dirty() and (self._flushing or not self._held)
+                )
+                # Let the burst accumulate unless someone is waiting on flush()
+                self._cond.wait_for(lambda: self._flushing, timeout=self.latency)
+
+                full, self._full = self._full, None
+                saved, self._saved = list(self._saved.values()), {}
+                deleted, self._deleted = list(self._deleted.values()), {}
+                entries = self._entries
+                self._writing = {e.id for e in saved} | {e.id for e in deleted}
+                self._busy = True
+
+            with self._write_lock:
+                try:
+                    if full is not None:
+                        self.storage.save_entries(full)
+                        full = None
+                    if saved or deleted:
+                        self.storage.save_batch(saved, deleted, list(entries))
+                        saved = deleted = ()
+                except Exception as e:
+                    print("ERROR in background save:", e)
+                    self._requeue(full, saved, deleted, entries)
+                finally:
+                    with self._cond:
+                        self._busy = False
+                        self._writing = set()
+                        self._cond.notify_all()
+
+    def _requeue(self, full, saved, deleted, entries):
+        """Queue the unwritten part of a failed write again."""
+        with self._cond:
+            self._failures += 1
+            if self._full is not None:
+                return  # a newer full save supersedes all of it
+            if full is not None:
+                # Changes queued since are newer and go on top of it
+                self._full = full
+            newer = set(self._saved) | set(self._deleted)
+            for entry in saved:
+                if entry.id not in newer:
+                    self._saved[entry.id] = entry
+            for entry in deleted:
+                if entry.id not in newer:
+                    self._deleted[entry.id] = entry
+            if self._entries is None:
+                self._entries = entries
+
+
+class SQLiteStorage(Storage):
+    """Entries in a SQLite database (`entries.db`) with one row per entry.
+
+    Mutations update single rows, and query_view_ids() answers the
+    all / next / ideas / archive views from indexes instead of scanning.
+    On first use an existing entries.json (plus journal) is imported once.
+
+    Triggers log the id of every changed row to the `changes` table, which
+    poll_changes() reads from the last sequence number it saw, skipping
+    the ranges this connection wrote itself. SQLite does its own locking.
+    """
+
+    # Rows kept in `changes`; a process further behind reloads everything
+    CHANGES_KEPT = 10000
+
+    appends = True
+
+    COLUMNS = (
+        "id", "type", "title", "details", "time",
+        "done", "archived", "notified", "reminder_time",
+    )
+
+    def __init__(self, filename="entries.json", data_dir=None):
+        super().__init__(filename, data_dir)
+
+        self.db_path = os.path.splitext(self.filepath)[0] + ".db"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._create_schema()
+
+        if self._get_meta("imported_from") is None:
+            self.import_json(self.filepath)
+
+        # For poll_changes(); guarded by self._lock
+        with self._lock:
+            self._seen_seq = self._last_seq()
+        self._own_seqs = []  # (first, last) sequence ranges written here
+
+    def _create_schema(self):
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    pos INTEGER PRIMARY KEY,
+                    id TEXT NOT NULL UNIQUE,
+                    type TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    details TEXT NOT NULL,
+                    time TEXT,
+                    done INTEGER NOT NULL,
+                    archived INTEGER NOT NULL,
+                    notified INTEGER NOT NULL,
+                    reminder_time TEXT,
+                    extra TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_entries_archived ON entries (archived);
+                CREATE INDEX IF NOT EXISTS idx_entries_type ON entries (type, archived);
+                CREATE INDEX IF NOT EXISTS idx_entries_time ON entries (archived, time);
+                CREATE INDEX IF NOT EXISTS idx_entries_reminder ON entries (reminder_time);
+                CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+
+                CREATE TABLE IF NOT EXISTS changes (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    id TEXT NOT NULL
+                );
+                CREATE TRIGGER IF NOT EXISTS entries_inserted AFTER INSERT ON entries
+                    BEGIN INSERT INTO changes (id) VALUES (new.id); END;
+                CREATE TRIGGER IF NOT EXISTS entries_updated AFTER UPDATE ON entries
+                    BEGIN INSERT INTO changes (id) VALUES (new.id); END;
+                CREATE TRIGGER IF NOT EXISTS entries_deleted AFTER DELETE ON entries
+                    BEGIN INSERT INTO changes (id) VALUES (old.id); END;
+            """)
+
+    def _get_meta(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    # ------------------------------------------------------------
+    # ROW <-> ENTRY
+    # ------------------------------------------------------------
+    def _to_row(self, entry):
+        d = entry.to_dict()
+        row = [d.pop(column, None) for column in self.COLUMNS]
+        # Fields without a column of their own are kept as JSON
+        row.append(json.dumps(d) if d else None)
+        return row
+
+    def _from_row(self, row):
+        d = dict(zip(self.COLUMNS, row))
+        if row[-1]:
+            d.update(json.loads(row[-1]))
+        for flag in ("done", "archived", "notified"):
+            d[flag] = bool(d[flag])
+        return EntryModel.from_dict(d)
+
+    def _select(self, where="", params=()):
+        sql = "SELECT %s, extra FROM entries %s" % (", ".join(self.COLUMNS), where)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return rows
+
+    # ------------------------------------------------------------
+    # LOAD
+    # ------------------------------------------------------------
+    @instrument.timed("storage.load_entries")
+    def load_entries(self):
+        try:
+            rows = self._select("ORDER BY pos")
+        except sqlite3.Error as e:
+            print("ERROR reading entries:", e)
+            return []
+
+        entries = []
+        for row in rows:
+            try:
+                entries.append(self._from_row(row))
+            except Exception as e:
+                print("Skipping invalid entry:", e)
+        return entries
+
+    def iter_entry_batches(self, batch_size=500):
+        """Yield the active entries in batches; see load_archive()."""
+        sql = "SELECT %s, extra FROM entries WHERE archived = 0 ORDER BY pos" % ", ".join(self.COLUMNS)
+
+        # Own connection: the caller is usually a loader thread
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.execute(sql)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield [self._from_row(row) for row in rows]
+        except sqlite3.Error as e:
+            print("ERROR reading entries:", e)
+        finally:
+            conn.close()
+
+    @instrument.timed("storage.load_archive")
+    def load_archive(self):
+        """The archived entries; the table is its own hot/cold split."""
+        return self.query_view("archive")
+
+    @instrument.timed("storage.archive_page")
+    def archive_page(self, before, count):
+        """See TieredStorage.archive_page(); here a key is a row's `pos`."""
+        sql = "SELECT pos, %s, extra FROM entries WHERE archived = 1 %s ORDER BY pos DESC LIMIT ?" % (
+            ", ".join(self.COLUMNS), "" if before is None else "AND pos < ?"
+        )
+        params = (count,) if before is None else (before, count)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        entries = [self._from_row(row[1:]) for row in rows]
+        return entries, rows[-1][0] if len(rows) == count else None
+
+    def archived_entries(self, entry_ids):
+        """See TieredStorage.archived_entries()."""
+        entry_ids = list(entry_ids)
+        entries = []
+        for start in range(0, len(entry_ids), 500):
+            chunk = entry_ids[start:start + 500]
+            where = "WHERE archived = 1 AND id IN (%s)" % ", ".join("?" * len(chunk))
+            entries.extend(self._from_row(row) for row in self._select(where, chunk))
+        return entries
+
+    # ------------------------------------------------------------
+    # VIEW QUERIES
+    # ------------------------------------------------------------
+    VIEW_QUERIES = {
+        "all": ("WHERE archived = 0 ORDER BY pos", False),
+        # Recurring rows (rule in `extra`) are placed by their next occurrence
+        "next": ("WHERE archived = 0 AND (time >= ? OR extra LIKE '%\"recurrence\"%') ORDER BY time", True),
+        "ideas": ("WHERE type = 'idea' AND archived = 0 ORDER BY pos", False),
+        "archive": ("WHERE archived = 1 ORDER BY pos", False),
+    }
+
+    def query_view_ids(self, view_name, now=None):
+        """Ids of the entries shown in a view, in display order."""
+        if view_name == "next":
+            return [entry.id for entry in self.query_view("next", now)]
+
+        where, needs_now = self.VIEW_QUERIES.get(view_name, self.VIEW_QUERIES["all"])
+        params = ((now or datetime.datetime.now()).isoformat(),) if needs_now else ()
+
+        with self._lock:
+            rows = self._conn.execute("SELECT id FROM entries " + where, params).fetchall()
+        return [row[0] for row in rows]
+
+    def query_view(self, view_name, now=None):
+        """EntryModel objects for a view, in display order."""
+        now = now or datetime.datetime.now()
+        where, needs_now = self.VIEW_QUERIES.get(view_name, self.VIEW_QUERIES["all"])
+        params = (now.isoformat(),) if needs_now else ()
+        entries = [self._from_row(row) for row in self._select(where, params)]
+
+        if view_name == "next" and any(e.recurrence is not None for e in entries):
+            entries = [e for e in entries if entry_in_view(e, "next", now)]
+            entries.sort(key=lambda e: display_time(e, now))
+        return entries
+
+    # ------------------------------------------------------------
+    # SAVE
+    # ------------------------------------------------------------
+    _UPSERT = """
+        INSERT INTO entries (id, type, title, details, time, done, archived,
+                             notified, reminder_time, extra)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (id) DO UPDATE SET
+            type = excluded.type, title = excluded.title,
+            details = excluded.details, time = excluded.time,
+            done = excluded.done, archived = excluded.archived,
+            notified = excluded.notified, reminder_time = excluded.reminder_time,
+            extra = excluded.extra
+    """
+
+    @instrument.timed("storage.save_entries")
+    def save_entries(self, entries):
+        rows = [self._to_row(entry) for entry in entries]
+        try:
+            with self._lock, self._conn:
+                self._conn.execute("DELETE FROM entries")
+                self._conn.executemany(self._UPSERT, rows)
+                self._reset_changes()
+            return True
+        except sqlite3.Error as e:
+            print("ERROR saving entries:", e)
+            return False
+
+    def save_entry(self, entry, entries=None):
+        self.save_batch([entry], [], entries)
+
+    def delete_entry(self, entry, entries=None):
+        self.save_batch([], [entry], entries)
+
+    @instrument.timed("storage.save_batch")
+    def save_batch(self, saved, deleted, entries=None):
+        rows = [self._to_row(entry) for entry in saved]
+        try:
+            # The file lock keeps the rows and the change log in step
+            with self.file_lock, self._lock, self._conn:
+                # Taken inside the write transaction, so no other
+                # connection's change can fall into our range
+                self._conn.execute("BEGIN IMMEDIATE")
+                first = self._last_seq()
+                self._conn.executemany(self._UPSERT, rows)
+                self._conn.executemany(
+                    "DELETE FROM entries WHERE id = ?",
+                    [(entry.id,) for entry in deleted],
+                )
+                last = self._last_seq()
+
+                # A transaction's sequence numbers are consecutive
+                if first == self._seen_seq:
+                    self._seen_seq = last
+                else:
+                    self._own_seqs.append((first, last))
+                if first // 1000 != last // 1000:
+                    self._conn.execute(
+                        "DELETE FROM changes WHERE seq <= ?", (last - self.CHANGES_KEPT,)
+                    )
+
+                if self.change_log is not None:
+                    self.change_log.record(saved, deleted)
+        except sqlite3.Error as e:
+            print("ERROR saving entries:", e)
+
+    def data_files(self):
+        return [self.db_path, self.db_path + "-wal"]
+
+    # ------------------------------------------------------------
+    # CHANGES FROM OTHER PROCESSES
+    # ------------------------------------------------------------
+    def _last_seq(self):
+        # Caller holds self._lock
+        return self._conn.execute("SELECT MAX(seq) FROM changes").fetchone()[0] or 0
+
+    def _reset_changes(self):
+        """After rewriting every row: one marker row tells others to reload."""
+        # Caller holds self._lock, inside the transaction
+        self._conn.execute("DELETE FROM changes")
+        self._seen_seq = self._conn.execute("INSERT INTO changes (id) VALUES ('')").lastrowid
+        self._own_seqs = []
+
+    def poll_changes(self):
+        """Entries other connections changed since the last poll; see Storage."""
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            last = self._last_seq()
+            if last == self._seen_seq:
+                return None
+            rows = self._conn.execute(
+                "SELECT seq, id FROM changes WHERE seq > ? ORDER BY seq", (self._seen_seq,)
+            ).fetchall()
+            pruned = not rows or rows[0][0] != self._seen_seq + 1
+            own, self._own_seqs = self._own_seqs, []
+            self._seen_seq = last
+        except sqlite3.Error as e:
+            print("ERROR reading changes:", e)
+            return None
+        finally:
+            self._lock.release()
+
+        changed = set()
+        for seq, entry_id in rows:
+            if entry_id == "":
+                pruned = True  # every row was rewritten
+            elif any(first < seq <= last for first, last in own):
+                changed.discard(entry_id)  # our later write wins
+            else:
+                changed.add(entry_id)
+
+        if pruned:
+            changes = ChangeSet(complete=True)
+            changes.add_records({entry.id: entry for entry in self.load_entries()})
+            return changes
+
+        changes = ChangeSet()
+        ids = list(changed)
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            where = "WHERE id IN (%s)" % ", ".join("?" * len(chunk))
+            for row in self._select(where, chunk):
+                entry = self._from_row(row)
+                changes.put[entry.id] = entry
+        # Gone rows: their archived flag went with them
+        gone = changed.difference(changes.put)
+        changes.deleted.update(gone)
+        changes.archive_deleted.update(gone)
+        return changes or None
+
+    # ------------------------------------------------------------
+    # ONE-SHOT IMPORT FROM JSON
+    # ------------------------------------------------------------
+    def import_json(self, path):
+        """Copy entries from a JSON (or journal-backed) file into the database."""
+        directory, filename = os.path.split(path)
+        entries = TieredStorage(JournalStorage(filename, data_dir=directory)).load_entries()
+
+        rows = [self._to_row(entry) for entry in entries]
+        with self._lock, self._conn:
+            self._conn.executemany(self._UPSERT, rows)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('imported_from', ?)",
+                (path,),
+            )
+            self._reset_changes()
+        return len(rows)
+
+
+STORAGE_MODES = {
+    "json": Storage,
+    "journal": JournalStorage,
+    "binary": BinaryStorage,
+    "sqlite": SQLiteStorage,
+}
+
+
+def open_storage(filename="entries.json", mode=None, data_dir=None):
+    """Create the storage engine selected by `mode` or $CALMMIND_STORAGE.
+
+    The result keeps archived entries apart: iter_entry_batches() yields
+    active entries only and load_archive() returns the archived ones.
+    """
+    mode = mode or os.environ.get("CALMMIND_STORAGE", "journal")
+    if mode not in STORAGE_MODES:
+        print("WARNING: unknown storage mode %r, using journal." % mode)
+        mode = "journal"
+
+    storage = STORAGE_MODES[mode](filename, data_dir=data_dir)
+    if mode != "sqlite":  # archived rows are already kept apart by index
+        storage = TieredStorage(storage)
+    storage.change_log = ChangeLog(storage.data_dir)
+    return storage
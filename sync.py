@@ -0,0 +1,83 @@
+"""Two-way sync between two CalmMind data directories (`cli.py sync`).
+
+Each directory logs its changes (changelog.py), and remembers how far it
+has taken the other's log. A sync reads only the two log tails past those
+points and writes each side the records the other has not seen, so its
+cost follows the number of changes, not the number of entries. The first
+sync of a directory logs everything it holds as revision 1 once.
+
+Where both sides changed an entry, the version with the greater
+changelog.version() wins in both: the one edited more times, then an edit
+over a delete, then a fixed order of the two directories.
+"""
+
+import os
+
+from changelog import version
+from models import EntryModel
+
+
+def sync_storages(a, b):
+    """Bring two storages (from open_storage()) to the same contents.
+
+    Returns (changes written to a, changes written to b).
+    """
+    # Always lock in the same order, whoever starts the sync
+    first, second = sorted((a, b), key=lambda s: os.path.realpath(s.data_dir))
+    if os.path.realpath(first.data_dir) == os.path.realpath(second.data_dir):
+        raise ValueError("cannot sync a data directory with itself")
+
+    with first.file_lock, second.file_lock:
+        for storage in (a, b):
+            if not storage.change_log.enabled:
+                storage.change_log.enable(storage.load_entries())
+
+        log_a, log_b = a.change_log, b.change_log
+        if log_a.site == log_b.site:
+            raise ValueError(
+                "both directories are the same sync site; one is a copy "
+                "made after syncing: delete its sync.json and sync.log"
+            )
+
+        out_a, _ = log_a.changes_since(log_b.peer(log_a.site))
+        out_b, _ = log_b.changes_since(log_a.peer(log_b.site))
+
+        to_a, to_b = [], []
+        for entry_id, record in out_a.items():
+            other = out_b.get(entry_id)
+            if other is None:
+                to_b.append(record)
+            elif record.get("entry") == other.get("entry") and record["op"] == other["op"]:
+                continue  # the same change on both sides (or a first sync of copies)
+            elif version(record) > version(other):
+                to_b.append(record)
+            elif version(other) > version(record):
+                to_a.append(other)
+        to_a += [record for entry_id, record in out_b.items() if entry_id not in out_a]
+
+        _apply(a, to_a)
+        _apply(b, to_b)
+
+        # Past what was just written, so those records do not come back
+        log_b.set_peer(log_a.site, log_a.end())
+        log_a.set_peer(log_b.site, log_b.end())
+
+    return len(to_a), len(to_b)
+
+
+def _apply(storage, records):
+    """Write a peer's records, logged with their own rev and site."""
+    if not records:
+        return
+    saved = [EntryModel.from_dict(r["entry"]) for r in records if r["op"] == "put"]
+    deleted = [EntryModel("idea", "", "", id=r["id"]) for r in records if r["op"] == "delete"]
+
+    log = storage.change_log
+    log.suspended = True
+    try:
+        storage.save_batch(saved, deleted, None)
+    finally:
+        log.suspended = False
+    log.append(records)
+    storage.flush()
+
@@ -0,0 +1,117 @@
+import pytest
+
+from archive_index import ArchiveIndex
+from models import EntryModel
+from storage import open_storage
+
+
+MODES = ("json", "journal", "binary", "sqlite")
+
+
+def make_entries(count, archived=False):
+    entries = [EntryModel("task", "t%03d" % i, "", id="e%03d" % i) for i in range(count)]
+    for entry in entries:
+        entry.archived = archived
+    return entries
+
+
+def read_all_pages(storage, size):
+    seen, key = [], None
+    while True:
+        page, key = storage.archive_page(key, size)
+        seen.extend(entry.id for entry in page)
+        if key is None:
+            return seen
+
+
+# ------------------------------------------------------------
+# EMPTY AND MISSING ARCHIVE
+# ------------------------------------------------------------
+@pytest.mark.parametrize("mode", MODES)
+def test_fresh_data_dir_has_an_empty_archive(tmp_path, mode):
+    storage = open_storage(mode=mode, data_dir=str(tmp_path))
+    assert storage.archive_page(None, 10) == ([], None)
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_archive_empty_after_saving_active_entries(tmp_path, mode):
+    storage = open_storage(mode=mode, data_dir=str(tmp_path))
+    storage.save_entries(make_entries(3))
+    assert storage.archive_page(None, 10) == ([], None)
+
+
+def test_index_read_page_without_segment(tmp_path):
+    index = ArchiveIndex(str(tmp_path / "entries.archive.jsonl"))
+    assert index.refresh() == 0
+    assert index.read_page(None, 10) == ([], None)
+    assert not (tmp_path / "entries.archive.jsonl.idx").exists()
+
+
+def test_index_read_page_with_empty_segment(tmp_path):
+    path = tmp_path / "entries.archive.jsonl"
+    path.write_bytes(b"")
+    index = ArchiveIndex(str(path))
+    assert index.refresh() == 0
+    assert index.read_page(None, 10) == ([], None)
+
+
+# ------------------------------------------------------------
+# PAGING
+# ------------------------------------------------------------
+@pytest.mark.parametrize("mode", MODES)
+@pytest.mark.parametrize("size", [1, 7, 25, 100])
+def test_pages_cover_the_archive_newest_first(tmp_path, mode, size):
+    storage = open_storage(mode=mode, data_dir=str(tmp_path))
+    storage.save_entries(make_entries(25, archived=True))
+    assert read_all_pages(storage, size) == ["e%03d" % i for i in reversed(range(25))]
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_pages_follow_restores_and_deletes(tmp_path, mode):
+    storage = open_storage(mode=mode, data_dir=str(tmp_path))
+    entries = make_entries(10, archived=True)
+    storage.save_entries(entries)
+
+    entries[3].archived = False
+    live = [e for e in entries if e.id != "e005"]
+    storage.save_batch([entries[3]], [entries[5]], live)
+
+    expected = ["e009", "e008", "e007", "e006", "e004", "e002", "e001", "e000"]
+    assert read_all_pages(storage, 3) == expected
+    reopened = open_storage(mode=mode, data_dir=str(tmp_path))
+    assert read_all_pages(reopened, 3) == expected
+    assert [e.id for e in reopened.load_entries() if not e.archived] == ["e003"]
+
+
+@pytest.mark.parametrize("mode", ["journal", "binary"])
+def test_index_survives_reopen_and_rewrite(tmp_path, mode):
+    storage = open_storage(mode=mode, data_dir=str(tmp_path))
+    storage.save_entries(make_entries(6, archived=True))
+    first, key = storage.archive_page(None, 2)
+    assert [e.id for e in first] == ["e005", "e004"]
+
+    # A rewritten segment invalidates old keys rather than misreading them
+    storage.save_entries(make_entries(4, archived=True))
+    assert storage.archive_page(key, 2) == ([], None)
+    assert read_all_pages(storage, 2) == ["e003", "e002", "e001", "e000"]
+
+    reopened = open_storage(mode=mode, data_dir=str(tmp_path))
+    assert read_all_pages(reopened, 10) == ["e003", "e002", "e001", "e000"]
+
+
+# ------------------------------------------------------------
+# LOOKUP BY ID
+# ------------------------------------------------------------
+@pytest.mark.parametrize("mode", MODES)
+def test_archived_entries_by_id(tmp_path, mode):
+    storage = open_storage(mode=mode, data_dir=str(tmp_path))
+    assert storage.archived_entries(["e001"]) == []
+
+    entries = make_entries(10, archived=True)
+    entries[7].archived = False
+    storage.save_entries(entries)
+    entries[2].title = "edited"
+    storage.save_batch([entries[2]], [entries[4]], None)
+
+    found = storage.archived_entries(["e002", "e004", "e007", "e009", "missing"])
+    assert sorted((e.id, e.title) for e in found) == [("e002", "edited"), ("e009", "t009")]
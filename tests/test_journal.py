@@ -0,0 +1,68 @@
+import os
+
+import pytest
+
+from models import EntryModel
+from storage import BinaryStorage, JournalStorage
+
+
+ENGINES = (JournalStorage, BinaryStorage)
+
+
+def make_entry(i, title=None):
+    return EntryModel("task", title or "t%d" % i, "", id="e%03d" % i)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_appends_are_replayed_on_open(tmp_path, engine):
+    storage = engine(data_dir=str(tmp_path))
+    entries = [make_entry(i) for i in range(5)]
+    storage.save_entries(entries)
+    storage.save_batch([make_entry(1, "edited"), make_entry(9)], [entries[2]], None)
+
+    reopened = engine(data_dir=str(tmp_path))
+    titles = {e.id: e.title for e in reopened.load_entries()}
+    assert titles == {"e000": "t0", "e001": "edited", "e003": "t3", "e004": "t4", "e009": "t9"}
+    streamed = [e.id for batch in reopened.iter_entry_batches(2) for e in batch]
+    assert sorted(streamed) == sorted(titles)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("with_list", [True, False])
+def test_journal_is_compacted(tmp_path, engine, with_list):
+    storage = engine(data_dir=str(tmp_path), compact_threshold=4096)
+    entries = [make_entry(i) for i in range(20)]
+    storage.save_entries(entries)
+
+    for round_number in range(50):
+        for entry in entries:
+            entry.title = "round %d" % round_number
+        # The CLI and sync append without the live list (entries=None)
+        storage.save_batch(entries, [], entries if with_list else None)
+        storage.flush()
+        if os.path.exists(storage.journal_path):
+            assert os.path.getsize(storage.journal_path) < 2 * 4096
+
+    assert not os.path.exists(storage.old_journal_path)
+    reopened = engine(data_dir=str(tmp_path))
+    assert {e.title for e in reopened.load_entries()} == {"round 49"}
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_rotated_journal_is_folded_on_open(tmp_path, engine):
+    storage = engine(data_dir=str(tmp_path))
+    storage.save_entries([make_entry(0)])
+    storage.save_batch([make_entry(1)], [], None)
+    # As left by a compaction that never finished
+    os.replace(storage.journal_path, storage.old_journal_path)
+
+    reopened = engine(data_dir=str(tmp_path))
+    assert not os.path.exists(reopened.old_journal_path)
+    assert sorted(e.id for e in reopened.load_entries()) == ["e000", "e001"]
+
+
+def test_failed_append_raises(tmp_path):
+    storage = JournalStorage(data_dir=str(tmp_path))
+    os.mkdir(storage.journal_path)  # cannot be opened for appending
+    with pytest.raises(OSError):
+        storage.save_batch([make_entry(0)], [], None)
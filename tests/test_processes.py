@@ -0,0 +1,79 @@
+import pytest
+
+from models import EntryModel
+from storage import open_storage
+
+
+MODES = ("json", "journal", "binary", "sqlite")
+
+
+def make_entry(i, title=None):
+    return EntryModel("task", title or "t%d" % i, "", id="e%03d" % i)
+
+
+def titles(storage):
+    return {e.id: e.title for e in storage.load_entries()}
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_saves_keep_changes_made_elsewhere(tmp_path, mode):
+    """Two storages on one directory stand for two processes."""
+    a = open_storage(mode=mode, data_dir=str(tmp_path))
+    a.save_entries([make_entry(i) for i in range(3)])
+    b = open_storage(mode=mode, data_dir=str(tmp_path))
+    live_a, live_b = a.load_entries(), b.load_entries()
+
+    live_b.append(make_entry(7))
+    b.save_batch([live_b[-1]], [], live_b)
+    # a has not polled yet: its list lacks e007
+    live_a[0].title = "edited in a"
+    a.save_batch([live_a[0]], [live_a[2]], [live_a[0], live_a[1]])
+
+    expected = {"e000": "edited in a", "e001": "t1", "e007": "t7"}
+    assert titles(open_storage(mode=mode, data_dir=str(tmp_path))) == expected
+
+    changes = a.poll_changes()
+    assert changes is not None and "e007" in changes.put
+    assert b.poll_changes() is not None
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_batches_without_the_entry_list(tmp_path, mode):
+    storage = open_storage(mode=mode, data_dir=str(tmp_path))
+    storage.save_entries([make_entry(i) for i in range(3)])
+    other = open_storage(mode=mode, data_dir=str(tmp_path))
+
+    storage.save_batch([make_entry(1, "edited"), make_entry(5)], [make_entry(0)], None)
+    other.save_batch([make_entry(6)], [make_entry(2)], None)
+
+    expected = {"e001": "edited", "e005": "t5", "e006": "t6"}
+    assert titles(open_storage(mode=mode, data_dir=str(tmp_path))) == expected
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_poll_reports_nothing_after_own_writes(tmp_path, mode):
+    storage = open_storage(mode=mode, data_dir=str(tmp_path))
+    live = [make_entry(i) for i in range(3)]
+    storage.save_entries(live)
+    storage.load_entries()
+    storage.poll_changes()
+
+    live[1].title = "edited"
+    storage.save_batch([live[1]], [], live)
+    assert storage.poll_changes() is None
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_live_list_behind_a_poll_does_not_undo_changes(tmp_path, mode):
+    a = open_storage(mode=mode, data_dir=str(tmp_path))
+    a.save_entries([make_entry(i) for i in range(3)])
+    b = open_storage(mode=mode, data_dir=str(tmp_path))
+    live_a, live_b = a.load_entries(), b.load_entries()
+
+    b.save_batch([], [live_b[1]], live_b[:1] + live_b[2:])
+    # Polled, but the change is not merged into the live list yet
+    assert a.poll_changes() is not None
+    live_a[0].title = "edited in a"
+    a.save_batch([live_a[0]], [], live_a)
+
+    assert titles(open_storage(mode=mode, data_dir=str(tmp_path))) == {"e000": "edited in a", "e002": "t2"}
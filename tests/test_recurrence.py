@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+from models import EntryModel
+from recurrence import (
+    Recurrence, complete_occurrence, display_time, mark_fired, next_occurrence, next_reminder,
+)
+
+
+START = datetime(2026, 1, 31, 9, 0)
+
+
+def make_entry(rule, reminder_offset=None):
+    entry = EntryModel("task", "repeats", "", time=START, recurrence=rule)
+    if reminder_offset is not None:
+        entry.reminder_time = START - reminder_offset
+    return entry
+
+
+def test_monthly_falls_back_to_the_last_day():
+    rule = Recurrence("monthly")
+    assert [rule.nth(START, n).date().isoformat() for n in range(4)] == [
+        "2026-01-31", "2026-02-28", "2026-03-31", "2026-04-30",
+    ]
+
+
+def test_occurrences_stop_at_count_and_until():
+    assert len(list(Recurrence("daily", count=3).occurrences(START))) == 3
+    until = START + timedelta(weeks=4)
+    assert list(Recurrence("weekly", until=until).occurrences(START))[-1] == until
+    assert Recurrence("daily", interval=2, count=4).last(START) == START + timedelta(days=6)
+    assert Recurrence("daily").last(START) is None
+
+
+def test_next_occurrence_skips_done_ones():
+    entry = make_entry(Recurrence("daily"))
+    now = START + timedelta(days=3, hours=1)
+    assert next_occurrence(entry, now) == START + timedelta(days=4)
+
+    assert not complete_occurrence(entry, START + timedelta(days=4))
+    assert next_occurrence(entry, now) == START + timedelta(days=5)
+    assert display_time(entry, now) == START + timedelta(days=5)
+
+
+def test_completing_the_last_occurrence_finishes_the_series():
+    entry = make_entry(Recurrence("daily", count=2))
+    assert complete_occurrence(entry, START + timedelta(days=1))
+    assert next_occurrence(entry, START + timedelta(hours=1)) is None
+
+
+def test_reminders_move_past_the_ones_fired():
+    entry = make_entry(Recurrence("daily"), reminder_offset=timedelta(minutes=15))
+    after = START + timedelta(days=1, hours=-1)
+    due, moment = next_reminder(entry, after)
+    assert (due, moment) == (START + timedelta(days=1, minutes=-15), START + timedelta(days=1))
+
+    mark_fired(entry, due, after)
+    assert next_reminder(entry, after)[1] == START + timedelta(days=2)
+
+
+def test_rule_round_trips_through_dict():
+    rule = Recurrence("monthly", interval=3, until=START + timedelta(days=400))
+    rule.overrides = {START: {"done": True}}
+    again = Recurrence.from_dict(rule.to_dict())
+    assert again.to_dict() == rule.to_dict()
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+
+from archiver import AutoArchiver
+from models import EntryModel
+from scheduler import DueQueue, ReminderScheduler
+
+
+NOW = datetime(2026, 10, 17, 12, 0)
+
+
+def make_entry(i, **fields):
+    entry = EntryModel("task", "t%d" % i, "", id="e%d" % i)
+    for name, value in fields.items():
+        setattr(entry, name, value)
+    return entry
+
+
+# ------------------------------------------------------------
+# DUE QUEUE
+# ------------------------------------------------------------
+def test_due_queue_pops_in_due_order():
+    queue = DueQueue()
+    for item, minutes in (("c", 30), ("a", 10), ("b", 20), ("later", 90)):
+        queue.push_due(item, NOW + timedelta(minutes=minutes))
+
+    assert queue.peek_time() == NOW + timedelta(minutes=10)
+    fired = queue.pop_due(NOW + timedelta(minutes=30))
+    assert [item for item, _ in fired] == ["a", "b", "c"]
+    assert len(queue) == 1
+
+
+def test_due_queue_reschedule_and_discard():
+    queue = DueQueue()
+    queue.push_due("a", NOW)
+    queue.push_due("a", NOW + timedelta(hours=1))  # the earlier time is stale now
+    queue.push_due("b", NOW)
+    queue.discard("b")
+    queue.push_due("c", NOW)
+    queue.push_due("c", None)
+
+    assert queue.pop_due(NOW) == []
+    assert queue.peek_time() == NOW + timedelta(hours=1)
+    assert queue.pop_due(NOW + timedelta(hours=1)) == [("a", NOW + timedelta(hours=1))]
+    assert len(queue) == 0 and queue.peek_time() is None
+
+
+# ------------------------------------------------------------
+# REMINDERS
+# ------------------------------------------------------------
+def test_scheduler_posts_due_reminders():
+    scheduler = ReminderScheduler()
+    entries = [
+        make_entry(0, reminder_time=NOW - timedelta(minutes=5)),
+        make_entry(1, reminder_time=NOW + timedelta(minutes=5)),
+        make_entry(2, reminder_time=NOW - timedelta(minutes=5), notified=True),
+        make_entry(3, reminder_time=NOW - timedelta(minutes=5), done=True),
+    ]
+    scheduler.reschedule_many(entries)
+
+    assert scheduler.tick(NOW) == 1
+    assert scheduler.drain_events() == [("e0", NOW - timedelta(minutes=5))]
+
+    scheduler.unschedule(entries[1])
+    assert scheduler.tick(NOW + timedelta(hours=1)) == 0
+
+
+def test_scheduler_follows_edits():
+    scheduler = ReminderScheduler()
+    entry = make_entry(0, reminder_time=NOW + timedelta(minutes=5))
+    scheduler.reschedule(entry)
+    entry.reminder_time = NOW + timedelta(hours=2)
+    scheduler.reschedule(entry)
+
+    assert scheduler.tick(NOW + timedelta(hours=1)) == 0
+    assert scheduler.tick(NOW + timedelta(hours=2)) == 1
+
+
+# ------------------------------------------------------------
+# AUTO-ARCHIVE
+# ------------------------------------------------------------
+def test_archiver_pops_entries_a_day_past_their_time():
+    archiver = AutoArchiver(app=None)
+    old = make_entry(0, time=NOW - timedelta(days=2))
+    recent = make_entry(1, time=NOW - timedelta(hours=2))
+    untimed = make_entry(2)
+    gone = make_entry(3, time=NOW - timedelta(days=3))
+    for entry in (old, recent, untimed, gone):
+        archiver.track(entry)
+    archiver.untrack(gone)
+
+    assert archiver.pop_overdue(NOW) == [old]
+    assert archiver.pop_overdue(NOW + timedelta(days=1)) == [recent]
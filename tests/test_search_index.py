@@ -0,0 +1,42 @@
+from models import EntryModel
+from search_index import SearchIndex
+
+
+def make_entry(i, title, details=""):
+    return EntryModel("idea", title, details, id="e%d" % i)
+
+
+def test_prefix_terms_newest_first():
+    index = SearchIndex.build([
+        make_entry(0, "Buy apples"),
+        make_entry(1, "Apple pie recipe", "needs butter"),
+        make_entry(2, "Call the bank"),
+    ])
+    assert index.search("app") == ["e1", "e0"]
+    assert index.search("apple butt") == ["e1"]
+    assert index.search("pear") == []
+    assert index.search("app", limit=1) == ["e1"]
+
+
+def test_updates_and_removals():
+    entries = [make_entry(0, "first note"), make_entry(1, "second note")]
+    index = SearchIndex.build(entries)
+
+    entries[0].title = "first note, edited"
+    index.update(entries[0])  # edited entries rank as the newest
+    index.update(make_entry(2, "third"))
+    index.remove("e1")
+
+    assert index.search("note") == ["e0"]
+    assert index.search("edit") == ["e0"]
+    assert len(index) == 2
+
+
+def test_save_and_load_check_the_fingerprint(tmp_path):
+    path = str(tmp_path / "search_index.json")
+    index = SearchIndex.build([make_entry(0, "kept on disk")])
+    index.save(path, [["entries.json", 10, 1]])
+
+    assert SearchIndex.load(path, [["entries.json", 10, 2]]) is None
+    loaded = SearchIndex.load(path, [["entries.json", 10, 1]])
+    assert loaded.search("disk") == ["e0"]
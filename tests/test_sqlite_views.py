@@ -0,0 +1,46 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from entry_index import VIEWS, EntryIndex
+from models import EntryModel
+from recurrence import Recurrence
+from storage import SQLiteStorage
+
+
+NOW = datetime(2026, 10, 17, 12, 0)
+
+
+def make_entries():
+    entries = []
+    for i in range(60):
+        entry_type = ("idea", "task", "appointment")[i % 3]
+        entry = EntryModel(entry_type, "t%02d" % i, "", id="e%02d" % i)
+        if entry_type != "idea":
+            entry.time = NOW + timedelta(hours=(i * 7) % 50 - 20)
+        entry.archived = i % 11 == 0
+        entries.append(entry)
+    entries[4].recurrence = Recurrence("daily")
+    entries[4].time = NOW - timedelta(days=3, minutes=30)
+    return entries
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = SQLiteStorage(data_dir=str(tmp_path))
+    storage.save_entries(make_entries())
+    return storage
+
+
+@pytest.mark.parametrize("view", VIEWS)
+def test_view_queries_match_the_in_memory_views(storage, view):
+    expected = [entry.id for entry in EntryIndex(make_entries()).view(view, NOW)]
+    assert storage.query_view_ids(view, NOW) == expected
+    assert [entry.id for entry in storage.query_view(view, NOW)] == expected
+
+
+def test_view_indexes_exist(storage, tmp_path):
+    with sqlite3.connect(str(tmp_path / "entries.db")) as conn:
+        names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"idx_entries_archived", "idx_entries_type", "idx_entries_time", "idx_entries_reminder"} <= names
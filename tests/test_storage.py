@@ -0,0 +1,120 @@
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+import binary_format
+from models import EntryModel
+from recurrence import Recurrence
+from storage import WriteBehindStorage, open_storage
+
+
+MODES = ("json", "journal", "binary", "sqlite")
+NOW = datetime(2026, 10, 17, 12, 0)
+
+
+def make_entries(count):
+    entries = []
+    for i in range(count):
+        entry_type = ("idea", "task", "appointment")[i % 3]
+        entry = EntryModel(entry_type, "t%d" % i, "details %d" % i, id="e%03d" % i)
+        if entry_type != "idea":
+            entry.time = NOW + timedelta(hours=i)
+            entry.reminder_time = entry.time - timedelta(minutes=10)
+        entry.done = i % 4 == 0
+        entries.append(entry)
+    entries[1].recurrence = Recurrence("weekly", interval=2, count=5)
+    return entries
+
+
+def as_dicts(entries):
+    return sorted((e.to_dict() for e in entries), key=lambda d: d["id"])
+
+
+# ------------------------------------------------------------
+# EVERY ENGINE
+# ------------------------------------------------------------
+@pytest.mark.parametrize("mode", MODES)
+def test_round_trip(tmp_path, mode):
+    entries = make_entries(30)
+    entries[7].archived = True
+    open_storage(mode=mode, data_dir=str(tmp_path)).save_entries(entries)
+
+    storage = open_storage(mode=mode, data_dir=str(tmp_path))
+    assert as_dicts(storage.load_entries()) == as_dicts(entries)
+    streamed = [e for batch in storage.iter_entry_batches(7) for e in batch]
+    assert as_dicts(streamed) == as_dicts(e for e in entries if not e.archived)
+    assert [e.id for e in storage.load_archive()] == ["e007"]
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_batches_persist(tmp_path, mode):
+    storage = open_storage(mode=mode, data_dir=str(tmp_path))
+    entries = make_entries(10)
+    storage.save_entries(entries)
+
+    entries[2].title = "edited"
+    entries[3].archived = True
+    added = EntryModel("idea", "new", "", id="new")
+    live = [e for e in entries if e.id != "e005"] + [added]
+    storage.save_batch([entries[2], entries[3], added], [entries[5]], live)
+    storage.flush()
+
+    assert as_dicts(open_storage(mode=mode, data_dir=str(tmp_path)).load_entries()) == as_dicts(live)
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_write_behind_coalesces_and_flushes(tmp_path, mode):
+    storage = WriteBehindStorage(open_storage(mode=mode, data_dir=str(tmp_path)), latency=10)
+    entries = make_entries(5)
+    storage.save_entries(entries)
+    for i in range(20):
+        entries[0].title = "edit %d" % i
+        storage.save_entry(entries[0], entries)
+    storage.delete_entry(entries[4], entries[:4])
+    storage.flush()
+
+    titles = {e.id: e.title for e in open_storage(mode=mode, data_dir=str(tmp_path)).load_entries()}
+    assert titles == {"e000": "edit 19", "e001": "t1", "e002": "t2", "e003": "t3"}
+
+
+@pytest.mark.parametrize("mode", ["json", "journal", "binary"])
+def test_legacy_entries_get_stable_ids(tmp_path, mode):
+    legacy = [{"type": "idea", "title": "old %d" % i, "details": ""} for i in range(3)]
+    with open(os.path.join(str(tmp_path), "entries.json"), "w") as f:
+        json.dump(legacy, f)
+
+    first = [e.id for e in open_storage(mode=mode, data_dir=str(tmp_path)).load_entries()]
+    again = [e.id for e in open_storage(mode=mode, data_dir=str(tmp_path)).load_entries()]
+    assert len(set(first)) == 3 and first == again
+
+
+# ------------------------------------------------------------
+# FORMATS AND MIGRATION
+# ------------------------------------------------------------
+def test_binary_format_round_trip(tmp_path):
+    entries = make_entries(1200)  # more than one block
+    path = str(tmp_path / "entries.bin")
+    with open(path, "wb") as f:
+        binary_format.write_entries(f, entries)
+
+    assert binary_format.is_binary(path)
+    with open(path, "rb") as f:
+        assert as_dicts(binary_format.read_entries(f)) == as_dicts(entries)
+
+
+def test_corrupted_json_is_reset(tmp_path, capsys):
+    with open(os.path.join(str(tmp_path), "entries.json"), "w") as f:
+        f.write("[{not json")
+    assert open_storage(mode="json", data_dir=str(tmp_path)).load_entries() == []
+
+
+def test_sqlite_imports_an_existing_journal(tmp_path):
+    journal = open_storage(mode="journal", data_dir=str(tmp_path))
+    entries = make_entries(6)
+    journal.save_entries(entries[:4])
+    journal.save_batch(entries[4:], [entries[0]], None)
+
+    storage = open_storage(mode="sqlite", data_dir=str(tmp_path))
+    assert as_dicts(storage.load_entries()) == as_dicts(entries[1:])
@@ -0,0 +1,119 @@
+"""Two data directories synced through conflicts, log compaction and
+moves between tiers; after every sync both must hold the same entries
+and the same archive, and a second sync must change nothing."""
+
+import os
+
+import pytest
+
+import cli
+from changelog import ChangeLog
+from models import EntryModel
+from storage import open_storage
+from sync import sync_storages
+
+
+MODES = ("json", "journal", "binary", "sqlite")
+PAIRS = [(mode, mode) for mode in MODES] + [("journal", "sqlite"), ("json", "binary")]
+
+
+class Pair:
+    """Two data directories; every call opens fresh storages, like a new process."""
+
+    def __init__(self, root, mode_a, mode_b):
+        self.dirs = (str(root / "a"), str(root / "b"))
+        self.modes = (mode_a, mode_b)
+
+    def open(self, side):
+        return open_storage(mode=self.modes[side], data_dir=self.dirs[side])
+
+    def entries(self, side):
+        return {e.id: e for e in self.open(side).load_entries()}
+
+    def change(self, side, saved=(), deleted=()):
+        cli.commit(self.open(side), list(saved), list(deleted))
+
+    def edit(self, side, entry_id, **fields):
+        entry = self.entries(side)[entry_id]
+        for name, value in fields.items():
+            setattr(entry, name, value)
+        self.change(side, saved=[entry])
+
+    def site(self, side):
+        return self.open(side).change_log.site
+
+    def sync(self):
+        """Sync, check that both sides converged, and return side a's entries."""
+        sync_storages(self.open(0), self.open(1))
+        a, b = self.entries(0), self.entries(1)
+        assert {i: e.to_dict() for i, e in a.items()} == {i: e.to_dict() for i, e in b.items()}
+        archives = [sorted(e.id for e in self.open(side).load_archive()) for side in (0, 1)]
+        assert archives[0] == archives[1]
+        assert sync_storages(self.open(0), self.open(1)) == (0, 0)
+        return a
+
+
+@pytest.fixture(params=PAIRS, ids="-".join)
+def pair(request, tmp_path):
+    pair = Pair(tmp_path, *request.param)
+    entries = [EntryModel("task", "t%d" % i, "", id="e%02d" % i) for i in range(20)]
+    entries[5].archived = True
+    pair.change(0, saved=entries)
+    result = pair.sync()
+    assert len(result) == 20
+    return pair
+
+
+def test_equal_rev_conflict_goes_to_the_greater_site(pair):
+    # Both edited once: version() falls through to the site ids
+    pair.edit(0, "e01", title="from a")
+    pair.edit(1, "e01", title="from b")
+    winner = "from a" if pair.site(0) > pair.site(1) else "from b"
+    assert pair.sync()["e01"].title == winner
+
+
+def test_edit_and_delete(pair):
+    pair.edit(0, "e02", title="edited")
+    pair.change(1, deleted=[pair.entries(1)["e02"]])
+    pair.edit(0, "e03", title="edited")
+    pair.edit(1, "e03", title="edited twice")
+    pair.change(1, deleted=[pair.entries(1)["e03"]])
+
+    result = pair.sync()
+    # At equal rev the edit wins; a delete after more edits wins
+    assert result["e02"].title == "edited"
+    assert "e03" not in result
+
+
+def test_sync_after_log_compaction(pair):
+    log_path = ChangeLog(pair.dirs[0]).log_path
+    inode = os.stat(log_path).st_ino
+    storage = pair.open(0)
+    entry = pair.entries(0)["e04"]
+    for i in range(1100):  # past ChangeLog's compaction threshold
+        entry.title = "edit %d" % i
+        cli.commit(storage, [entry], [])
+    assert os.stat(log_path).st_ino != inode
+
+    pair.edit(1, "e06", title="edited in b")
+    result = pair.sync()
+    assert result["e04"].title == "edit 1099"
+    assert result["e06"].title == "edited in b"
+
+
+def test_moves_between_tiers(pair):
+    pair.edit(0, "e07", archived=True)
+    pair.edit(1, "e05", archived=False)
+    pair.edit(0, "e08", title="edited in a")
+    pair.edit(1, "e08", title="edited in b")
+    pair.edit(1, "e08", archived=True)
+
+    result = pair.sync()
+    assert result["e07"].archived and not result["e05"].archived
+    assert result["e08"].archived and result["e08"].title == "edited in b"
+
+
+def test_sync_with_itself_is_refused(tmp_path):
+    storage = open_storage(mode="journal", data_dir=str(tmp_path))
+    with pytest.raises(ValueError):
+        sync_storages(storage, open_storage(mode="journal", data_dir=str(tmp_path)))